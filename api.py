@@ -1,19 +1,45 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
-from typing import Dict
+from typing import Dict, Literal, Optional
+from datetime import datetime
 from models.spotify import SpotifyArtists
+from models.api import ArtistLookupRequest
 from services.spotify import SpotifyClient
 from services.redis import RedisService
+from services.autoscaler import get_autoscale_signal
+from services.archive import get_archive_client_options
+from services.bloom import get_artist_bloom
+from services.catalog import CatalogService, MIN_NAME_QUERY_LENGTH
+from services.export import ArtistExporter
+from services.artist_cache import ArtistCache
+from services.artist_ids import is_valid_artist_id
+from services.outbox import IngestionOutbox
+from services.status import get_status_snapshotter
+from services.events import get_event_broadcaster, event_stream
+from services.dispatcher import SearchDispatcher
+from services.metrics import render_metrics, update_gauges
+from services.rollups import get_history
+from services.tracing import get_recent_traces, summarize_traces
+from services.profiling import (
+    LoopMonitor, ProfilerListener, get_sampling_profiler, request_profile,
+    get_profile_results, format_folded, merge_folded
+)
+from config.rollups import get_rollup_config
+from config.outbox import get_outbox_config
+from config.storage import get_storage_config
 from contextlib import asynccontextmanager
 from database.database import get_db
+import asyncio
+import hmac
 import os
+import time
 from dotenv import load_dotenv
 from database.setup import ensure_database_exists
-from sqlalchemy.sql import func
 from sqlalchemy import select
-from models.database import Artist, SearchProgress
+from models.database import Artist, Genre
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
@@ -23,13 +49,26 @@ load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Watch the event loop from the start, so blocking startup work is reported too
+    loop_monitor = LoopMonitor(asyncio.get_running_loop())
+    loop_monitor.start()
+    profiler_listener = ProfilerListener(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    profiler_listener.start()
+
     # Startup: Create database if needed and sync Redis with Postgres
     ensure_database_exists()
+
+    # Build the /status snapshot in the background from now on
+    status_snapshotter = get_status_snapshotter(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    status_snapshotter.start()
     
     yield  # yields control back to FastAPI
     
-    # Shutdown: Add any cleanup here if needed
-    pass
+    # Shutdown: stop the background tasks
+    await get_event_broadcaster(os.getenv('REDIS_URL', 'redis://localhost:6379/0')).stop()
+    await status_snapshotter.stop()
+    profiler_listener.stop()
+    loop_monitor.stop()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -44,7 +83,8 @@ app.add_middleware(
 def get_spotify_client():
     return SpotifyClient(
         client_id=os.getenv('SPOTIFY_CLIENT_ID'),
-        client_secret=os.getenv('SPOTIFY_CLIENT_SECRET')
+        client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
+        **get_archive_client_options()
     )
 
 async def get_redis_service():
@@ -57,13 +97,42 @@ async def get_redis_service():
     finally:
         await redis_service.close()
     
+def require_service_secret(x_service_secret: Optional[str] = Header(default=None)):
+    """
+    Gate for the /debug endpoints: they expose search strings and can stall every
+    process for up to two minutes, so callers must send SERVICE_BYPASS_SECRET in
+    X-Service-Secret. Without a configured secret the endpoints are off.
+    """
+    secret = os.getenv('SERVICE_BYPASS_SECRET', '')
+    if not secret:
+        raise HTTPException(status_code=404, detail="Debug endpoints are disabled (SERVICE_BYPASS_SECRET is not set)")
+    if not x_service_secret or not hmac.compare_digest(x_service_secret.encode(), secret.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Service-Secret header")
+
 @app.get("/search", response_model=SpotifyArtists)
 async def search_artists(
+    response: Response,
     q: str = Query(..., description="Search query string"),
     offset: int = Query(default=0, ge=0, le=950),
+    source: Literal["spotify", "local", "auto"] = Query(
+        default="spotify",
+        description="spotify: always call Spotify; local: only the local catalogue; "
+                    "auto: local first, Spotify when fewer than min_results local matches"
+    ),
+    min_results: int = Query(default=10, ge=1, le=50),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Search for artists using Spotify API"""
+    """Search for artists using Spotify API, or the local catalogue to save rate budget"""
+    if source != "spotify" and len(q.strip()) >= MIN_NAME_QUERY_LENGTH:
+        local_artists = await CatalogService(db).search_by_name(q, limit=50, offset=offset)
+        if source == "local" or len(local_artists) >= min_results:
+            response.headers["X-Search-Source"] = "local"
+            return {"artists": local_artists}
+    elif source == "local":
+        raise HTTPException(status_code=400, detail=f"Search query must be at least {MIN_NAME_QUERY_LENGTH} characters")
+
+    response.headers["X-Search-Source"] = "spotify"
     try:
         return await spotify_client.search_artists(
             query=q,
@@ -75,57 +144,267 @@ async def search_artists(
     except httpx.HTTPError as e:
         raise HTTPException(status_code=e.response.status_code, detail=str(e))
 
-@app.get("/status", response_model=Dict)
-async def get_system_status(
+@app.get("/status")
+async def get_system_status(request: Request):
+    """
+    Get overall system status including active searches and rate limits. Served from
+    a snapshot rebuilt every STATUS_REFRESH_INTERVAL seconds; polls carrying the
+    snapshot's ETag in If-None-Match get a bodyless 304.
+    """
+    snapshot = await get_status_snapshotter(os.getenv('REDIS_URL', 'redis://localhost:6379/0')).current()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    Server-sent events for the dashboard: a full status `snapshot` event on connect
+    (and every EVENTS_RESYNC_INTERVAL seconds), then crawler events as they happen.
+    """
+    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    return StreamingResponse(
+        event_stream(get_event_broadcaster(redis_url), get_status_snapshotter(redis_url), request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics")
+async def get_metrics(
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Prometheus metrics; backlog and search slot gauges are read from Redis per scrape"""
+    try:
+        budget = await SearchDispatcher(redis_service).get_budget()
+        update_gauges(budget, await redis_service.get_pending_artist_count())
+    except Exception as e:
+        logger.error(f"Error updating metric gauges: {str(e)}")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/autoscale", response_model=Dict)
+async def get_autoscale_recommendation(
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """
+    Recommended Celery worker count and limiter saturation for an external autoscaler,
+    per live crawler node when sharded, plus the flusher's share of the ingestion
+    backlog. Reads only Redis, so it is cheap enough to poll every few seconds.
+    """
+    return await get_autoscale_signal(redis_service)
+
+@app.get("/stats/outbox", response_model=Dict)
+async def get_outbox_stats(
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Backlog, lag, in-flight entries, dead letters and throughput of the ingestion outbox"""
+    config = get_outbox_config()
+    return {
+        "artists": await IngestionOutbox(redis_service, config["artists_stream"]).stats(),
+    }
+
+@app.get("/stats/history", response_model=Dict)
+async def get_stats_history(
+    resolution: Literal["minute", "hour", "day"] = Query(default="minute"),
+    start: Optional[datetime] = Query(default=None, description="Defaults to 60 buckets before end"),
+    end: Optional[datetime] = Query(default=None, description="Defaults to now"),
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Per-minute, hourly or daily crawl throughput: requests, pages, artists, new artists, 429s, ingestion"""
+    seconds = get_rollup_config()["resolutions"][resolution]["seconds"]
+    end_ts = end.timestamp() if end else time.time()
+    start_ts = start.timestamp() if start else end_ts - 59 * seconds
+    if start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    try:
+        buckets = await get_history(redis_service, resolution, start_ts, end_ts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"resolution": resolution, "bucket_seconds": seconds, "buckets": buckets}
+
+@app.get("/debug/traces", response_model=Dict, dependencies=[Depends(require_service_secret)])
+async def get_debug_traces(
+    limit: int = Query(default=50, ge=1, le=500),
+    name: Optional[Literal["search", "ingestion_batch"]] = Query(default=None),
+    search: Optional[str] = Query(default=None, description="Only traces of this search string"),
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Span waterfalls of recently sampled searches and ingestion batches, with a per-stage breakdown"""
+    traces = await get_recent_traces(redis_service, limit=limit, name=name, search=search)
+    return {"traces": traces, "stages": summarize_traces(traces)}
+
+@app.post("/debug/profile", dependencies=[Depends(require_service_secret)])
+async def run_profile(
+    seconds: float = Query(default=10, gt=0, le=120),
+    target: Literal["api", "all"] = Query(
+        default="api",
+        description="api: profile this API process and return the result; all: every API and worker process via Redis"
+    ),
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Sampling profile as folded stacks (flamegraph.pl / speedscope input)"""
+    if target == "all":
+        profile_id, listeners = await request_profile(redis_service, seconds)
+        return {"profile_id": profile_id, "listeners": listeners, "ready_in_seconds": seconds}
+
+    try:
+        counts = await asyncio.to_thread(get_sampling_profiler().profile, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(format_folded(counts))
+
+@app.get("/debug/profile/{profile_id}", dependencies=[Depends(require_service_secret)])
+async def get_profile(
+    profile_id: str,
+    process: Optional[str] = Query(default=None, description="Only this process (host:pid)"),
+    redis_service: RedisService = Depends(get_redis_service)
+):
+    """Folded stacks of a profile requested with target=all, merged across the processes that finished"""
+    results = await get_profile_results(redis_service, profile_id)
+    if process:
+        results = {label: text for label, text in results.items() if label == process}
+    if not results:
+        raise HTTPException(status_code=404, detail="No results for this profile yet")
+    return PlainTextResponse(
+        format_folded(merge_folded(results.values())),
+        headers={"X-Profile-Processes": ",".join(sorted(results))}
+    )
+
+@app.get("/stats/bloom", response_model=Dict)
+async def get_bloom_stats():
+    """Size, memory and estimated false-positive rate of the artist ID Bloom filter"""
+    bloom = get_artist_bloom(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    if not bloom:
+        raise HTTPException(status_code=404, detail="Artist bloom filter is disabled")
+    return await bloom.stats()
+
+@app.get("/artists", response_model=Dict)
+async def list_artists(
+    sort: Literal["created_at", "popularity"] = Query(default="created_at", description="Sort key"),
+    order: Literal["asc", "desc"] = Query(default="asc"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    genre: Optional[str] = Query(default=None, description="Only artists with this genre"),
+    min_popularity: Optional[int] = Query(default=None, ge=0, le=100),
+    max_popularity: Optional[int] = Query(default=None, ge=0, le=100),
+    since: Optional[datetime] = Query(default=None, description="Only artists discovered at or after this time"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    compact: bool = Query(default=False, description="Positional rows of id, name, popularity"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Page through the collected artists with keyset pagination. Pass next_cursor
+    back as cursor to continue; deep pages cost the same as the first one.
+    """
+    try:
+        return await CatalogService(db).list_artists(
+            sort=sort,
+            descending=order == "desc",
+            cursor=cursor,
+            genre=genre,
+            min_popularity=min_popularity,
+            max_popularity=max_popularity,
+            since=since,
+            limit=limit,
+            compact=compact
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/artists/search", response_model=Dict)
+async def search_local_artists(
+    q: str = Query(..., description="Artist name to match"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Fuzzy name search over the local catalogue (pg_trgm), no Spotify request"""
+    try:
+        return {"artists": await CatalogService(db).search_by_name(q, limit=limit, offset=offset)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/artists/lookup", response_model=Dict)
+async def lookup_artists(
+    request: ArtistLookupRequest,
     redis_service: RedisService = Depends(get_redis_service),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get overall system status including active searches and rate limits"""
-    # Get active searches from Redis
-    active_searches = await redis_service.get_active_searches()
-    
-    # Get rate limit info and window requests
-    rate_limit_info = await redis_service.get_rate_limit_info()
-    window_requests = await redis_service.get_window_requests()
-    
-    # Get total artists count
-    artist_count_query = select(func.count()).select_from(Artist)
-    artist_count = await db.execute(artist_count_query)
-    total_artists = artist_count.scalar()
-    
-    # Get total searches count
-    search_count_query = select(func.count()).select_from(SearchProgress)
-    search_count = await db.execute(search_count_query)
-    total_searches = search_count.scalar()
-    
-    # Get earliest search time
-    earliest_search_query = select(func.min(SearchProgress.created_at)).select_from(SearchProgress)
-    earliest_search_result = await db.execute(earliest_search_query)
-    earliest_search_time = earliest_search_result.scalar()
-    
-    # Get recent searches
-    recent_searches_query = (
-        select(SearchProgress)
-        .order_by(SearchProgress.created_at.desc())
-        .limit(10)
+    """
+    Resolve a batch of artist IDs through the read-through Redis cache.
+    Returns found artists keyed by ID and the IDs that are not in the catalogue.
+    """
+    if get_storage_config()["artist_id_storage"] == "uuid":
+        # The uuid column only holds valid base62 IDs, and anything else fails to bind
+        invalid = [artist_id for artist_id in request.ids if not is_valid_artist_id(artist_id)]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid artist IDs: {', '.join(invalid[:20])}")
+    return await ArtistCache(redis_service, db).lookup(request.ids)
+
+@app.get("/artists/export")
+async def export_artists(
+    format: Literal["ndjson", "parquet"] = Query(default="ndjson"),
+    since: Optional[datetime] = Query(default=None, description="Only artists created at or after this time"),
+):
+    """
+    Stream the whole catalogue (or everything since a watermark) in constant memory.
+    The X-Export-Watermark header is the since value for the next incremental export.
+    """
+    try:
+        exporter = ArtistExporter(format=format, since=since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    extension = "parquet" if format == "parquet" else "ndjson"
+    return StreamingResponse(
+        exporter.stream(),
+        media_type=exporter.media_type,
+        headers={
+            "X-Export-Watermark": exporter.watermark.isoformat(),
+            "Content-Disposition": f'attachment; filename="artists.{extension}"',
+        }
+    )
+
+@app.get("/genres", response_model=Dict)
+async def list_genres(
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """Genres by number of artists, from the maintained counts in the genre dictionary"""
+    result = await db.execute(
+        select(Genre)
+        .order_by(Genre.artist_count.desc(), Genre.name)
+        .limit(limit)
+        .offset(offset)
     )
-    recent_searches_result = await db.execute(recent_searches_query)
-    recent_searches = recent_searches_result.scalars().all()
-    
     return {
-        "active_searches": active_searches,
-        "active_search_count": len(active_searches),
-        "rate_limit_status": rate_limit_info,
-        "window_requests": window_requests,
-        "total_artists_collected": total_artists,
-        "total_searches_completed": total_searches,
-        "earliest_search_time": earliest_search_time,
-        "recent_searches": [
-            {
-                "query": search.query,
-                "artists_found": search.artists,
-                "created_at": search.created_at.isoformat()
-            } for search in recent_searches
+        "genres": [
+            {"id": genre.id, "name": genre.name, "artist_count": genre.artist_count}
+            for genre in result.scalars().all()
         ]
     }
 
+@app.get("/genres/{name}/artists", response_model=Dict)
+async def list_genre_artists(
+    name: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Most popular artists in a genre with keyset pagination on (popularity, id):
+    pass next_cursor back as cursor. The (popularity, id) index backs the sort and
+    the GIN index on genre_ids the filter, so there is no OFFSET to scan past.
+    """
+    genre = (await db.execute(select(Genre).where(Genre.name == name))).scalar_one_or_none()
+    if not genre:
+        raise HTTPException(status_code=404, detail=f"Unknown genre: {name}")
+
+    try:
+        page = await CatalogService(db).list_artists(
+            sort="popularity", descending=True, cursor=cursor, genre=genre.name, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"genre": genre.name, "artist_count": genre.artist_count, **page}
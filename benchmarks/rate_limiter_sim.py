@@ -0,0 +1,303 @@
+# benchmarks/rate_limiter_sim.py
+"""
+Runs the real Redis rate limiter (RedisService.wait_for_request_slot) against a
+virtual clock with N simulated workers, and reports how close it gets to the
+configured rate. A simulated hour takes a few seconds.
+
+    python -m benchmarks.rate_limiter_sim --workers 20 --minutes 60
+    python -m benchmarks.rate_limiter_sim --jitter 0.3 --redis-latency 0.005 --json
+    python -m benchmarks.rate_limiter_sim --redis-url redis://localhost:6379/15
+
+Without --redis-url it runs on fakeredis (pip install fakeredis lupa). With a
+real Redis every run uses its own node-scoped keys and removes them afterwards.
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import heapq
+import json
+import random
+import statistics
+import sys
+import uuid
+from services.redis import RedisService
+
+try:
+    import fakeredis
+except ImportError:  # Only needed when no --redis-url is given
+    fakeredis = None
+
+
+class VirtualClock:
+    """
+    Simulated time for the limiter. Workers sleep on the clock; once every running
+    worker is asleep, time jumps to the earliest wake-up. Everything between two
+    sleeps, Redis round trips included, takes no virtual time.
+    """
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.now = start
+        self.running = 0
+        self._sleepers: List = []
+        self._sequence = 0
+        self._all_asleep = asyncio.Event()
+
+    def time(self) -> float:
+        return self.now
+
+    def _check_all_asleep(self):
+        if len(self._sleepers) >= self.running:
+            self._all_asleep.set()
+
+    async def sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._sleepers, (self.now + max(0.0, seconds), self._sequence, future))
+        self._check_all_asleep()
+        await future
+
+    def worker_started(self):
+        self.running += 1
+
+    def worker_finished(self):
+        self.running -= 1
+        self._check_all_asleep()
+
+    async def run(self):
+        """Advance time until every worker has finished"""
+        while self.running:
+            await self._all_asleep.wait()
+            self._all_asleep.clear()
+            if not self._sleepers:
+                continue
+            self.now = max(self.now, self._sleepers[0][0])
+            while self._sleepers and self._sleepers[0][0] <= self.now:
+                heapq.heappop(self._sleepers)[2].set_result(None)
+
+
+class RoundTripCounter:
+    """Counts Redis round trips (commands and pipeline executions) made through a client"""
+
+    def __init__(self, redis, clock: VirtualClock, latency: float = 0.0):
+        self.total = 0
+        self.by_command: Dict[str, int] = {}
+        execute_command = redis.execute_command
+        pipeline = redis.pipeline
+
+        async def round_trip(name: str):
+            self.total += 1
+            self.by_command[name] = self.by_command.get(name, 0) + 1
+            if latency:
+                await clock.sleep(latency)
+
+        async def counted_execute_command(*args, **kwargs):
+            await round_trip(str(args[0]).upper())
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*execute_args, **execute_kwargs):
+                await round_trip("PIPELINE")
+                return await execute(*execute_args, **execute_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        redis.execute_command = counted_execute_command
+        redis.pipeline = counted_pipeline
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def jain_fairness(counts: List[int]) -> float:
+    """Jain's fairness index: 1.0 when every worker got the same share, 1/n when one got everything"""
+    if not counts or not any(counts):
+        return 1.0
+    return sum(counts) ** 2 / (len(counts) * sum(count * count for count in counts))
+
+
+async def _simulated_worker(
+    index: int,
+    redis_service: RedisService,
+    clock: VirtualClock,
+    end: float,
+    rng: random.Random,
+    latency: float,
+    jitter: float,
+    grants: List[List[float]],
+    waits: List[float],
+    queued: List[bool]
+):
+    """Request a slot, spend a page's worth of time on the Spotify call and processing, repeat"""
+    try:
+        await clock.sleep(rng.uniform(0, latency))
+        offset = 0
+        while clock.now < end:
+            requested_at = clock.now
+            queued.append(await redis_service.wait_for_request_slot(query=f"sim{index}", offset=offset, limit=50))
+            waits.append(clock.now - requested_at)
+            grants[index].append(clock.now)
+            await clock.sleep(max(0.0, latency * (1 + rng.uniform(-jitter, jitter))))
+            offset += 50
+    finally:
+        clock.worker_finished()
+
+
+async def run_simulation(
+    workers: int = 20,
+    seconds: float = 3600,
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    redis_latency: float = 0.001,
+    max_requests: Optional[int] = None,
+    window: Optional[float] = None,
+    redis_url: Optional[str] = None,
+    seed: int = 0
+) -> Dict:
+    """Run the limiter for the given virtual seconds and return its utilization, waits and fairness"""
+    clock = VirtualClock()
+    rng = random.Random(seed)
+    node_id = f"limiter-sim-{uuid.uuid4().hex[:8]}"
+    server = None
+    if not redis_url:
+        if fakeredis is None:
+            raise RuntimeError("fakeredis is not installed; pass --redis-url or pip install fakeredis lupa")
+        server = fakeredis.FakeServer()
+
+    services, counters = [], []
+    for _ in range(workers):
+        redis_service = RedisService(redis_url or "redis://fakeredis", node_id=node_id)
+        if server:
+            redis_service.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        else:
+            await redis_service.init()
+        # Keep simulated requests off the dashboard event feed
+        redis_service.events_channel = f"{node_id}:events"
+        redis_service.rate_limit_max = max_requests or redis_service.rate_limit_max
+        redis_service.rate_limit_window = window or redis_service.rate_limit_window
+        redis_service.clock = clock.time
+        redis_service.sleep = (
+            lambda seconds: clock.sleep(seconds + rng.uniform(0, jitter * latency))
+        )
+        counters.append(RoundTripCounter(redis_service.redis, clock, redis_latency))
+        services.append(redis_service)
+
+    start = clock.now
+    end = start + seconds
+    grants: List[List[float]] = [[] for _ in range(workers)]
+    waits: List[float] = []
+    queued: List[bool] = []
+    tasks = []
+    for index, redis_service in enumerate(services):
+        clock.worker_started()
+        tasks.append(asyncio.ensure_future(_simulated_worker(
+            index, redis_service, clock, end, rng, latency, jitter, grants, waits, queued
+        )))
+
+    try:
+        await clock.run()
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if not server:
+            await services[0].redis.delete(services[0].requests_key, services[0].limiter_waiters_key)
+        for redis_service in services:
+            await redis_service.close()
+
+    rate_limit_max = services[0].rate_limit_max
+    rate_limit_window = services[0].rate_limit_window
+    granted_in_run = [sum(1 for granted_at in worker if granted_at <= end) for worker in grants]
+    granted = sum(granted_in_run)
+    theoretical = rate_limit_max * seconds / rate_limit_window
+    all_grants = sum(len(worker) for worker in grants)
+    by_command: Dict[str, int] = {}
+    for counter in counters:
+        for command, count in counter.by_command.items():
+            by_command[command] = by_command.get(command, 0) + count
+
+    return {
+        "workers": workers,
+        "virtual_seconds": seconds,
+        "rate_limit": f"{rate_limit_max}/{rate_limit_window:g}s",
+        "granted": granted,
+        "theoretical_max": theoretical,
+        "utilization": granted / theoretical if theoretical else 0.0,
+        "wait_seconds": {
+            "mean": statistics.fmean(waits) if waits else 0.0,
+            "p50": percentile(waits, 0.5),
+            "p90": percentile(waits, 0.9),
+            "p99": percentile(waits, 0.99),
+            "max": max(waits, default=0.0),
+        },
+        "queued_share": sum(queued) / len(queued) if queued else 0.0,
+        "fairness": {
+            "jain_index": jain_fairness(granted_in_run),
+            "min_per_worker": min(granted_in_run, default=0),
+            "max_per_worker": max(granted_in_run, default=0),
+        },
+        "redis_round_trips_per_grant": sum(by_command.values()) / all_grants if all_grants else 0.0,
+        "redis_round_trips": by_command,
+    }
+
+
+def format_report(report: Dict) -> str:
+    waits = report["wait_seconds"]
+    fairness = report["fairness"]
+    return "\n".join([
+        f"{report['workers']} workers, {report['virtual_seconds'] / 60:.0f} virtual minutes at {report['rate_limit']}",
+        f"Granted {report['granted']} of {report['theoretical_max']:.0f} possible requests "
+        f"({report['utilization']:.1%} utilization)",
+        f"Wait: mean {waits['mean']:.2f}s, p50 {waits['p50']:.2f}s, p90 {waits['p90']:.2f}s, "
+        f"p99 {waits['p99']:.2f}s, max {waits['max']:.2f}s ({report['queued_share']:.0%} of requests queued)",
+        f"Fairness: Jain index {fairness['jain_index']:.3f}, "
+        f"{fairness['min_per_worker']}-{fairness['max_per_worker']} requests per worker",
+        f"Redis: {report['redis_round_trips_per_grant']:.1f} round trips per granted request "
+        f"({', '.join(f'{command} {count}' for command, count in sorted(report['redis_round_trips'].items()))})",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Redis rate limiter on a virtual clock")
+    parser.add_argument("--workers", type=int, default=20, help="Simulated workers contending for the limit")
+    parser.add_argument("--minutes", type=float, default=60, help="Virtual minutes to simulate")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Seconds a worker spends on the Spotify call and page processing per request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Relative jitter on that latency; limiter sleeps also overshoot by up to jitter * latency")
+    parser.add_argument("--redis-latency", type=float, default=0.001, help="Virtual seconds per Redis round trip")
+    parser.add_argument("--max-requests", type=int, default=None, help="Override the requests per window")
+    parser.add_argument("--window", type=float, default=None, help="Override the window in seconds")
+    parser.add_argument("--redis-url", default=None, help="Run against this Redis instead of fakeredis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_simulation(
+            workers=args.workers,
+            seconds=args.minutes * 60,
+            latency=args.latency,
+            jitter=args.jitter,
+            redis_latency=args.redis_latency,
+            max_requests=args.max_requests,
+            window=args.window,
+            redis_url=args.redis_url,
+            seed=args.seed
+        ))
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 # celery_config.py
 from celery import Celery
+from celery.signals import worker_init, worker_ready, worker_shutdown, worker_process_init, worker_process_shutdown
 import os
 from dotenv import load_dotenv
 import multiprocessing
 from config.rate_limits import get_celery_rate_limit
+from config.dispatcher import get_dispatcher_config
+from config.sharding import get_node_id
+from config.metrics import get_metrics_config, use_metrics_family
 
 load_dotenv(override=False)  # Don't override Docker environment variables
+use_metrics_family("worker")  # Before tasks import services.metrics
 
 # Initialize Celery app
 celery_app = Celery(
@@ -28,14 +33,79 @@ celery_app.conf.update(
     },
 )
 
-# Beat schedule
+# Beat schedule - searches are admitted event-driven by the dispatcher,
+# this sweep only recovers slots freed by crashed or expired searches
 celery_app.conf.beat_schedule = {
     'generate-search-strings': {
         'task': 'tasks.generate_search_strings',
-        'schedule': 5,
+        'schedule': get_dispatcher_config()["sweep_seconds"],
+    },
+    # Inserts keep the filter current; the daily rebuild resizes it and drops stale layers
+    'rebuild-artist-bloom': {
+        'task': 'tasks.rebuild_artist_bloom',
+        'schedule': 24 * 60 * 60,
+    },
+    # /status counters are incremented on the write path; this corrects any drift
+    'reconcile-counters': {
+        'task': 'tasks.reconcile_counters',
+        'schedule': 15 * 60,
+    },
+    # Counts are incremented on insert; this fixes drift from refreshed genres
+    'reconcile-genres': {
+        'task': 'tasks.reconcile_genres',
+        'schedule': 6 * 60 * 60,
     },
 }
 
+# Crawler node membership - with CRAWLER_NODE_ID set, each worker host heartbeats
+# into the shard ring and should consume its own queue: -Q celery,search.<node_id>
+_node_heartbeat = None
+
+@worker_ready.connect
+def start_node_heartbeat(**kwargs):
+    global _node_heartbeat
+    node_id = get_node_id()
+    if node_id:
+        from services.sharding import NodeHeartbeat
+        _node_heartbeat = NodeHeartbeat(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), node_id)
+        _node_heartbeat.start()
+
+@worker_shutdown.connect
+def stop_node_heartbeat(**kwargs):
+    if _node_heartbeat:
+        _node_heartbeat.stop()
+
+# Prometheus metrics - pool processes write to PROMETHEUS_MULTIPROC_DIR and the
+# main process serves the aggregate on METRICS_WORKER_PORT
+@worker_init.connect
+def reset_worker_metrics(**kwargs):
+    from services.metrics import reset_multiproc_dir
+    reset_multiproc_dir()
+
+@worker_ready.connect
+def start_worker_metrics(**kwargs):
+    config = get_metrics_config()
+    if config["multiproc_dir"]:
+        from services.metrics import start_metrics_server
+        start_metrics_server(config["worker_port"])
+
+@worker_process_shutdown.connect
+def mark_worker_metrics_dead(pid=None, **kwargs):
+    from services.metrics import mark_process_dead
+    mark_process_dead(pid or os.getpid())
+
+# Loop health and on-demand profiling - each pool process gets its event loop up
+# front (tasks reuse it via asyncio.get_event_loop) so the monitor can watch it,
+# and listens for profile requests published over Redis
+@worker_process_init.connect
+def start_worker_profiling(**kwargs):
+    import asyncio
+    from services.profiling import LoopMonitor, ProfilerListener
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    LoopMonitor(loop).start()
+    ProfilerListener(os.getenv('REDIS_URL', 'redis://localhost:6379/0')).start()
+
 # This ensures the tasks are registered
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
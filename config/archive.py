@@ -0,0 +1,16 @@
+import os
+from typing import Dict
+
+# Spotify response archive. "record" appends every raw search response to the
+# archive, "replay" serves searches from it without touching the API or limiter.
+ARCHIVE_CONFIG = {
+    "mode": os.getenv("SPOTIFY_ARCHIVE_MODE", "off"),  # off | record | replay
+    "directory": os.getenv("SPOTIFY_ARCHIVE_DIR", "archive"),
+    # What replay does for a page that was never recorded: "empty" ends the search, "error" fails it
+    "on_miss": os.getenv("SPOTIFY_ARCHIVE_ON_MISS", "empty"),
+    # Only replay responses recorded at or before this unix timestamp (0 = latest)
+    "as_of": float(os.getenv("SPOTIFY_ARCHIVE_AS_OF", "0")),
+}
+
+def get_archive_config() -> Dict:
+    return ARCHIVE_CONFIG
@@ -0,0 +1,15 @@
+import os
+from typing import Dict
+
+# Inputs for the worker autoscaling recommendation served by /autoscale
+AUTOSCALE_CONFIG = {
+    "min_workers": int(os.getenv("AUTOSCALE_MIN_WORKERS", "1")),
+    "max_workers": int(os.getenv("AUTOSCALE_MAX_WORKERS", "10")),
+    # Concurrent search tasks a single Celery worker runs
+    "worker_slots": int(os.getenv("AUTOSCALE_WORKER_SLOTS", "4")),
+    # Pending ingestion items one ingestion flusher post slot is expected to drain
+    "backlog_per_slot": int(os.getenv("AUTOSCALE_BACKLOG_PER_SLOT", "500")),
+}
+
+def get_autoscale_config() -> Dict:
+    return AUTOSCALE_CONFIG
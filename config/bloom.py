@@ -0,0 +1,19 @@
+import os
+from typing import Dict
+
+# Scalable Bloom filter of known artist IDs, kept in Redis in front of the
+# Postgres existence check. Each new layer grows capacity and tightens error
+# so the overall false-positive rate stays under error_rate / (1 - tightening).
+BLOOM_CONFIG = {
+    "enabled": os.getenv("ARTIST_BLOOM_ENABLED", "true").lower() == "true",
+    "key": "bloom:artists",
+    "initial_capacity": int(os.getenv("ARTIST_BLOOM_CAPACITY", "5000000")),
+    "error_rate": float(os.getenv("ARTIST_BLOOM_ERROR_RATE", "0.001")),
+    "growth": 2,
+    "tightening": 0.5,
+    # IDs per script call while bulk loading from the artists table
+    "rebuild_chunk_size": 5000,
+}
+
+def get_bloom_config() -> Dict:
+    return BLOOM_CONFIG
@@ -0,0 +1,20 @@
+import os
+from typing import Dict
+
+# Search dispatcher tuning. The number of searches in flight is derived from the
+# Spotify rate limit and observed page latency; these values bound that estimate.
+DISPATCHER_CONFIG = {
+    # Hard ceiling on concurrently active searches, regardless of the estimate
+    "max_in_flight": int(os.getenv("DISPATCHER_MAX_IN_FLIGHT", "20")),
+    "min_in_flight": int(os.getenv("DISPATCHER_MIN_IN_FLIGHT", "1")),
+    # Requests allowed to queue on the limiter so a freed slot is used immediately
+    "queue_headroom": int(os.getenv("DISPATCHER_QUEUE_HEADROOM", "2")),
+    # EWMA smoothing factor and starting value for page latency (seconds)
+    "latency_alpha": 0.2,
+    "default_page_latency": 1.0,
+    # Safety-net sweep interval for the beat task (event-driven admission does the real work)
+    "sweep_seconds": 30,
+}
+
+def get_dispatcher_config() -> Dict:
+    return DISPATCHER_CONFIG
@@ -0,0 +1,25 @@
+import os
+from typing import Dict
+
+INGESTION_API_URL = "https://apiv2.streamclout.io/fetch/artists/full/batch"
+MAX_ALBUMS = 500
+
+# Standalone ingestion flusher (ingestion_flusher.py). Batches start at
+# initial_batch_size and adapt between min and max to keep POST latency
+# under target_latency; a partial batch is sent once it has waited max_linger.
+INGESTION_CONFIG = {
+    "min_batch_size": int(os.getenv("INGESTION_MIN_BATCH_SIZE", "10")),
+    "max_batch_size": int(os.getenv("INGESTION_MAX_BATCH_SIZE", "200")),
+    "initial_batch_size": int(os.getenv("INGESTION_BATCH_SIZE", "50")),
+    "max_linger": float(os.getenv("INGESTION_MAX_LINGER", "5.0")),
+    "max_in_flight": int(os.getenv("INGESTION_MAX_IN_FLIGHT", "4")),
+    "target_latency": float(os.getenv("INGESTION_TARGET_LATENCY", "2.0")),
+    # Only for APIs that decode Content-Encoding: gzip request bodies
+    "gzip": os.getenv("INGESTION_GZIP", "false").lower() == "true",
+    "timeout": 60.0,
+    # How often each flusher sweeps its stream for unacknowledged entries
+    "reclaim_interval": 30.0,
+}
+
+def get_ingestion_config() -> Dict:
+    return INGESTION_CONFIG
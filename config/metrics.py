@@ -0,0 +1,28 @@
+import os
+from typing import Dict
+
+# Prometheus metrics. Celery's prefork children and the ingestion flusher write
+# into their own subdirectory of PROMETHEUS_MULTIPROC_DIR (set it for those
+# processes); each family serves its aggregate on its own port for Prometheus
+# to scrape. The API serves /metrics.
+METRICS_CONFIG = {
+    "multiproc_dir": os.getenv("PROMETHEUS_MULTIPROC_DIR", ""),
+    "worker_port": int(os.getenv("METRICS_WORKER_PORT", "9808")),
+    "flusher_port": int(os.getenv("METRICS_FLUSHER_PORT", "9809")),
+}
+
+def get_metrics_config() -> Dict:
+    return METRICS_CONFIG
+
+def use_metrics_family(family: str):
+    """
+    Keep this process's metric files in <PROMETHEUS_MULTIPROC_DIR>/<family>, so a
+    family only resets and aggregates its own files. prometheus_client opens a
+    metric's file when the metric is created: call this before importing services.metrics.
+    """
+    base = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    if not base or os.path.basename(os.path.normpath(base)) == family:
+        return
+    directory = os.path.join(base, family)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    METRICS_CONFIG["multiproc_dir"] = directory
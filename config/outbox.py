@@ -0,0 +1,20 @@
+import os
+from typing import Dict
+
+# Ingestion outbox on Redis Streams. Senders claim entries through a consumer
+# group and acknowledge them only after a 2xx; entries left unacknowledged for
+# claim_timeout_ms are re-claimed, and moved to <stream>:dead after
+# max_deliveries attempts. The claim timeout must exceed twice the ingestion
+# flusher's max linger plus its post timeout (checked when the flusher starts).
+OUTBOX_CONFIG = {
+    # One entry per new artist, holding its packed ID and genres
+    "artists_stream": "outbox:artists",
+    "group": "ingestion",
+    "claim_timeout_ms": int(os.getenv("OUTBOX_CLAIM_TIMEOUT_MS", "120000")),
+    "max_deliveries": int(os.getenv("OUTBOX_MAX_DELIVERIES", "5")),
+    # Entries per re-claim sweep
+    "reclaim_count": 500,
+}
+
+def get_outbox_config() -> Dict:
+    return OUTBOX_CONFIG
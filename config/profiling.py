@@ -0,0 +1,21 @@
+import os
+from typing import Dict
+
+# On-demand sampling profiler and the always-on event loop monitor. The profiler
+# only runs while a profile is requested; the monitor wakes once per lag_interval.
+PROFILING_CONFIG = {
+    "sample_interval": float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005")),
+    "max_seconds": 120,
+    # Redis channel every API and worker process listens on, and where each
+    # process stores its folded stacks for a profile ID
+    "command_channel": "profiler:commands",
+    "result_prefix": "profiler:result",
+    "result_ttl": 3600,
+    # A loop that has not run a scheduled callback for slow_callback seconds is
+    # stalled; the blocking stack is logged once per stall
+    "lag_interval": float(os.getenv("LOOP_LAG_INTERVAL", "0.5")),
+    "slow_callback": float(os.getenv("LOOP_SLOW_CALLBACK_SECONDS", "0.1")),
+}
+
+def get_profiling_config() -> Dict:
+    return PROFILING_CONFIG
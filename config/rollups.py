@@ -0,0 +1,18 @@
+import os
+from typing import Dict
+
+# Throughput rollups in Redis. Every event is added to its minute, hour and day
+# bucket at once, so coarser resolutions are exact sums and need no compaction;
+# each bucket expires after its resolution's retention.
+ROLLUP_CONFIG = {
+    "resolutions": {
+        "minute": {"seconds": 60, "retention": int(os.getenv("ROLLUP_MINUTE_RETENTION", str(2 * 24 * 3600)))},
+        "hour": {"seconds": 3600, "retention": int(os.getenv("ROLLUP_HOUR_RETENTION", str(30 * 24 * 3600)))},
+        "day": {"seconds": 86400, "retention": int(os.getenv("ROLLUP_DAY_RETENTION", str(400 * 24 * 3600)))},
+    },
+    # Most buckets one /stats/history call returns
+    "max_points": 2000,
+}
+
+def get_rollup_config() -> Dict:
+    return ROLLUP_CONFIG
@@ -0,0 +1,24 @@
+import os
+import socket
+from typing import Dict, Optional
+
+# Multi-node crawling. Leave CRAWLER_NODE_ID unset to run as a single node with
+# the original global keys; set it per host to shard the prefix space.
+SHARDING_CONFIG = {
+    "node_id": os.getenv("CRAWLER_NODE_ID", ""),
+    # Seconds between heartbeats, and how long a silent node stays in the ring
+    "heartbeat_interval": int(os.getenv("CRAWLER_HEARTBEAT_INTERVAL", "10")),
+    "node_ttl": int(os.getenv("CRAWLER_NODE_TTL", "30")),
+    # Virtual nodes per crawler node, smooths shard sizes on the hash ring
+    "virtual_nodes": 64,
+}
+
+def get_sharding_config() -> Dict:
+    return SHARDING_CONFIG
+
+def get_node_id() -> Optional[str]:
+    """This host's crawler node ID, or None when sharding is disabled"""
+    node_id = SHARDING_CONFIG["node_id"]
+    if node_id == "hostname":
+        return socket.gethostname()
+    return node_id or None
@@ -0,0 +1,17 @@
+import os
+from typing import Dict
+
+# /status is served from a snapshot rebuilt in the background on this cadence,
+# so dashboard polling costs the same no matter how many tabs are open
+STATUS_CONFIG = {
+    "refresh_interval": float(os.getenv("STATUS_REFRESH_INTERVAL", "1.0")),
+    # /events: a full snapshot is re-sent this often so applied deltas can't drift,
+    # idle streams get a keep-alive comment, and a viewer this many events behind is
+    # disconnected (its browser reconnects and starts over from a snapshot)
+    "events_resync_interval": float(os.getenv("EVENTS_RESYNC_INTERVAL", "30")),
+    "events_keepalive": 15.0,
+    "events_queue_size": 1000,
+}
+
+def get_status_config() -> Dict:
+    return STATUS_CONFIG
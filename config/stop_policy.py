@@ -0,0 +1,20 @@
+import os
+from typing import Dict
+
+# Early termination of paginated searches. Deep pages on a mature crawl are mostly
+# artists we already have, so a search stops once its pages stop paying for themselves.
+STOP_POLICY_CONFIG = {
+    # Comma separated list of policies to combine: low_yield, marginal_yield (empty disables)
+    "policies": os.getenv("STOP_POLICIES", "low_yield,marginal_yield"),
+    # low_yield: stop after N consecutive pages where less than X of the artists were new
+    "low_yield_pages": int(os.getenv("STOP_LOW_YIELD_PAGES", "3")),
+    "low_yield_ratio": float(os.getenv("STOP_LOW_YIELD_RATIO", "0.05")),
+    # marginal_yield: stop when the expected new artists on the next page drops below
+    # this fleet-wide threshold (can be overridden at runtime in Redis)
+    "min_expected_new": float(os.getenv("STOP_MIN_EXPECTED_NEW", "1.0")),
+    "marginal_yield_min_pages": 2,
+    "marginal_yield_alpha": 0.5,
+}
+
+def get_stop_policy_config() -> Dict:
+    return STOP_POLICY_CONFIG
@@ -0,0 +1,15 @@
+import os
+from typing import Dict
+
+# Physical storage of artist IDs. "text" keeps the 22-character base62 key;
+# "uuid" stores the same 128-bit value in a 16-byte uuid column. The uuid
+# layout applies when tables are created, so pick it before the first run.
+STORAGE_CONFIG = {
+    "artist_id_storage": os.getenv("ARTIST_ID_STORAGE", "text"),  # text | uuid
+    # "insert" never touches known artists; "refresh" rewrites a known artist only
+    # when its name, genres or popularity changed (compared via content_hash)
+    "artist_upsert_mode": os.getenv("ARTIST_UPSERT_MODE", "insert"),  # insert | refresh
+}
+
+def get_storage_config() -> Dict:
+    return STORAGE_CONFIG
@@ -0,0 +1,13 @@
+import os
+from typing import Dict
+
+# Sampled span tracing of searches and ingestion batches. Finished traces go to
+# a capped Redis list shared by all workers and read by /debug/traces.
+TRACING_CONFIG = {
+    "sample_rate": float(os.getenv("TRACE_SAMPLE_RATE", "0.05")),
+    "ring_key": "traces:recent",
+    "ring_size": int(os.getenv("TRACE_RING_SIZE", "500")),
+}
+
+def get_tracing_config() -> Dict:
+    return TRACING_CONFIG
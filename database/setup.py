@@ -1,6 +1,6 @@
 import os
 import psycopg2
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from database.database import Base
 from dotenv import load_dotenv
 
@@ -16,6 +16,22 @@ DB_NAME = os.getenv("DB_NAME", "spotify_db")
 # Use sync URL for setup
 SYNC_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Idempotent DDL for columns and indexes added after the initial schema.
+# create_all only creates missing tables, so existing databases are upgraded here.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE search_progress ADD COLUMN IF NOT EXISTS stop_reason VARCHAR",
+    "ALTER TABLE artists ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "ALTER TABLE artists ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE artists ADD COLUMN IF NOT EXISTS genre_ids INTEGER[]",
+    "CREATE INDEX IF NOT EXISTS ix_artists_genre_ids ON artists USING gin (genre_ids)",
+    "CREATE INDEX IF NOT EXISTS ix_search_progress_created_at ON search_progress (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_artists_created_at_id ON artists (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_artists_popularity_id ON artists (popularity, id)",
+    # Trigram index for local name search; GiST so nearest matches come straight off the index
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_artists_name_trgm ON artists USING gist (name gist_trgm_ops)",
+]
+
 def ensure_database_exists():
     """Ensure spotify_db database exists, create if it doesn't"""
     try:
@@ -44,6 +60,9 @@ def ensure_database_exists():
         # Create tables in the database
         engine = create_engine(SYNC_DATABASE_URL)
         Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            for statement in SCHEMA_UPGRADES:
+                connection.execute(text(statement))
         print("Tables created successfully")
         
     except Exception as e:
@@ -19,6 +19,7 @@ import { RecentSearch } from "@/types/spotify";
               <TableRow>
                 <TableHead className="text-gray-600">Query</TableHead>
                 <TableHead className="text-gray-600">Artists Found</TableHead>
+                <TableHead className="text-gray-600">Stop Reason</TableHead>
                 <TableHead className="text-gray-600">Completed At</TableHead>
               </TableRow>
             </TableHeader>
@@ -27,6 +28,7 @@ import { RecentSearch } from "@/types/spotify";
                 <TableRow key={index} className="hover:bg-gray-50">
                   <TableCell className="font-mono text-gray-900">{search.query}</TableCell>
                   <TableCell className="text-gray-900">{search.artists_found}</TableCell>
+                  <TableCell className="font-mono text-gray-600">{search.stop_reason ?? "-"}</TableCell>
                   <TableCell className="text-gray-900">
                     {new Date(search.created_at).toLocaleTimeString()}
                   </TableCell>
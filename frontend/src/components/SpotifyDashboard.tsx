@@ -5,7 +5,8 @@ import { RequestsTable } from './RequestsTable';
 import { SearchesTable } from './SearchesTable';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { DashboardData } from '../types/spotify';
+import { CrawlerEvent, DashboardData } from '../types/spotify';
+import { applyEvent, pruneWindow } from '../lib/dashboardEvents';
 
 interface ChartDataPoint {
   x: number;
@@ -22,34 +23,42 @@ const SpotifyDashboard = () => {
   const [lastUpdated, setLastUpdated] = useState<Date>(new Date());
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const apiUrl = import.meta.env.VITE_API_URL || '/api';
-        const statusResponse = await fetch(`${apiUrl}/status`, {
-          method: 'GET',
-          headers: {
-            'Accept': 'application/json',
-          },
-        });
-
-        if (!statusResponse.ok) {
-          const statusError = await statusResponse.text().catch(() => 'No error details');
-          console.error('Status Error:', statusError);
-          throw new Error(`API Error - Status: ${statusResponse.status}`);
-        }
-
-        const statusData: DashboardData = await statusResponse.json();
-        setData(statusData);
-        setLastUpdated(new Date());
-      } catch (err) {
-        console.error('Fetch error:', err);
-        setError(err instanceof Error ? err.message : 'An error occurred');
+    // One long-lived connection: a full snapshot on connect (and periodically
+    // from the server), then crawler events applied as deltas
+    const apiUrl = import.meta.env.VITE_API_URL || '/api';
+    const events = new EventSource(`${apiUrl}/events`);
+
+    events.addEventListener('snapshot', (message) => {
+      const snapshot = JSON.parse((message as MessageEvent).data) as DashboardData;
+      setData(pruneWindow(snapshot, Date.now() / 1000));
+      setError(null);
+      setLastUpdated(new Date());
+    });
+
+    events.onmessage = (message) => {
+      const event = JSON.parse(message.data) as CrawlerEvent;
+      setData(current => current && applyEvent(current, event));
+      setLastUpdated(new Date());
+    };
+
+    // EventSource reconnects by itself and gets a fresh snapshot
+    events.onerror = () => {
+      if (events.readyState === EventSource.CLOSED) {
+        setError('Event stream closed');
+      } else {
+        console.error('Event stream interrupted, reconnecting');
       }
     };
 
-    fetchData();
-    const interval = setInterval(fetchData, 1000);
-    return () => clearInterval(interval);
+    // Slide the rate window locally between events
+    const tick = setInterval(() => {
+      setData(current => current && pruneWindow(current, Date.now() / 1000));
+    }, 1000);
+
+    return () => {
+      clearInterval(tick);
+      events.close();
+    };
   }, []);
 
   if (error) return (
@@ -0,0 +1,75 @@
+// lib/dashboardEvents.ts
+import { CrawlerEvent, DashboardData } from '../types/spotify';
+
+const RECENT_SEARCHES = 10;
+
+// Drop requests that left the rate window and move the window to `now` (seconds)
+export function pruneWindow(data: DashboardData, now: number): DashboardData {
+  const status = data.rate_limit_status;
+  const windowStart = now - status.window_size;
+  const windowRequests = data.window_requests.filter(req => req.timestamp >= windowStart);
+  return {
+    ...data,
+    window_requests: windowRequests,
+    rate_limit_status: {
+      ...status,
+      current_requests: windowRequests.length,
+      remaining_requests: Math.max(0, status.max_requests - windowRequests.length),
+      window_start: windowStart,
+      window_end: now,
+    },
+  };
+}
+
+// Apply one crawler event to the last snapshot
+export function applyEvent(data: DashboardData, event: CrawlerEvent): DashboardData {
+  switch (event.type) {
+    case 'request':
+      return pruneWindow({
+        ...data,
+        window_requests: [
+          { timestamp: event.timestamp, method: 'GET', query: event.query, offset: event.offset, limit: event.limit, artists_found: 0 },
+          ...data.window_requests,
+        ],
+      }, Math.max(event.timestamp, data.rate_limit_status.window_end));
+
+    case 'page_fetched':
+      return {
+        ...data,
+        window_requests: data.window_requests.map(req =>
+          req.query === event.query && req.offset === event.offset
+            ? { ...req, artists_found: event.artists_found }
+            : req
+        ),
+      };
+
+    case 'search_started': {
+      if (data.active_searches.includes(event.query)) return data;
+      const activeSearches = [...data.active_searches, event.query];
+      return { ...data, active_searches: activeSearches, active_search_count: activeSearches.length };
+    }
+
+    case 'search_removed': {
+      const activeSearches = data.active_searches.filter(query => query !== event.query);
+      return { ...data, active_searches: activeSearches, active_search_count: activeSearches.length };
+    }
+
+    case 'search_finished':
+      return {
+        ...data,
+        total_searches_completed: data.total_searches_completed + 1,
+        earliest_search_time: data.earliest_search_time || event.created_at,
+        recent_searches: [
+          { query: event.query, artists_found: event.artists_found, stop_reason: event.stop_reason, created_at: event.created_at },
+          ...data.recent_searches,
+        ].slice(0, RECENT_SEARCHES),
+      };
+
+    case 'counter':
+      if (event.name !== 'total_artists') return data;
+      return { ...data, total_artists_collected: data.total_artists_collected + event.amount };
+
+    default:
+      return data;
+  }
+}
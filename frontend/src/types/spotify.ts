@@ -5,7 +5,9 @@ export interface RateLimitStatus {
     current_requests: number;
     max_requests: number;
     remaining_requests: number;
-    time_until_next_request: number;
+    // Not in /status snapshots, which leave out clock-derived fields to keep their ETag
+    // stable; pruneWindow fills in the window bounds on the client
+    time_until_next_request?: number;
     window_start: number;
     window_end: number;
   }
@@ -22,6 +24,7 @@ export interface RateLimitStatus {
   export interface RecentSearch {
     query: string;
     artists_found: number;
+    stop_reason: string | null;
     created_at: string;
   }
   
@@ -44,4 +47,12 @@ export interface RateLimitStatus {
   
   export interface CollectionMetrics {
     hourly_progress: CollectionProgress[];
-  }
\ No newline at end of file
+  }
+  // Events pushed by /events (published by the crawler on crawler:events)
+  export type CrawlerEvent =
+    | { type: 'request'; query: string; offset: number; limit: number; timestamp: number }
+    | { type: 'page_fetched'; query: string; offset: number; artists_found: number }
+    | { type: 'search_started'; query: string }
+    | { type: 'search_removed'; query: string }
+    | { type: 'search_finished'; query: string; artists_found: number; stop_reason: string | null; created_at: string }
+    | { type: 'counter'; name: string; amount: number };
@@ -0,0 +1,65 @@
+# ingestion_flusher.py
+"""
+Standalone process that drains the ingestion outbox into the ingestion and
+genres APIs, so crawl tasks never wait on them. Run one (or more) next to the
+Celery workers:
+
+    python ingestion_flusher.py
+"""
+import asyncio
+import os
+import signal
+import logging
+from dotenv import load_dotenv
+from config.metrics import get_metrics_config, use_metrics_family
+
+load_dotenv(override=False)
+# The metric files are opened when services.metrics is first imported below
+use_metrics_family("flusher")
+
+from services.redis import RedisService
+from services.outbox import IngestionOutbox
+from services.ingestion import IngestionClient, OutboxFlusher
+from config.outbox import get_outbox_config
+from services.metrics import reset_multiproc_dir, start_metrics_server
+from services.profiling import LoopMonitor, ProfilerListener
+from config.ingestion import get_ingestion_config
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    reset_multiproc_dir()
+    start_metrics_server(get_metrics_config()["flusher_port"])
+    LoopMonitor(asyncio.get_running_loop()).start()
+    ProfilerListener(os.getenv('REDIS_URL', 'redis://localhost:6379/0')).start()
+
+    redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    await redis_service.init()
+    client = IngestionClient(redis_service)
+
+    # Each batch posts to both APIs, so allow two connections per batch in flight
+    semaphore = asyncio.Semaphore(max(1, get_ingestion_config()["max_in_flight"] // 2))
+    flusher = OutboxFlusher(
+        IngestionOutbox(redis_service, get_outbox_config()["artists_stream"]),
+        client.send_entries,
+        semaphore
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Ingestion flusher started")
+    try:
+        await flusher.run(stop)
+    finally:
+        await client.close()
+        await redis_service.close()
+        logger.info(f"Ingestion flusher stopped after sending {flusher.sent} entries")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Largest batch accepted by POST /artists/lookup
+MAX_LOOKUP_IDS = 5000
+
+class ArtistLookupRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_LOOKUP_IDS)
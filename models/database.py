@@ -1,19 +1,39 @@
-from sqlalchemy import Column, Integer, String, DateTime, ARRAY
+from sqlalchemy import Column, Integer, String, DateTime, ARRAY, Index
+from sqlalchemy.dialects import postgresql
 from datetime import datetime, timezone
 from database.database import Base
+from models.types import SpotifyId
 
 class Artist(Base):
     __tablename__ = "artists"
 
-    id = Column(String, primary_key=True)
+    id = Column(SpotifyId, primary_key=True)
     name = Column(String, nullable=False)
     genres = Column(ARRAY(String))
+    genre_ids = Column(postgresql.ARRAY(Integer))  # IDs into the genres dictionary, GIN indexed
     popularity = Column(Integer)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
+    content_hash = Column(String)  # Hash of name, genres and popularity for change detection
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True))  # Last time a refresh changed the row
+
+    __table_args__ = (
+        Index("ix_artists_genre_ids", "genre_ids", postgresql_using="gin"),
+        # Keyset pagination for /artists
+        Index("ix_artists_created_at_id", "created_at", "id"),
+        Index("ix_artists_popularity_id", "popularity", "id"),
+    )
+
+class Genre(Base):
+    __tablename__ = "genres"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    artist_count = Column(Integer, nullable=False, default=0, server_default="0")
 
 class SearchProgress(Base):
     __tablename__ = "search_progress"
 
     query = Column(String, primary_key=True)
     artists = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
\ No newline at end of file
+    stop_reason = Column(String)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
\ No newline at end of file
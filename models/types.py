@@ -0,0 +1,36 @@
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.types import TypeDecorator
+from services.artist_ids import artist_id_to_uuid, artist_id_from_uuid
+from config.storage import get_storage_config
+
+class SpotifyId(TypeDecorator):
+    """
+    Spotify base62 ID, always a str in Python. With ARTIST_ID_STORAGE=uuid it is
+    stored on Postgres as its 128-bit value in a uuid column and the text form is
+    derived on read; otherwise it is a plain string column.
+    """
+    impl = String
+    cache_ok = True
+
+    def _compact(self, dialect) -> bool:
+        return dialect.name == "postgresql" and get_storage_config()["artist_id_storage"] == "uuid"
+
+    def load_dialect_impl(self, dialect):
+        if self._compact(dialect):
+            return dialect.type_descriptor(UUID(as_uuid=True))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and self._compact(dialect):
+            return artist_id_to_uuid(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and self._compact(dialect):
+            return artist_id_from_uuid(value)
+        return value
+
+    def storage_value(self, value: str, dialect):
+        """Driver-level value for raw COPY paths that bypass bind processing"""
+        return self.process_bind_param(value, dialect)
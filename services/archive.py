@@ -0,0 +1,170 @@
+from typing import Dict, Optional, Tuple
+import asyncio
+import fcntl
+from functools import lru_cache
+import gzip
+import json
+import os
+import time
+import logging
+import httpx
+from config.archive import get_archive_config
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = "responses.dat"
+INDEX_FILE = "index.jsonl"
+
+ArchiveKey = Tuple[str, int, int]  # (query, offset, limit)
+
+
+class ResponseArchive:
+    """
+    Append-only archive of raw Spotify search responses.
+
+    Bodies are stored as individual gzip members appended to responses.dat; every
+    record gets one JSON line in index.jsonl with its query, offset, limit, timestamp
+    and byte range. Appends take an exclusive file lock so all Celery processes on a
+    host can record into the same archive.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        # Loaded indexes keyed by as_of, so each snapshot is only read once
+        self._indexes: Dict[float, Dict[ArchiveKey, Dict]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    async def record(
+        self,
+        query: str,
+        offset: int,
+        limit: int,
+        body: bytes,
+        status_code: int = 200,
+        timestamp: Optional[float] = None
+    ) -> Dict:
+        """Append one response without blocking the event loop on disk IO"""
+        return await asyncio.to_thread(
+            self._append, query, offset, limit, body, status_code, timestamp or time.time()
+        )
+
+    def _append(
+        self,
+        query: str,
+        offset: int,
+        limit: int,
+        body: bytes,
+        status_code: int,
+        timestamp: float
+    ) -> Dict:
+        compressed = gzip.compress(body)
+        with open(self.data_path, "ab") as data_file, open(self.index_path, "a", encoding="utf-8") as index_file:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+            try:
+                data_file.seek(0, os.SEEK_END)
+                entry = {
+                    "query": query,
+                    "offset": offset,
+                    "limit": limit,
+                    "timestamp": timestamp,
+                    "status": status_code,
+                    "position": data_file.tell(),
+                    "length": len(compressed),
+                }
+                data_file.write(compressed)
+                data_file.flush()
+                # Index line is written only after the body, so readers never see a dangling entry
+                index_file.write(json.dumps(entry) + "\n")
+                index_file.flush()
+            finally:
+                fcntl.flock(data_file, fcntl.LOCK_UN)
+        return entry
+
+    def load_index(self, as_of: float = 0) -> Dict[ArchiveKey, Dict]:
+        """Map each (query, offset, limit) to its latest record, optionally as of a timestamp"""
+        index: Dict[ArchiveKey, Dict] = {}
+        if not os.path.exists(self.index_path):
+            return index
+
+        with open(self.index_path, "r", encoding="utf-8") as index_file:
+            for line in index_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-append
+                    continue
+                if as_of and entry["timestamp"] > as_of:
+                    continue
+                key = (entry["query"], entry["offset"], entry["limit"])
+                current = index.get(key)
+                if current is None or entry["timestamp"] >= current["timestamp"]:
+                    index[key] = entry
+        return index
+
+    def lookup(self, query: str, offset: int, limit: int, as_of: float = 0) -> Optional[Dict]:
+        """Find the index entry for a request, loading the index for this as_of on first use"""
+        index = self._indexes.get(as_of)
+        if index is None:
+            index = self._indexes[as_of] = self.load_index(as_of)
+            logger.info(f"Loaded response archive index with {len(index)} pages from {self.directory}")
+        return index.get((query, offset, limit))
+
+    def read(self, entry: Dict) -> bytes:
+        """Read and decompress the body for an index entry"""
+        with open(self.data_path, "rb") as data_file:
+            data_file.seek(entry["position"])
+            return gzip.decompress(data_file.read(entry["length"]))
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport that answers Spotify search requests from a ResponseArchive"""
+
+    def __init__(self, archive: ResponseArchive, on_miss: str = "empty", as_of: float = 0):
+        self.archive = archive
+        self.on_miss = on_miss
+        self.as_of = as_of
+        self.hits = 0
+        self.misses = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        query = params.get("q", "")
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 50))
+
+        entry = self.archive.lookup(query, offset, limit, self.as_of)
+        if entry is None:
+            self.misses += 1
+            logger.warning(f"Archive miss for {query} at offset {offset}")
+            if self.on_miss == "error":
+                return httpx.Response(404, json={"error": "not in archive"}, request=request)
+            return httpx.Response(200, json={"artists": {"items": []}}, request=request)
+
+        self.hits += 1
+        body = await asyncio.to_thread(self.archive.read, entry)
+        return httpx.Response(
+            entry["status"],
+            content=body,
+            headers={"Content-Type": "application/json"},
+            request=request
+        )
+
+
+@lru_cache(maxsize=None)
+def get_response_archive(directory: str) -> ResponseArchive:
+    """One archive per process, so the replay index is loaded once and not per task"""
+    return ResponseArchive(directory)
+
+
+def get_archive_client_options() -> Dict:
+    """SpotifyClient keyword arguments for the configured archive mode"""
+    config = get_archive_config()
+    mode = config["mode"]
+    if mode == "record":
+        return {"archive": get_response_archive(config["directory"])}
+    if mode == "replay":
+        archive = get_response_archive(config["directory"])
+        return {"transport": ReplayTransport(archive, on_miss=config["on_miss"], as_of=config["as_of"])}
+    return {}
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+import json
+import os
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.redis import RedisService
+from services.catalog import CatalogService
+
+logger = logging.getLogger(__name__)
+
+ARTIST_CACHE_TTL = int(os.getenv('ARTIST_CACHE_TTL', '3600'))
+# Unknown IDs are cached too, but briefly, since the crawler may find them any moment
+ARTIST_CACHE_NEGATIVE_TTL = int(os.getenv('ARTIST_CACHE_NEGATIVE_TTL', '300'))
+ARTIST_CACHE_PREFIX = "artist_cache:"
+# Marker stored for IDs known not to exist
+NEGATIVE_ENTRY = ""
+
+
+class ArtistCache:
+    """
+    Read-through Redis cache for batch artist lookups.
+
+    A batch costs one MGET, one Postgres query for the cache misses (chunked
+    = ANY lookups) and one pipelined write-back of found and missing entries.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        session: AsyncSession,
+        ttl: int = ARTIST_CACHE_TTL,
+        negative_ttl: int = ARTIST_CACHE_NEGATIVE_TTL
+    ):
+        self.redis_service = redis_service
+        self.catalog = CatalogService(session)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    async def _read_cache(self, artist_ids: List[str]) -> List[Optional[str]]:
+        try:
+            return await self.redis_service.redis.mget([ARTIST_CACHE_PREFIX + artist_id for artist_id in artist_ids])
+        except Exception as e:
+            # Serve from Postgres rather than failing the lookup
+            logger.error(f"Error reading artist cache: {str(e)}")
+            return [None] * len(artist_ids)
+
+    async def _write_cache(self, found: Dict[str, Dict], missing: List[str]):
+        try:
+            async with self.redis_service.redis.pipeline(transaction=False) as pipe:
+                for artist_id, artist in found.items():
+                    await pipe.set(ARTIST_CACHE_PREFIX + artist_id, json.dumps(artist), ex=self.ttl)
+                for artist_id in missing:
+                    await pipe.set(ARTIST_CACHE_PREFIX + artist_id, NEGATIVE_ENTRY, ex=self.negative_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error writing artist cache: {str(e)}")
+
+    async def lookup(self, artist_ids: List[str]) -> Dict:
+        """Resolve IDs to artists; returns found artists by ID, missing IDs and cache hit count"""
+        if not self.redis_service.redis:
+            await self.redis_service.init()
+
+        unique_ids = list(dict.fromkeys(artist_ids))
+        if not unique_ids:
+            return {"found": {}, "missing": [], "cache_hits": 0}
+
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        uncached: List[str] = []
+        for artist_id, cached in zip(unique_ids, await self._read_cache(unique_ids)):
+            if cached is None:
+                uncached.append(artist_id)
+            elif cached == NEGATIVE_ENTRY:
+                missing.append(artist_id)
+            else:
+                found[artist_id] = json.loads(cached)
+        cache_hits = len(unique_ids) - len(uncached)
+
+        if uncached:
+            loaded = await self.catalog.get_artists_by_ids(uncached)
+            newly_missing = [artist_id for artist_id in uncached if artist_id not in loaded]
+            await self._write_cache(loaded, newly_missing)
+            found.update(loaded)
+            missing.extend(newly_missing)
+
+        logger.debug(f"Artist lookup of {len(unique_ids)} IDs: {cache_hits} from cache, {len(uncached)} from Postgres")
+        return {"found": found, "missing": missing, "cache_hits": cache_hits}
@@ -0,0 +1,78 @@
+from uuid import UUID
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spotify IDs are 128-bit values written as 22 base62 digits in this order
+BASE62_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BASE62_INDEX = {char: index for index, char in enumerate(BASE62_ALPHABET)}
+ARTIST_ID_LENGTH = 22
+ARTIST_ID_BYTES = 16
+MAX_ARTIST_ID = (1 << 128) - 1
+
+
+def encode_artist_id(artist_id: str) -> int:
+    """Base62 artist ID -> 128-bit integer"""
+    if len(artist_id) != ARTIST_ID_LENGTH:
+        raise ValueError(f"Artist ID must be {ARTIST_ID_LENGTH} characters: {artist_id!r}")
+
+    value = 0
+    for char in artist_id:
+        digit = BASE62_INDEX.get(char)
+        if digit is None:
+            raise ValueError(f"Invalid base62 character {char!r} in artist ID {artist_id!r}")
+        value = value * 62 + digit
+
+    if value > MAX_ARTIST_ID:
+        raise ValueError(f"Artist ID does not fit in 128 bits: {artist_id!r}")
+    return value
+
+
+def is_valid_artist_id(artist_id: str) -> bool:
+    """True if the ID is 22 base62 digits that fit in 128 bits"""
+    try:
+        encode_artist_id(artist_id)
+    except ValueError:
+        return False
+    return True
+
+
+def decode_artist_id(value: int) -> str:
+    """128-bit integer -> base62 artist ID (zero padded to 22 characters)"""
+    if not 0 <= value <= MAX_ARTIST_ID:
+        raise ValueError(f"Artist ID value out of range: {value}")
+
+    chars = []
+    for _ in range(ARTIST_ID_LENGTH):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def artist_id_to_uuid(artist_id: str) -> UUID:
+    return UUID(int=encode_artist_id(artist_id))
+
+
+def artist_id_from_uuid(value: UUID) -> str:
+    return decode_artist_id(value.int)
+
+
+def pack_artist_id(artist_id: str) -> bytes:
+    """
+    Compact form for Redis buffers: 16 raw bytes. IDs that are not valid
+    base62 (never expected from Spotify) are kept as their UTF-8 text, padded
+    with a leading NUL if needed so the length alone tells the forms apart.
+    """
+    try:
+        return encode_artist_id(artist_id).to_bytes(ARTIST_ID_BYTES, "big")
+    except ValueError:
+        logger.warning(f"Storing non-base62 artist ID as text: {artist_id!r}")
+        text = artist_id.encode("utf-8")
+        return b"\x00" + text if len(text) == ARTIST_ID_BYTES else text
+
+
+def unpack_artist_id(packed: bytes) -> str:
+    """Inverse of pack_artist_id; also accepts IDs buffered in text form"""
+    if len(packed) == ARTIST_ID_BYTES:
+        return decode_artist_id(int.from_bytes(packed, "big"))
+    return packed.lstrip(b"\x00").decode("utf-8")
@@ -0,0 +1,125 @@
+from typing import Callable, List, Optional, Set, Tuple
+import asyncio
+import os
+import time
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import AsyncSessionLocal
+from models.spotify import SpotifyArtist
+from services.database import DatabaseService
+from services.bloom import ArtistBloomFilter
+from services.artist_ids import pack_artist_id
+from services.metrics import DB_UPSERT_SECONDS, DB_UPSERT_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Write-behind configuration: flush when this many rows are buffered or the
+# oldest buffered page has waited this many seconds
+SINK_MAX_ROWS = int(os.getenv('ARTIST_SINK_MAX_ROWS', '500'))
+SINK_MAX_LINGER = float(os.getenv('ARTIST_SINK_MAX_LINGER', '2.0'))
+
+
+class ArtistSink:
+    """
+    Write-behind buffer for artist pages.
+
+    Pages from any search running in this worker are accumulated and written in
+    one bulk merge per flush. Each submitted page gets a future that resolves to
+    the IDs from that page which were new to the database, so callers can carry
+    on paging and handle new artists once the flush lands. Those sets hold the
+    packed 16-byte form (services.artist_ids.pack_artist_id), not the text IDs.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_rows: int = SINK_MAX_ROWS,
+        max_linger: float = SINK_MAX_LINGER,
+        bloom: Optional[ArtistBloomFilter] = None
+    ):
+        self.session_factory = session_factory
+        self.bloom = bloom
+        self.max_rows = max_rows
+        self.max_linger = max_linger
+        self._pending: List[Tuple[List[SpotifyArtist], asyncio.Future]] = []
+        self._pending_rows = 0
+        self._linger_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        # Running totals of inserted / changed / unchanged rows across flushes
+        self.write_stats = {"inserted": 0, "changed": 0, "unchanged": 0}
+
+    def submit(self, artists: List[SpotifyArtist]) -> asyncio.Future:
+        """Buffer a page and return a future for its set of new, packed artist IDs"""
+        future = asyncio.get_running_loop().create_future()
+        if not artists:
+            future.set_result(set())
+            return future
+
+        self._pending.append((artists, future))
+        self._pending_rows += len(artists)
+
+        if self._pending_rows >= self.max_rows:
+            asyncio.ensure_future(self.flush())
+        elif self._linger_task is None:
+            self._linger_task = asyncio.ensure_future(self._flush_after_linger())
+        return future
+
+    async def _flush_after_linger(self):
+        await asyncio.sleep(self.max_linger)
+        self._linger_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far and resolve the page futures"""
+        async with self._flush_lock:
+            batch, self._pending, self._pending_rows = self._pending, [], 0
+            if self._linger_task is not None and self._linger_task is not asyncio.current_task():
+                self._linger_task.cancel()
+            self._linger_task = None
+            if not batch:
+                return
+
+            try:
+                started = time.perf_counter()
+                async with self.session_factory() as session:
+                    service = DatabaseService(session, bloom=self.bloom)
+                    new_ids = await service.bulk_insert_artists(
+                        [artist for artists, _ in batch for artist in artists]
+                    )
+                DB_UPSERT_SECONDS.observe(time.perf_counter() - started)
+                for outcome, count in service.last_write_stats.items():
+                    self.write_stats[outcome] += count
+                    DB_UPSERT_ROWS.labels(outcome=outcome).inc(count)
+            except Exception as e:
+                logger.error(f"Artist sink flush of {len(batch)} pages failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            # An artist that appears on several buffered pages counts as new only once
+            new_ids = {pack_artist_id(artist_id) for artist_id in new_ids}
+            claimed: Set[bytes] = set()
+            for artists, future in batch:
+                page_new_ids = {pack_artist_id(artist.id) for artist in artists} & new_ids - claimed
+                claimed |= page_new_ids
+                if not future.done():
+                    future.set_result(page_new_ids)
+
+    async def close(self):
+        """Flush whatever is left, e.g. on worker shutdown"""
+        await self.flush()
+
+
+_sink: Optional[ArtistSink] = None
+_sink_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_artist_sink(bloom: Optional[ArtistBloomFilter] = None) -> ArtistSink:
+    """Process-wide sink shared by every search running on this event loop"""
+    global _sink, _sink_loop
+    loop = asyncio.get_running_loop()
+    if _sink is None or _sink_loop is not loop:
+        _sink = ArtistSink(bloom=bloom)
+        _sink_loop = loop
+    return _sink
@@ -0,0 +1,112 @@
+from typing import Dict, Optional
+import math
+import logging
+from services.redis import RedisService
+from services.dispatcher import SearchDispatcher
+from services.sharding import get_live_nodes
+from config.autoscale import get_autoscale_config
+
+logger = logging.getLogger(__name__)
+
+
+def recommend_workers(
+    target_in_flight: int,
+    frontier_size: Optional[int],
+    current_requests: int,
+    max_requests: int,
+    limiter_queue_length: int
+) -> Dict:
+    """
+    Turn crawler signals into a worker count and a limiter saturation score.
+
+    Crawl capacity is sized from the dispatcher's target, not the number of active
+    searches, so workers that would only sleep on the limiter are never requested.
+    Saturation is window utilization plus the queue of requests waiting for a slot,
+    relative to the window size: 1.0 means the limiter is fully used, anything
+    above means requests are piling up and more workers will not help.
+    """
+    config = get_autoscale_config()
+
+    crawl_slots = target_in_flight if frontier_size is None or frontier_size > 0 else 0
+
+    recommended = math.ceil(crawl_slots / config["worker_slots"])
+    recommended = max(config["min_workers"], min(recommended, config["max_workers"]))
+
+    saturation = (min(current_requests, max_requests) + limiter_queue_length) / max_requests
+
+    return {
+        "recommended_workers": recommended,
+        "saturation": round(saturation, 3),
+        "crawl_slots": crawl_slots,
+    }
+
+
+def recommend_flusher_slots(ingestion_backlog: int) -> int:
+    """
+    Posts in flight the ingestion flusher needs to drain the outbox backlog.
+    Celery workers never touch the outbox, so this sizes ingestion_flusher.py
+    (INGESTION_MAX_IN_FLIGHT), not the worker pool.
+    """
+    return math.ceil(ingestion_backlog / get_autoscale_config()["backlog_per_slot"])
+
+
+async def get_node_signal(redis_service: RedisService) -> Dict:
+    """Worker recommendation for the crawler node whose keys redis_service reads"""
+    budget = await SearchDispatcher(redis_service).get_budget()
+    rate_limit_info = await redis_service.get_rate_limit_info()
+    frontier_size = await redis_service.get_frontier_size()
+
+    recommendation = recommend_workers(
+        target_in_flight=budget["target_in_flight"],
+        frontier_size=frontier_size,
+        current_requests=rate_limit_info["current_requests"],
+        max_requests=rate_limit_info["max_requests"],
+        limiter_queue_length=budget["limiter_queue_length"]
+    )
+
+    return {
+        **recommendation,
+        "signals": {
+            "active_searches": budget["active_searches"],
+            "target_in_flight": budget["target_in_flight"],
+            "limiter_queue_length": budget["limiter_queue_length"],
+            "page_latency": budget["page_latency"],
+            "limiter_utilization": rate_limit_info["current_requests"] / rate_limit_info["max_requests"],
+            "frontier_size": frontier_size,
+        }
+    }
+
+
+async def get_autoscale_signal(redis_service: RedisService) -> Dict:
+    """
+    Collect limiter, frontier and backlog signals from Redis and compute the recommendation.
+
+    Each sharded crawler node keeps its limiter and frontier under its own keys and
+    scales its own workers, so live nodes get one recommendation each, summed into
+    the fleet total. Without sharding the single node reads the global keys.
+    """
+    pending_artists = await redis_service.get_pending_artist_count()
+    flusher = {
+        "recommended_slots": recommend_flusher_slots(pending_artists),
+        "pending_artists": pending_artists,
+    }
+
+    node_ids = await get_live_nodes(redis_service)
+    if not node_ids:
+        return {**await get_node_signal(redis_service), "flusher": flusher}
+
+    nodes = {}
+    for node_id in node_ids:
+        node_service = RedisService(redis_service.redis_url, node_id=node_id)
+        await node_service.init()
+        try:
+            nodes[node_id] = await get_node_signal(node_service)
+        finally:
+            await node_service.close()
+
+    return {
+        "recommended_workers": sum(node["recommended_workers"] for node in nodes.values()),
+        "saturation": max(node["saturation"] for node in nodes.values()),
+        "nodes": nodes,
+        "flusher": flusher,
+    }
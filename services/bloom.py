@@ -0,0 +1,349 @@
+from redis.asyncio import Redis
+from typing import Dict, List, Optional, Tuple
+import math
+import time
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import Artist
+from config.bloom import get_bloom_config
+
+logger = logging.getLogger(__name__)
+
+# Shared Lua helpers. Hashing happens server side (sha1 split into two 48-bit
+# halves, combined by double hashing), so every check or add is one round trip
+# no matter how many layers the filter has grown.
+#
+# Key layout under the base key:
+#   <base>:current / <base>:building  -> generation IDs
+#   <base>:<gen>:meta                 -> capacity, error_rate, growth, tightening, layers, ready
+#   <base>:<gen>:counts               -> items added per layer
+#   <base>:<gen>:layer:<i>            -> bitmap of layer i
+BLOOM_LUA_HELPERS = """
+local function layer_params(meta, i)
+    local capacity = math.floor(meta.capacity * meta.growth ^ i)
+    local error_rate = meta.error_rate * meta.tightening ^ i
+    local bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ^ 2))
+    local hashes = math.max(1, math.ceil(bits / capacity * math.log(2)))
+    return capacity, bits, hashes
+end
+
+local function positions(id, bits, hashes)
+    local digest = redis.sha1hex(id)
+    local a = tonumber(string.sub(digest, 1, 12), 16) % bits
+    local b = tonumber(string.sub(digest, 13, 24), 16) % bits
+    if b == 0 then b = 1 end
+    local result = {}
+    for i = 0, hashes - 1 do
+        result[#result + 1] = (a + i * b) % bits
+    end
+    return result
+end
+
+local function load_meta(prefix)
+    local values = redis.call('HMGET', prefix .. ':meta', 'capacity', 'error_rate', 'growth', 'tightening', 'layers', 'ready')
+    if not values[1] then
+        return nil
+    end
+    return {
+        capacity = tonumber(values[1]),
+        error_rate = tonumber(values[2]),
+        growth = tonumber(values[3]),
+        tightening = tonumber(values[4]),
+        layers = tonumber(values[5]),
+        ready = values[6] == '1'
+    }
+end
+
+local function contains(prefix, meta, id)
+    for i = meta.layers - 1, 0, -1 do
+        local _, bits, hashes = layer_params(meta, i)
+        local key = prefix .. ':layer:' .. i
+        local present = true
+        for _, position in ipairs(positions(id, bits, hashes)) do
+            if redis.call('GETBIT', key, position) == 0 then
+                present = false
+                break
+            end
+        end
+        if present then
+            return true
+        end
+    end
+    return false
+end
+
+local function add(prefix, meta, id)
+    if contains(prefix, meta, id) then
+        return 1
+    end
+    local layer = meta.layers - 1
+    local capacity, bits, hashes = layer_params(meta, layer)
+    local key = prefix .. ':layer:' .. layer
+    for _, position in ipairs(positions(id, bits, hashes)) do
+        redis.call('SETBIT', key, position, 1)
+    end
+    if redis.call('HINCRBY', prefix .. ':counts', layer, 1) >= capacity then
+        -- Layer is full: later items go into a bigger, tighter layer
+        meta.layers = redis.call('HINCRBY', prefix .. ':meta', 'layers', 1)
+    end
+    return 0
+end
+"""
+
+# KEYS[1] = base key; ARGV[1..4] = capacity, error_rate, growth, tightening;
+# ARGV[5] = target generation ('' = current, plus any rebuild in progress); ARGV[6..] = IDs.
+# Returns 1 per ID that was possibly present already, 0 if it was definitely new.
+BLOOM_ADD_SCRIPT = BLOOM_LUA_HELPERS + """
+local base = KEYS[1]
+local function ensure_generation(gen)
+    local prefix = base .. ':' .. gen
+    if not load_meta(prefix) then
+        redis.call('HSET', prefix .. ':meta',
+            'capacity', ARGV[1], 'error_rate', ARGV[2], 'growth', ARGV[3],
+            'tightening', ARGV[4], 'layers', 1, 'ready', 0)
+    end
+    return prefix
+end
+
+local targets = {}
+if ARGV[5] ~= '' then
+    targets[1] = ensure_generation(ARGV[5])
+else
+    local current = redis.call('GET', base .. ':current')
+    if not current then
+        current = '0'
+        redis.call('SET', base .. ':current', current)
+    end
+    targets[1] = ensure_generation(current)
+    local building = redis.call('GET', base .. ':building')
+    if building then
+        targets[2] = ensure_generation(building)
+    end
+end
+
+local metas = {}
+for t, prefix in ipairs(targets) do
+    metas[t] = load_meta(prefix)
+end
+
+local result = {}
+for i = 6, #ARGV do
+    for t, prefix in ipairs(targets) do
+        local flag = add(prefix, metas[t], ARGV[i])
+        if t == 1 then
+            result[#result + 1] = flag
+        end
+    end
+end
+return result
+"""
+
+# KEYS[1] = base key; ARGV = IDs. Until a full load has completed every ID is
+# reported as possibly present, so callers fall back to Postgres.
+BLOOM_CONTAINS_SCRIPT = BLOOM_LUA_HELPERS + """
+local base = KEYS[1]
+local current = redis.call('GET', base .. ':current')
+local meta = current and load_meta(base .. ':' .. current)
+local result = {}
+for i = 1, #ARGV do
+    if meta and meta.ready then
+        result[i] = contains(base .. ':' .. current, meta, ARGV[i]) and 1 or 0
+    else
+        result[i] = 1
+    end
+end
+return result
+"""
+
+# KEYS[1] = base key; ARGV[1] = generation that finished loading. Promotes it
+# to current and drops the previous generation.
+BLOOM_PROMOTE_SCRIPT = """
+local base = KEYS[1]
+local gen = ARGV[1]
+redis.call('HSET', base .. ':' .. gen .. ':meta', 'ready', 1)
+local previous = redis.call('GET', base .. ':current')
+redis.call('SET', base .. ':current', gen)
+redis.call('DEL', base .. ':building')
+if previous and previous ~= gen then
+    local prefix = base .. ':' .. previous
+    local layers = tonumber(redis.call('HGET', prefix .. ':meta', 'layers') or 0)
+    for i = 0, layers - 1 do
+        redis.call('UNLINK', prefix .. ':layer:' .. i)
+    end
+    redis.call('DEL', prefix .. ':meta', prefix .. ':counts')
+end
+return 1
+"""
+
+
+def layer_parameters(capacity: int, error_rate: float, growth: float, tightening: float, layer: int) -> Tuple[int, int, int]:
+    """(capacity, bits, hashes) of a layer, mirroring layer_params in the Lua helpers"""
+    layer_capacity = math.floor(capacity * growth ** layer)
+    layer_error = error_rate * tightening ** layer
+    bits = math.ceil(-layer_capacity * math.log(layer_error) / (math.log(2) ** 2))
+    hashes = max(1, math.ceil(bits / layer_capacity * math.log(2)))
+    return layer_capacity, bits, hashes
+
+
+def estimate_false_positive_rate(bits: int, hashes: int, count: int) -> float:
+    """Expected false-positive rate of one layer holding count items"""
+    if count <= 0:
+        return 0.0
+    return (1 - math.exp(-hashes * count / bits)) ** hashes
+
+
+class ArtistBloomFilter:
+    """Scalable Bloom filter of all artist IDs in the database"""
+
+    def __init__(self, redis_url: str):
+        config = get_bloom_config()
+        self.redis: Optional[Redis] = None
+        self.redis_url = redis_url
+        self.key = config["key"]
+        self.capacity = config["initial_capacity"]
+        self.error_rate = config["error_rate"]
+        self.growth = config["growth"]
+        self.tightening = config["tightening"]
+        self.rebuild_chunk_size = config["rebuild_chunk_size"]
+
+    async def init(self):
+        """Initialize Redis connection and register the filter scripts"""
+        if not self.redis:
+            self.redis = Redis.from_url(self.redis_url, decode_responses=True)
+            self._add_script = self.redis.register_script(BLOOM_ADD_SCRIPT)
+            self._contains_script = self.redis.register_script(BLOOM_CONTAINS_SCRIPT)
+            self._promote_script = self.redis.register_script(BLOOM_PROMOTE_SCRIPT)
+
+    async def close(self):
+        """Close Redis connection safely"""
+        if self.redis:
+            try:
+                await self.redis.close()
+            except Exception as e:
+                logger.error(f"Error closing bloom filter connection: {str(e)}")
+            finally:
+                self.redis = None
+
+    def _config_args(self) -> List:
+        return [self.capacity, self.error_rate, self.growth, self.tightening]
+
+    async def contains_many(self, artist_ids: List[str]) -> List[bool]:
+        """
+        Check IDs against the filter. False means definitely not in the database,
+        True means possibly present. On any Redis error every ID counts as possible.
+        """
+        if not artist_ids:
+            return []
+        if not self.redis:
+            await self.init()
+
+        try:
+            flags = await self._contains_script(keys=[self.key], args=artist_ids)
+            return [bool(flag) for flag in flags]
+        except Exception as e:
+            logger.error(f"Error checking bloom filter: {str(e)}")
+            return [True] * len(artist_ids)
+
+    async def add_many(self, artist_ids: List[str], generation: str = ""):
+        """Add IDs to the current filter (and to a rebuild in progress)"""
+        if not artist_ids:
+            return
+        if not self.redis:
+            await self.init()
+
+        try:
+            await self._add_script(keys=[self.key], args=self._config_args() + [generation] + list(artist_ids))
+        except Exception as e:
+            logger.error(f"Error adding to bloom filter: {str(e)}")
+
+    async def rebuild(self, session: AsyncSession) -> Dict:
+        """
+        Rebuild the filter from the artists table with a streaming bulk load.
+        Inserts made while loading go to both generations, so none are lost at the swap.
+        """
+        if not self.redis:
+            await self.init()
+
+        generation = str(int(time.time()))
+        await self.redis.set(f"{self.key}:building", generation)
+        started = time.monotonic()
+        loaded = 0
+
+        try:
+            result = await session.stream(
+                select(Artist.id).execution_options(yield_per=self.rebuild_chunk_size)
+            )
+            async for partition in result.partitions(self.rebuild_chunk_size):
+                await self.add_many([row[0] for row in partition], generation=generation)
+                loaded += len(partition)
+        except Exception:
+            await self.redis.delete(f"{self.key}:building")
+            raise
+
+        await self._promote_script(keys=[self.key], args=[generation])
+        elapsed = time.monotonic() - started
+        logger.info(f"Rebuilt artist bloom filter with {loaded} IDs in {elapsed:.1f}s")
+        return {"loaded": loaded, "seconds": elapsed, **(await self.stats())}
+
+    async def stats(self) -> Dict:
+        """Layer sizes, fill, memory and estimated false-positive rate of the current filter"""
+        if not self.redis:
+            await self.init()
+
+        current = await self.redis.get(f"{self.key}:current")
+        if not current:
+            return {"ready": False, "layers": [], "items": 0, "memory_bytes": 0,
+                    "estimated_false_positive_rate": None, "target_error_rate": self.error_rate}
+
+        prefix = f"{self.key}:{current}"
+        meta = await self.redis.hgetall(f"{prefix}:meta")
+        counts = await self.redis.hgetall(f"{prefix}:counts")
+        layer_count = int(meta.get("layers", 0))
+
+        async with self.redis.pipeline() as pipe:
+            for layer in range(layer_count):
+                await pipe.strlen(f"{prefix}:layer:{layer}")
+            sizes = await pipe.execute()
+
+        layers = []
+        not_false_positive = 1.0
+        for layer in range(layer_count):
+            capacity, bits, hashes = layer_parameters(
+                int(meta["capacity"]), float(meta["error_rate"]),
+                float(meta["growth"]), float(meta["tightening"]), layer
+            )
+            count = int(counts.get(str(layer), 0))
+            false_positive_rate = estimate_false_positive_rate(bits, hashes, count)
+            not_false_positive *= 1 - false_positive_rate
+            layers.append({
+                "capacity": capacity,
+                "items": count,
+                "bits": bits,
+                "hashes": hashes,
+                "memory_bytes": sizes[layer],
+                "estimated_false_positive_rate": false_positive_rate,
+            })
+
+        return {
+            "ready": meta.get("ready") == "1",
+            "generation": current,
+            "layers": layers,
+            "items": sum(layer["items"] for layer in layers),
+            "memory_bytes": sum(layer["memory_bytes"] for layer in layers),
+            "estimated_false_positive_rate": 1 - not_false_positive,
+            "target_error_rate": self.error_rate,
+        }
+
+
+_bloom: Optional[ArtistBloomFilter] = None
+
+
+def get_artist_bloom(redis_url: str) -> Optional[ArtistBloomFilter]:
+    """Process-wide filter, or None when disabled in config"""
+    global _bloom
+    if not get_bloom_config()["enabled"]:
+        return None
+    if _bloom is None or _bloom.redis_url != redis_url:
+        _bloom = ArtistBloomFilter(redis_url)
+    return _bloom
@@ -0,0 +1,217 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import any_, bindparam, func, select, tuple_
+from sqlalchemy.dialects import postgresql
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+import logging
+from models.database import Artist, Genre
+from services.artist_ids import is_valid_artist_id
+from config.storage import get_storage_config
+
+logger = logging.getLogger(__name__)
+
+# Sort keys for keyset pagination, each backed by a (column, id) index
+SORT_COLUMNS = {
+    "created_at": Artist.created_at,
+    "popularity": Artist.popularity,
+}
+
+COMPACT_FIELDS = ["id", "name", "popularity"]
+
+# IDs per = ANY(...) query in batch lookups
+LOOKUP_CHUNK_SIZE = 5000
+
+# Trigram matching needs at least a couple of characters to be selective
+MIN_NAME_QUERY_LENGTH = 2
+
+
+def encode_cursor(sort: str, sort_value: Any, artist_id: str) -> str:
+    """Opaque URL-safe cursor holding the sort key of the last row on a page"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort, sort_value, artist_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """(sort value, artist id) from a cursor; ValueError if it is malformed or for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, sort_value, artist_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was issued for sort={cursor_sort}, not sort={sort}")
+    if get_storage_config()["artist_id_storage"] == "uuid" and not is_valid_artist_id(artist_id):
+        raise ValueError("Invalid cursor")
+    if sort == "created_at":
+        sort_value = datetime.fromisoformat(sort_value)
+    return sort_value, artist_id
+
+
+class CatalogService:
+    """Read access to the collected artist catalogue"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def build_artists_query(
+        self,
+        sort: str = "created_at",
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        genre_id: Optional[int] = None,
+        min_popularity: Optional[int] = None,
+        max_popularity: Optional[int] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100
+    ):
+        """
+        Keyset page query: rows after the cursor's (sort value, id) in index order.
+        No OFFSET, so every page is one index range scan however deep it is.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        sort_column = SORT_COLUMNS[sort]
+
+        stmt = select(
+            Artist.id, Artist.name, Artist.genres, Artist.popularity, Artist.created_at
+        ).where(sort_column.isnot(None))
+
+        if cursor:
+            sort_value, artist_id = decode_cursor(cursor, sort)
+            key = tuple_(sort_column, Artist.id)
+            stmt = stmt.where(key < (sort_value, artist_id) if descending else key > (sort_value, artist_id))
+        if genre_id is not None:
+            stmt = stmt.where(Artist.genre_ids.contains([genre_id]))
+        if min_popularity is not None:
+            stmt = stmt.where(Artist.popularity >= min_popularity)
+        if max_popularity is not None:
+            stmt = stmt.where(Artist.popularity <= max_popularity)
+        if since is not None:
+            stmt = stmt.where(Artist.created_at >= since)
+
+        if descending:
+            stmt = stmt.order_by(sort_column.desc(), Artist.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column, Artist.id)
+        # One extra row tells us whether there is a next page
+        return stmt.limit(limit + 1)
+
+    def build_name_search_query(self, query: str, limit: int = 50, offset: int = 0):
+        """
+        Nearest names by trigram distance. `%` filters on the similarity threshold
+        and `<->` orders by distance; the GiST trigram index serves both, so only
+        the closest matches are ever read.
+        """
+        distance = Artist.name.op("<->")(query)
+        return (
+            select(
+                Artist.id, Artist.name, Artist.genres, Artist.popularity,
+                func.similarity(Artist.name, query).label("similarity")
+            )
+            .where(Artist.name.op("%")(query))
+            .order_by(distance, Artist.popularity.desc().nulls_last())
+            .limit(limit)
+            .offset(offset)
+        )
+
+    async def search_by_name(self, query: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Artists whose names are most similar to the query, best match first"""
+        query = query.strip()
+        if len(query) < MIN_NAME_QUERY_LENGTH:
+            raise ValueError(f"Search query must be at least {MIN_NAME_QUERY_LENGTH} characters")
+
+        result = await self.session.execute(self.build_name_search_query(query, limit, offset))
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "genres": row.genres or [],
+                # Rows written without a popularity would fail the /search response model
+                "popularity": row.popularity or 0,
+                "similarity": row.similarity,
+            } for row in result
+        ]
+
+    def build_lookup_query(self, artist_ids: List[str]):
+        """One query per chunk: the IDs travel as a single array parameter"""
+        ids = bindparam("ids", value=artist_ids, type_=postgresql.ARRAY(Artist.__table__.c.id.type))
+        return select(
+            Artist.id, Artist.name, Artist.genres, Artist.popularity, Artist.created_at
+        ).where(Artist.id == any_(ids))
+
+    async def get_artists_by_ids(self, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Artists by ID for the IDs that exist"""
+        artists = {}
+        for start in range(0, len(artist_ids), LOOKUP_CHUNK_SIZE):
+            result = await self.session.execute(
+                self.build_lookup_query(artist_ids[start:start + LOOKUP_CHUNK_SIZE])
+            )
+            for row in result:
+                artists[row.id] = {
+                    "id": row.id,
+                    "name": row.name,
+                    "genres": row.genres,
+                    "popularity": row.popularity,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+        return artists
+
+    async def get_genre_id(self, name: str) -> Optional[int]:
+        result = await self.session.execute(select(Genre.id).where(Genre.name == name))
+        return result.scalar_one_or_none()
+
+    async def list_artists(
+        self,
+        sort: str = "created_at",
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        genre: Optional[str] = None,
+        min_popularity: Optional[int] = None,
+        max_popularity: Optional[int] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100,
+        compact: bool = False
+    ) -> Dict:
+        """One page of artists plus the cursor for the next page (None on the last page)"""
+        genre_id = None
+        if genre is not None:
+            genre_id = await self.get_genre_id(genre)
+            if genre_id is None:
+                return self._page([], None, compact)
+
+        stmt = self.build_artists_query(
+            sort, descending, cursor, genre_id, min_popularity, max_popularity, since, limit
+        )
+        rows = (await self.session.execute(stmt)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, getattr(last, sort), last.id)
+        return self._page(rows, next_cursor, compact)
+
+    def _page(self, rows: List, next_cursor: Optional[str], compact: bool) -> Dict:
+        if compact:
+            # Positional rows without repeated keys for bulk consumers
+            return {
+                "fields": COMPACT_FIELDS,
+                "rows": [[getattr(row, field) for field in COMPACT_FIELDS] for row in rows],
+                "next_cursor": next_cursor,
+            }
+        return {
+            "artists": [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "genres": row.genres,
+                    "popularity": row.popularity,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                } for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
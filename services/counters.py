@@ -0,0 +1,65 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import Dict
+from datetime import datetime, timezone
+import logging
+from models.database import Artist, SearchProgress
+from services.redis import RedisService
+
+logger = logging.getLogger(__name__)
+
+COUNTER_TOTAL_ARTISTS = "total_artists"
+COUNTER_TOTAL_SEARCHES = "total_searches"
+COUNTER_EARLIEST_SEARCH = "earliest_search_time"
+# Set by every reconciliation. Increments can create the total fields before the
+# first one runs, so only this marker says the counters hold real totals
+COUNTER_RECONCILED_AT = "reconciled_at"
+
+
+async def count_totals(session: AsyncSession) -> Dict:
+    """Exact totals from Postgres - full scans, only for reconciliation"""
+    total_artists = (await session.execute(select(func.count()).select_from(Artist))).scalar()
+    total_searches = (await session.execute(select(func.count()).select_from(SearchProgress))).scalar()
+    earliest_search = (await session.execute(select(func.min(SearchProgress.created_at)))).scalar()
+    return {
+        COUNTER_TOTAL_ARTISTS: total_artists,
+        COUNTER_TOTAL_SEARCHES: total_searches,
+        COUNTER_EARLIEST_SEARCH: earliest_search.isoformat() if earliest_search else None,
+    }
+
+
+async def reconcile_counters(session: AsyncSession, redis_service: RedisService) -> Dict:
+    """
+    Reset the Redis counters to the exact totals. Writes that land between the
+    count and the reset can shift a counter by one in-flight batch until the
+    next run.
+    """
+    previous = await redis_service.get_counters()
+    totals = await count_totals(session)
+    await redis_service.set_counters({
+        **totals, COUNTER_RECONCILED_AT: datetime.now(timezone.utc).isoformat()
+    })
+
+    drift = {
+        name: totals[name] - int(previous.get(name, 0))
+        for name in (COUNTER_TOTAL_ARTISTS, COUNTER_TOTAL_SEARCHES)
+    }
+    logger.info(f"Reconciled status counters {totals} (drift {drift})")
+    return {**totals, "drift": drift}
+
+
+async def get_status_counters(session: AsyncSession, redis_service: RedisService) -> Dict:
+    """
+    Totals for /status from Redis; seeds them from Postgres until the first
+    reconciliation. The seed overwrites increments made before it, whose rows
+    the Postgres count already includes.
+    """
+    counters = await redis_service.get_counters()
+    if COUNTER_RECONCILED_AT not in counters:
+        counters = await reconcile_counters(session, redis_service)
+
+    return {
+        COUNTER_TOTAL_ARTISTS: int(counters.get(COUNTER_TOTAL_ARTISTS) or 0),
+        COUNTER_TOTAL_SEARCHES: int(counters.get(COUNTER_TOTAL_SEARCHES) or 0),
+        COUNTER_EARLIEST_SEARCH: counters.get(COUNTER_EARLIEST_SEARCH),
+    }
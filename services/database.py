@@ -1,16 +1,62 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Boolean, column, func, literal_column, select, text
 from sqlalchemy.dialects.postgresql import insert
-from typing import List, Set
+from typing import Dict, List, Optional, Set
+from datetime import datetime, timezone
+import hashlib
+import json
 from models.database import Artist
 from models.spotify import SpotifyArtist
+from services.bloom import ArtistBloomFilter
+from services.genres import GenreService
+from config.storage import get_storage_config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Staging table for bulk artist merges. Session-local and emptied on commit, so
+# concurrent workers never see each other's rows.
+ARTIST_STAGING_TABLE = "artists_staging"
+ARTIST_STAGING_COLUMNS = ["id", "name", "genres", "genre_ids", "popularity", "content_hash", "created_at"]
+
+# Columns a refresh may rewrite; anything else (created_at) is kept from first sight
+ARTIST_REFRESH_COLUMNS = ["name", "genres", "genre_ids", "popularity", "content_hash"]
+
+
+def artist_content_hash(artist: SpotifyArtist) -> str:
+    """Stable hash of the fields a refresh compares (genre order is not significant)"""
+    content = json.dumps([artist.name, sorted(artist.genres or []), artist.popularity])
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
 class DatabaseService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, bloom: Optional[ArtistBloomFilter] = None):
         self.session = session
+        # Optional Bloom filter of known IDs: definitely-new IDs skip the existence query
+        self.bloom = bloom
+        self.genres = GenreService(session)
+        self.upsert_mode = get_storage_config()["artist_upsert_mode"]
+        # Outcome of the last write: inserted, changed and unchanged row counts
+        self.last_write_stats: Dict[str, int] = {"inserted": 0, "changed": 0, "unchanged": 0}
+
+    def _record_write_stats(self, total: int, inserted: int, changed: int = 0) -> Dict[str, int]:
+        self.last_write_stats = {
+            "inserted": inserted,
+            "changed": changed,
+            "unchanged": total - inserted - changed,
+        }
+        return self.last_write_stats
+
+    async def _map_genres(self, artists: List[SpotifyArtist]) -> Optional[Dict[str, List[int]]]:
+        """Genre IDs per artist ID, or None where the genre dictionary isn't available (non-Postgres)"""
+        connection = await self.session.connection()
+        if connection.dialect.name != "postgresql":
+            return None
+
+        mapping = await self.genres.get_genre_ids(
+            {genre for artist in artists for genre in artist.genres or []}
+        )
+        return {artist.id: [mapping[genre] for genre in artist.genres or []] for artist in artists}
 
     async def upsert_artists(self, artists: List[SpotifyArtist]) -> Set[str]:
         """
@@ -20,7 +66,13 @@ class DatabaseService:
         if not artists:
             return set()
 
+        connection = await self.session.connection()
+        if self.upsert_mode == "refresh" and connection.dialect.name == "postgresql":
+            return await self._refresh_artists(artists)
+
         try:
+            genre_ids = await self._map_genres(artists)
+
             # First, check which artists already exist
             artist_ids = [artist.id for artist in artists]
             existing_ids = await self._get_existing_artist_ids(artist_ids)
@@ -36,14 +88,22 @@ class DatabaseService:
                 }
                 for artist in artists
             ]
+            if genre_ids is not None:
+                for value in values:
+                    value["genre_ids"] = genre_ids[value["id"]]
 
             # Construct upsert statement
             stmt = insert(Artist).values(values)
             stmt = stmt.on_conflict_do_nothing()
 
             await self.session.execute(stmt)
+            if genre_ids is not None:
+                await self.genres.increment_counts(genre_ids[artist_id] for artist_id in new_ids)
             await self.session.commit()
+            self._record_write_stats(len(set(artist_ids)), len(new_ids))
             logger.info(f"Successfully upserted {len(artists)} artists ({len(new_ids)} new)")
+            if self.bloom:
+                await self.bloom.add_many(list(new_ids))
 
             return new_ids
 
@@ -52,12 +112,167 @@ class DatabaseService:
             await self.session.rollback()
             raise
 
+    def _refresh_statement(self, artists: List[SpotifyArtist], genre_ids: Dict[str, List[int]]):
+        """
+        INSERT ... ON CONFLICT DO UPDATE that only rewrites rows whose content hash
+        differs. Rows filtered out by the WHERE clause are not rewritten at all, so
+        re-encountering unchanged artists leaves no dead tuples behind.
+        RETURNING gives one row per inserted or changed artist; xmax = 0 marks inserts.
+        """
+        stmt = insert(Artist).values([
+            {
+                "id": artist.id,
+                "name": artist.name,
+                "genres": artist.genres,
+                "genre_ids": genre_ids[artist.id],
+                "popularity": artist.popularity,
+                "content_hash": artist_content_hash(artist),
+            }
+            for artist in artists
+        ])
+        update_values = {name: stmt.excluded[name] for name in ARTIST_REFRESH_COLUMNS}
+        update_values["updated_at"] = func.now()
+        return stmt.on_conflict_do_update(
+            index_elements=[Artist.id],
+            set_=update_values,
+            where=Artist.content_hash.is_distinct_from(stmt.excluded.content_hash)
+        ).returning(Artist.id, literal_column("xmax = 0", Boolean).label("inserted"))
+
+    async def _refresh_artists(self, artists: List[SpotifyArtist]) -> Set[str]:
+        """Refresh-mode upsert; returns the NEW artist IDs like upsert_artists"""
+        # ON CONFLICT DO UPDATE may not touch the same row twice in one statement
+        unique_artists = list({artist.id: artist for artist in artists}.values())
+
+        try:
+            genre_ids = await self._map_genres(unique_artists)
+            result = await self.session.execute(self._refresh_statement(unique_artists, genre_ids))
+            rows = result.all()
+            new_ids = {row.id for row in rows if row.inserted}
+            await self.genres.increment_counts(genre_ids[artist_id] for artist_id in new_ids)
+            await self.session.commit()
+            stats = self._record_write_stats(len(unique_artists), len(new_ids), len(rows) - len(new_ids))
+            logger.info(
+                f"Refreshed {len(unique_artists)} artists: {stats['inserted']} new, "
+                f"{stats['changed']} changed, {stats['unchanged']} unchanged"
+            )
+            if self.bloom:
+                await self.bloom.add_many(list(new_ids))
+
+            return new_ids
+
+        except Exception as e:
+            logger.error(f"Failed to refresh artists: {str(e)}")
+            await self.session.rollback()
+            raise
+
+    async def bulk_insert_artists(self, artists: List[SpotifyArtist]) -> Set[str]:
+        """
+        Insert a large batch of artists in one transaction and return the NEW IDs.
+        On Postgres the rows are COPYed into a temp staging table and merged with a
+        single INSERT ... SELECT ... RETURNING, which reports the new IDs itself.
+        With a Bloom filter in insert mode, known artists are filtered out before staging.
+        In refresh mode the merge also updates known artists whose content changed.
+        """
+        if not artists:
+            return set()
+
+        # Last occurrence wins when the same artist shows up on several pages
+        unique_artists = list({artist.id: artist for artist in artists}.values())
+        total = len(unique_artists)
+
+        connection = await self.session.connection()
+        if connection.dialect.name != "postgresql":
+            return await self.upsert_artists(unique_artists)
+
+        try:
+            if self.bloom and self.upsert_mode != "refresh":
+                # Known artists are never rewritten in insert mode, so only stage the
+                # ones that may be new. The filter clears definitely-new IDs without a
+                # lookup; the merge keeps ON CONFLICT, so an ID missing from the filter
+                # costs one staged row, never a wrong result.
+                existing_ids = await self._get_existing_artist_ids([artist.id for artist in unique_artists])
+                unique_artists = [artist for artist in unique_artists if artist.id not in existing_ids]
+                if not unique_artists:
+                    await self.session.commit()
+                    self._record_write_stats(total, 0)
+                    return set()
+
+            genre_ids = await self._map_genres(unique_artists)
+            # Mapping may have committed new genres, so take the connection of the current transaction
+            connection = await self.session.connection()
+            now = datetime.now(timezone.utc)
+            # Executing through the session first opens the transaction the COPY joins
+            await self.session.execute(text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {ARTIST_STAGING_TABLE} "
+                f"(LIKE artists INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            ))
+            # COPY bypasses SQLAlchemy type processing, so convert IDs to their stored form
+            id_type = Artist.__table__.c.id.type
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                ARTIST_STAGING_TABLE,
+                records=[
+                    (id_type.storage_value(artist.id, connection.dialect), artist.name,
+                     artist.genres, genre_ids[artist.id], artist.popularity,
+                     artist_content_hash(artist), now)
+                    for artist in unique_artists
+                ],
+                columns=ARTIST_STAGING_COLUMNS
+            )
+
+            columns = ", ".join(ARTIST_STAGING_COLUMNS)
+            if self.upsert_mode == "refresh":
+                updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in ARTIST_REFRESH_COLUMNS)
+                conflict = (
+                    f"DO UPDATE SET {updates}, updated_at = now() "
+                    f"WHERE artists.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+                )
+            else:
+                conflict = "DO NOTHING"
+            result = await self.session.execute(text(
+                f"INSERT INTO artists ({columns}) "
+                f"SELECT {columns} FROM {ARTIST_STAGING_TABLE} "
+                f"ON CONFLICT (id) {conflict} RETURNING id, (xmax = 0) AS inserted"
+            ).columns(Artist.__table__.c.id, column("inserted", Boolean)))
+            rows = result.all()
+            new_ids = {row.id for row in rows if row.inserted}
+            await self.genres.increment_counts(genre_ids[artist_id] for artist_id in new_ids)
+            await self.session.commit()
+            stats = self._record_write_stats(total, len(new_ids), len(rows) - len(new_ids))
+            logger.info(
+                f"Bulk merged {total} artists: {stats['inserted']} new, "
+                f"{stats['changed']} changed, {stats['unchanged']} unchanged"
+            )
+            if self.bloom:
+                await self.bloom.add_many(list(new_ids))
+
+            return new_ids
+
+        except Exception as e:
+            logger.error(f"Failed to bulk insert artists: {str(e)}")
+            await self.session.rollback()
+            raise
+
+    async def _possibly_existing_ids(self, artist_ids: List[str]) -> List[str]:
+        """IDs the Bloom filter can't rule out - only these need a database lookup"""
+        if not self.bloom:
+            return artist_ids
+
+        flags = await self.bloom.contains_many(artist_ids)
+        candidates = [artist_id for artist_id, maybe in zip(artist_ids, flags) if maybe]
+        logger.debug(f"Bloom filter skipped {len(artist_ids) - len(candidates)} of {len(artist_ids)} existence checks")
+        return candidates
+
     async def _get_existing_artist_ids(self, artist_ids: List[str]) -> Set[str]:
         """Get set of artist IDs that already exist in the database"""
         if not artist_ids:
             return set()
 
-        stmt = select(Artist.id).where(Artist.id.in_(artist_ids))
+        candidates = await self._possibly_existing_ids(artist_ids)
+        if not candidates:
+            return set()
+
+        stmt = select(Artist.id).where(Artist.id.in_(candidates))
         result = await self.session.execute(stmt)
         return {row[0] for row in result}
     
@@ -69,10 +284,7 @@ class DatabaseService:
             return set()
             
         # Query existing artists
-        stmt = select(Artist.id).where(Artist.id.in_(artist_ids))
-        result = await self.session.execute(stmt)
-        existing_ids = {row[0] for row in result}
+        existing_ids = await self._get_existing_artist_ids(artist_ids)
         
         # Return ids that don't exist
         return set(artist_ids) - existing_ids
-    
\ No newline at end of file
@@ -0,0 +1,104 @@
+from typing import Callable, List, Optional
+import math
+import logging
+from services.redis import RedisService
+from services.search_generator import SearchStringGenerator
+from config.dispatcher import get_dispatcher_config
+from config.archive import get_archive_config
+
+logger = logging.getLogger(__name__)
+
+
+class SearchDispatcher:
+    """
+    Admits searches based on the rate limit budget instead of a fixed worker count.
+
+    Every page costs one rate-limited request followed by some processing time
+    (HTTP call, upsert, buffering). To keep the limiter busy without a pile of
+    workers sleeping on it we need roughly rate * latency searches between
+    requests, plus a small queue of searches already waiting for the next slot.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        shard_filter: Optional[Callable[[str], bool]] = None
+    ):
+        self.redis_service = redis_service
+        self.shard_filter = shard_filter
+        config = get_dispatcher_config()
+        self.max_in_flight = min(config["max_in_flight"], redis_service.max_workers)
+        self.min_in_flight = config["min_in_flight"]
+        self.queue_headroom = config["queue_headroom"]
+        # Replayed searches never touch the limiter, so run as wide as allowed
+        self.replay = get_archive_config()["mode"] == "replay"
+
+    def target_in_flight(self, page_latency: float) -> int:
+        """Number of searches that keeps the limiter saturated at the given page latency"""
+        if self.replay:
+            return self.max_in_flight
+        requests_per_second = self.redis_service.rate_limit_max / self.redis_service.rate_limit_window
+        target = math.ceil(requests_per_second * page_latency) + self.queue_headroom
+        return max(self.min_in_flight, min(target, self.max_in_flight))
+
+    def compute_admission(self, active_count: int, queue_length: int, page_latency: float) -> int:
+        """How many new searches to start given the current active count and limiter queue"""
+        if queue_length > self.queue_headroom:
+            # Enough requests already sleeping on the limiter, more would only add to the pile
+            return 0
+        return max(0, self.target_in_flight(page_latency) - active_count)
+
+    async def get_budget(self) -> dict:
+        """Collect the dispatcher signals and the resulting admission decision"""
+        active_count = await self.redis_service.get_active_search_count()
+        queue_length = await self.redis_service.get_limiter_queue_length()
+        page_latency = await self.redis_service.get_page_latency()
+        return {
+            "active_searches": active_count,
+            "limiter_queue_length": queue_length,
+            "page_latency": page_latency,
+            "target_in_flight": self.target_in_flight(page_latency),
+            "admit": self.compute_admission(active_count, queue_length, page_latency),
+        }
+
+    async def dispatch(self, spawn: Callable[[str], None], refresh_frontier: bool = False) -> List[str]:
+        """
+        Admit as many searches as the budget allows, calling spawn for each one.
+        Called whenever a slot may have freed up (search finished, page fetched
+        without waiting) and periodically as a safety net. Only the periodic sweep
+        passes refresh_frontier, which recounts the frontier even with no free slot;
+        in between, completed searches decrement it.
+        """
+        budget = await self.get_budget()
+        admit = budget["admit"]
+
+        logger.info(
+            f"Dispatcher: {budget['active_searches']} active, "
+            f"{budget['limiter_queue_length']} waiting on limiter, "
+            f"page latency {budget['page_latency']:.2f}s, "
+            f"target {budget['target_in_flight']}, admitting {admit}"
+        )
+
+        if admit <= 0 and not refresh_frontier:
+            # Saturated hot path: no search_progress read
+            return []
+
+        generator = SearchStringGenerator()
+        await generator.initialize()
+
+        if admit <= 0:
+            await self.redis_service.set_frontier_size(await generator.count_frontier(self.shard_filter))
+            return []
+
+        candidates = await generator.generate_batch(size=admit, shard_filter=self.shard_filter)
+        await self.redis_service.set_frontier_size(generator.last_frontier_size)
+
+        admitted = []
+        for search_str in candidates:
+            if len(admitted) >= admit:
+                break
+            if await self.redis_service.add_active_search(search_str, limit=budget["target_in_flight"]):
+                spawn(search_str)
+                admitted.append(search_str)
+
+        return admitted
@@ -0,0 +1,117 @@
+from typing import AsyncIterator, Optional, Set
+import asyncio
+import time
+import logging
+from redis.asyncio import Redis
+from services.redis import EVENTS_CHANNEL
+from services.status import StatusSnapshotter
+from config.status import get_status_config
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroadcaster:
+    """
+    One subscription to the crawler events channel per API process, fanned out
+    to a bounded queue per connected dashboard. A viewer that falls too far
+    behind is cut off rather than buffered without limit.
+    """
+
+    def __init__(self, redis_url: str, queue_size: Optional[int] = None):
+        self.redis_url = redis_url
+        self.queue_size = queue_size or get_status_config()["events_queue_size"]
+        self._queues: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    def publish_local(self, data: str):
+        """Hand one event to every subscriber; None tells a lagging subscriber to disconnect"""
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning("Dropping a dashboard event stream that fell behind")
+                self._queues.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _listen(self):
+        while True:
+            redis = Redis.from_url(self.redis_url, decode_responses=True)
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.publish_local(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading crawler events: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await redis.close()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def event_stream(
+    broadcaster: EventBroadcaster,
+    snapshotter: StatusSnapshotter,
+    is_disconnected=None
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for one viewer: a full `snapshot` event first (and again
+    every resync interval), then each crawler event as a default `message`.
+    """
+    config = get_status_config()
+    queue = broadcaster.subscribe()
+    try:
+        last_snapshot = 0.0
+        while True:
+            if is_disconnected and await is_disconnected():
+                break
+            if time.monotonic() - last_snapshot >= config["events_resync_interval"]:
+                snapshot = await snapshotter.current()
+                yield f"event: snapshot\ndata: {snapshot.body.decode('utf-8')}\n\n"
+                last_snapshot = time.monotonic()
+
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=config["events_keepalive"])
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if data is None:
+                break
+            yield f"data: {data}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+_broadcaster: Optional[EventBroadcaster] = None
+
+
+def get_event_broadcaster(redis_url: str) -> EventBroadcaster:
+    """Process-wide broadcaster shared by every /events connection"""
+    global _broadcaster
+    if _broadcaster is None or _broadcaster.redis_url != redis_url:
+        _broadcaster = EventBroadcaster(redis_url)
+    return _broadcaster
@@ -0,0 +1,216 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import logging
+from database.database import AsyncSessionLocal
+from models.database import Artist
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '10000'))
+# Rows younger than this may still belong to open transactions, so an export
+# stops short of them and the next incremental run picks them up
+EXPORT_SAFETY_LAG = float(os.getenv('EXPORT_SAFETY_LAG', '60'))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = [Artist.id, Artist.name, Artist.genres, Artist.popularity, Artist.created_at]
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file for ParquetWriter that hands bytes back as row groups are written"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # ParquetWriter records absolute offsets in the footer, so count everything written
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class ArtistExporter:
+    """
+    Streams the artists table as NDJSON lines or Parquet row groups.
+
+    Rows are read through a server-side cursor in (created_at, id) order, one
+    chunk at a time, so memory stays flat however big the table is. Only rows
+    created after `since` and before the watermark are exported; pass the
+    watermark as `since` next time for an incremental export.
+    """
+
+    def __init__(
+        self,
+        format: str = "ndjson",
+        since: Optional[datetime] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        if format == "parquet" and pyarrow is None:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        self.format = format
+        self.media_type = EXPORT_FORMATS[format]
+        self.since = since
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+        self.watermark = datetime.now(timezone.utc) - timedelta(seconds=EXPORT_SAFETY_LAG)
+        self.rows = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "seconds": ((self.finished or time.monotonic()) - self.started) if self.started else 0.0,
+            "rows_per_second": self.rows_per_second,
+            "since": self.since.isoformat() if self.since else None,
+            "watermark": self.watermark.isoformat(),
+        }
+
+    def build_query(self):
+        stmt = select(*EXPORT_COLUMNS).where(Artist.created_at < self.watermark)
+        if self.since is not None:
+            stmt = stmt.where(Artist.created_at >= self.since)
+        return stmt.order_by(Artist.created_at, Artist.id).execution_options(yield_per=self.chunk_size)
+
+    async def _chunks(self) -> AsyncIterator[List]:
+        async with self.session_factory() as session:
+            result = await session.stream(self.build_query())
+            async for partition in result.partitions(self.chunk_size):
+                yield partition
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Encoded export, one chunk of rows per yielded block"""
+        self.started = time.monotonic()
+        encode = self._encode_parquet if self.format == "parquet" else self._encode_ndjson
+        try:
+            async for block in encode():
+                yield block
+        finally:
+            self.finished = time.monotonic()
+            logger.info(
+                f"Exported {self.rows} artists as {self.format} in {self.stats()['seconds']:.1f}s "
+                f"({self.rows_per_second:.0f} rows/s), watermark {self.watermark.isoformat()}"
+            )
+
+    async def _encode_ndjson(self) -> AsyncIterator[bytes]:
+        async for partition in self._chunks():
+            lines = [
+                json.dumps({
+                    "id": row.id,
+                    "name": row.name,
+                    "genres": row.genres,
+                    "popularity": row.popularity,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                })
+                for row in partition
+            ]
+            self._log_progress(len(partition))
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def _encode_parquet(self) -> AsyncIterator[bytes]:
+        schema = pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("genres", pyarrow.list_(pyarrow.string())),
+            ("popularity", pyarrow.int32()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+        ])
+        sink = _StreamSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            async for partition in self._chunks():
+                # One row group per chunk, flushed to the client as soon as it is written
+                writer.write_table(pyarrow.Table.from_pylist([row._asdict() for row in partition], schema=schema))
+                self._log_progress(len(partition))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def _log_progress(self, chunk_rows: int):
+        self.rows += chunk_rows
+        logger.debug(f"Export progress: {self.rows} rows ({self.rows_per_second:.0f} rows/s)")
+
+
+async def _run_export(args) -> Dict:
+    since = args.since
+    if since is None and args.watermark_file and os.path.exists(args.watermark_file):
+        with open(args.watermark_file, "r", encoding="utf-8") as watermark_file:
+            since = datetime.fromisoformat(watermark_file.read().strip())
+
+    exporter = ArtistExporter(format=args.format, since=since, chunk_size=args.chunk_size)
+    output = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async for block in exporter.stream():
+            output.write(block)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    if args.watermark_file:
+        with open(args.watermark_file, "w", encoding="utf-8") as watermark_file:
+            watermark_file.write(exporter.watermark.isoformat())
+    return exporter.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the artists table as NDJSON or Parquet")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="Only export artists created at or after this ISO timestamp")
+    parser.add_argument("--watermark-file", default=None,
+                        help="Read --since from this file and store the new watermark in it afterwards")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    stats = asyncio.run(_run_export(args))
+    print(
+        f"Exported {stats['rows']} artists in {stats['seconds']:.1f}s "
+        f"({stats['rows_per_second']:.0f} rows/s), next watermark {stats['watermark']}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
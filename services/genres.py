@@ -0,0 +1,114 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Iterable, List
+from collections import Counter
+import logging
+from models.database import Genre
+
+logger = logging.getLogger(__name__)
+
+# Genre IDs never change once assigned, so every process keeps the name -> ID
+# map it has seen. There are only a few thousand Spotify genres.
+_genre_id_cache: Dict[str, int] = {}
+
+BACKFILL_CHUNK_SIZE = 10000
+
+# Fill genre_ids for rows written before the genre dictionary existed
+BACKFILL_GENRE_NAMES_SQL = """
+INSERT INTO genres (name)
+SELECT DISTINCT unnest(genres) FROM artists WHERE genre_ids IS NULL
+ON CONFLICT (name) DO NOTHING
+"""
+
+BACKFILL_GENRE_IDS_SQL = """
+UPDATE artists SET genre_ids = COALESCE((
+    SELECT array_agg(genres_dict.id ORDER BY names.position)
+    FROM unnest(artists.genres) WITH ORDINALITY AS names(name, position)
+    JOIN genres AS genres_dict ON genres_dict.name = names.name
+), '{}')
+WHERE artists.id IN (
+    SELECT id FROM artists WHERE genre_ids IS NULL LIMIT :chunk_size
+)
+"""
+
+# Recount every genre from the GIN-indexed arrays and fix any drift
+RECONCILE_COUNTS_SQL = """
+WITH counts AS (
+    SELECT unnest(genre_ids) AS genre_id, count(*) AS artist_count
+    FROM artists GROUP BY 1
+)
+UPDATE genres SET artist_count = COALESCE(counts.artist_count, 0)
+FROM genres AS all_genres
+LEFT JOIN counts ON counts.genre_id = all_genres.id
+WHERE genres.id = all_genres.id
+  AND genres.artist_count IS DISTINCT FROM COALESCE(counts.artist_count, 0)
+"""
+
+
+class GenreService:
+    """Genre dictionary: maps genre names to integer IDs and maintains per-genre artist counts"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_genre_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Map genre names to IDs, creating missing genres. New genres are committed
+        straight away so cached IDs never point at a rolled back row.
+        """
+        names = set(names)
+        missing = names - _genre_id_cache.keys()
+        if missing:
+            # Sorted inserts keep concurrent workers from deadlocking on the unique index
+            await self.session.execute(
+                insert(Genre)
+                .values([{"name": name} for name in sorted(missing)])
+                .on_conflict_do_nothing(index_elements=[Genre.name])
+            )
+            result = await self.session.execute(
+                select(Genre.id, Genre.name).where(Genre.name.in_(missing))
+            )
+            await self.session.commit()
+            for genre_id, name in result:
+                _genre_id_cache[name] = genre_id
+            logger.debug(f"Mapped {len(missing)} new genre names")
+
+        return {name: _genre_id_cache[name] for name in names}
+
+    async def increment_counts(self, genre_id_lists: Iterable[List[int]]):
+        """Add newly inserted artists to their genres' counts (joins the caller's transaction)"""
+        counts = Counter(genre_id for genre_ids in genre_id_lists for genre_id in set(genre_ids))
+        if not counts:
+            return
+
+        stmt = (
+            update(Genre)
+            .where(Genre.id == bindparam("genre_id"))
+            .values(artist_count=Genre.artist_count + bindparam("delta"))
+        )
+        await self.session.execute(
+            stmt,
+            [{"genre_id": genre_id, "delta": delta} for genre_id, delta in sorted(counts.items())]
+        )
+
+    async def backfill(self, chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+        """Map genres of artists that have no genre_ids yet, one chunk per transaction"""
+        await self.session.execute(text(BACKFILL_GENRE_NAMES_SQL))
+        await self.session.commit()
+
+        total = 0
+        while True:
+            result = await self.session.execute(text(BACKFILL_GENRE_IDS_SQL), {"chunk_size": chunk_size})
+            await self.session.commit()
+            if result.rowcount <= 0:
+                break
+            total += result.rowcount
+            logger.info(f"Backfilled genre IDs for {total} artists")
+        return total
+
+    async def reconcile_counts(self) -> int:
+        """Recompute artist counts (covers refreshed genres and racing inserts), returns genres fixed"""
+        result = await self.session.execute(text(RECONCILE_COUNTS_SQL))
+        await self.session.commit()
+        return result.rowcount
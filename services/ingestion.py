@@ -0,0 +1,300 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import gzip
+import json
+import os
+import time
+import logging
+import httpx
+from services.outbox import IngestionOutbox, OutboxEntry, decode_artist_entry
+from services.metrics import INGESTION_POST_SECONDS, INGESTION_POST_FAILURES
+from services.redis import RedisService
+from services.tracing import start_trace, finish_trace, span
+from config.ingestion import get_ingestion_config, INGESTION_API_URL, MAX_ALBUMS
+
+logger = logging.getLogger(__name__)
+
+# Get the service bypass secret for API authentication
+SERVICE_BYPASS_SECRET = os.getenv('SERVICE_BYPASS_SECRET', '')
+
+# Base URL from INGESTION_API_URL, with the genres endpoint instead
+GENRES_API_URL = f"{INGESTION_API_URL.rsplit('/fetch/', 1)[0]}/db/insert/artist-genres"
+
+
+def decode_artist_entries(entries: List[OutboxEntry]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Artist IDs of a batch, and the genres of those that have any"""
+    artist_ids, genres_map = [], {}
+    for _, fields in entries:
+        artist_id, genres = decode_artist_entry(fields)
+        artist_ids.append(artist_id)
+        if genres:
+            genres_map[artist_id] = genres
+    return artist_ids, genres_map
+
+
+class IngestionClient:
+    """
+    Keep-alive connection pool for the ingestion and genres APIs. With INGESTION_GZIP
+    request bodies are gzip-compressed; if the API answers a compressed body with
+    415 or 400 but accepts the same batch uncompressed, compression is switched off.
+    """
+
+    # Statuses an API that cannot decode Content-Encoding: gzip answers with
+    GZIP_REJECTED_STATUSES = (400, 415)
+
+    def __init__(self, redis_service: Optional[RedisService] = None):
+        config = get_ingestion_config()
+        self.gzip = config["gzip"]
+        # Where sampled batch traces are stored; batches are not traced without it
+        self.redis_service = redis_service
+        self.client = httpx.AsyncClient(
+            timeout=config["timeout"],
+            limits=httpx.Limits(
+                max_connections=config["max_in_flight"],
+                max_keepalive_connections=config["max_in_flight"]
+            ),
+            headers={'X-Service-Secret': SERVICE_BYPASS_SECRET}
+        )
+
+    async def _post(self, api: str, url: str, payload) -> httpx.Response:
+        body = json.dumps(payload).encode("utf-8")
+        started = time.perf_counter()
+        try:
+            if self.gzip:
+                response = await self.client.post(url, content=gzip.compress(body, compresslevel=5), headers={
+                    'Content-Type': 'application/json', 'Content-Encoding': 'gzip'
+                })
+                if response.status_code not in self.GZIP_REJECTED_STATUSES:
+                    response.raise_for_status()
+                    return response
+                # The API may not decode gzip bodies; see whether it takes the same batch uncompressed
+                response = await self.client.post(url, content=body, headers={'Content-Type': 'application/json'})
+                response.raise_for_status()
+                logger.warning(f"{api} API rejected a gzip body but accepted it uncompressed, disabling INGESTION_GZIP")
+                self.gzip = False
+                return response
+            response = await self.client.post(url, content=body, headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+            return response
+        except Exception:
+            INGESTION_POST_FAILURES.labels(api=api).inc()
+            raise
+        finally:
+            INGESTION_POST_SECONDS.labels(api=api).observe(time.perf_counter() - started)
+
+    async def send_artists(self, artist_ids: List[str]) -> bool:
+        """Send a batch of artist IDs to the ingestion API"""
+        if not artist_ids:
+            return True
+
+        payload = {
+            "artist_ids": artist_ids,
+            "max_albums": MAX_ALBUMS,
+            "force": False,
+            "trigger_compaction": False
+        }
+        try:
+            await self._post("artists", INGESTION_API_URL, payload)
+            logger.info(f"Successfully sent batch of {len(artist_ids)} artists to ingestion API")
+            return True
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Ingestion API HTTP error: {e.response.status_code} - {e.response.text}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to send batch to ingestion API: {str(e)}")
+            return False
+
+    async def send_genres(self, genres_map: Dict[str, List[str]]) -> bool:
+        """Send a batch of artist genres to the genres API endpoint"""
+        if not genres_map:
+            return True
+
+        try:
+            response = await self._post("genres", GENRES_API_URL, genres_map)
+            result = response.json()
+            logger.info(f"Successfully sent genres for {result.get('count', len(genres_map))} artists to genres API")
+            return True
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Genres API HTTP error: {e.response.status_code} - {e.response.text}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to send genres to API: {str(e)}")
+            return False
+
+    async def send_entries(self, entries: List[OutboxEntry]) -> bool:
+        """Post a batch of outbox entries to both APIs at once; True only if both accepted it"""
+        artist_ids, genres_map = decode_artist_entries(entries)
+        trace = start_trace("ingestion_batch", entries=len(entries)) if self.redis_service else None
+        results = await asyncio.gather(self._traced("post_artists", self.send_artists(artist_ids)),
+                                       self._traced("post_genres", self.send_genres(genres_map)))
+        if trace:
+            trace.attributes["ok"] = all(results)
+            await finish_trace(trace, self.redis_service)
+        return all(results)
+
+    @staticmethod
+    async def _traced(name: str, post: Awaitable[bool]) -> bool:
+        with span(name):
+            return await post
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class AdaptiveBatchSize:
+    """
+    Additive-increase / multiplicative-decrease batch sizing. Batches grow while
+    the API answers within the target latency and shrink when it slows down or fails.
+    """
+
+    def __init__(self, minimum: int, maximum: int, initial: int, target_latency: float):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.size = max(minimum, min(initial, maximum))
+
+    def observe(self, latency: float, ok: bool) -> int:
+        if not ok:
+            self.size = max(self.minimum, self.size // 2)
+        elif latency > self.target_latency:
+            self.size = max(self.minimum, int(self.size * 0.75))
+        else:
+            self.size = min(self.maximum, self.size + self.minimum)
+        return self.size
+
+
+class OutboxFlusher:
+    """
+    Drains one outbox stream. A flusher first takes a slot of the shared
+    semaphore, which bounds posts in flight across all flushers, and only then
+    claims entries until a batch is full or the oldest claimed entry has waited
+    max_linger, and posts them in the background. Claimed entries therefore never
+    wait for a slot: each is held for at most max_linger plus the post timeout,
+    which the outbox claim timeout must exceed so the reclaim sweep does not take
+    over entries that are still being posted. Delivered entries are acknowledged
+    by the flusher's next claim, which can block for up to another max_linger
+    first, so the claim timeout covers that wait too.
+    """
+
+    # Slack on top of linger + post timeout for Redis round trips and scheduling
+    CLAIM_TIMEOUT_MARGIN = 10.0
+
+    def __init__(
+        self,
+        outbox: IngestionOutbox,
+        send: Callable[[List[OutboxEntry]], Awaitable[bool]],
+        semaphore: asyncio.Semaphore,
+        batch_size: Optional[AdaptiveBatchSize] = None
+    ):
+        config = get_ingestion_config()
+        self.outbox = outbox
+        self.send = send
+        self.semaphore = semaphore
+        self.batch_size = batch_size or AdaptiveBatchSize(
+            config["min_batch_size"], config["max_batch_size"],
+            config["initial_batch_size"], config["target_latency"]
+        )
+        self.max_linger = config["max_linger"]
+        self.timeout = config["timeout"]
+        self.reclaim_interval = config["reclaim_interval"]
+        self._in_flight: Set[asyncio.Task] = set()
+        # IDs of delivered entries, acknowledged by the next claim
+        self._acks: List[bytes] = []
+        self.sent = 0
+
+        max_hold_ms = (2 * self.max_linger + self.timeout + self.CLAIM_TIMEOUT_MARGIN) * 1000
+        if outbox.claim_timeout_ms <= max_hold_ms:
+            raise ValueError(
+                f"OUTBOX_CLAIM_TIMEOUT_MS ({outbox.claim_timeout_ms}) must exceed twice the max linger + post timeout "
+                f"+ {self.CLAIM_TIMEOUT_MARGIN:.0f}s ({max_hold_ms:.0f}ms), or entries being posted get re-claimed"
+            )
+
+    async def _deliver(self, entries: List[OutboxEntry]):
+        started = time.monotonic()
+        ok = False
+        try:
+            ok = await asyncio.wait_for(self.send(entries), self.timeout)
+            if ok:
+                self._acks.extend(entry_id for entry_id, _ in entries)
+                self.sent += len(entries)
+        except asyncio.TimeoutError:
+            logger.error(f"Delivering {len(entries)} entries from {self.outbox.stream} timed out after {self.timeout:.0f}s")
+        except Exception as e:
+            # Unacknowledged entries are picked up again by the reclaim sweep
+            logger.error(f"Error delivering {len(entries)} entries from {self.outbox.stream}: {str(e)}")
+        finally:
+            self.semaphore.release()
+            size = self.batch_size.observe(time.monotonic() - started, ok)
+            logger.debug(f"{self.outbox.stream}: batch size now {size}")
+
+    def _dispatch(self, entries: List[OutboxEntry]):
+        """Post a batch in the background on the slot the caller holds; _deliver releases it"""
+        task = asyncio.ensure_future(self._deliver(entries))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def run(self, stop: asyncio.Event):
+        pending: List[OutboxEntry] = []
+        oldest = 0.0
+        last_reclaim = 0.0
+        holding_slot = False
+
+        try:
+            while not stop.is_set():
+                try:
+                    if not holding_slot:
+                        # Waiting here is the backpressure: nothing is claimed while every slot is busy
+                        await self.semaphore.acquire()
+                        holding_slot = True
+
+                    now = time.monotonic()
+                    size = self.batch_size.size
+                    if now - last_reclaim >= self.reclaim_interval and len(pending) < size:
+                        last_reclaim = now
+                        reclaimed = await self.outbox.reclaim(size - len(pending))
+                        if reclaimed and not pending:
+                            oldest = now
+                        pending.extend(reclaimed)
+
+                    if len(pending) < size:
+                        linger_left = self.max_linger - (now - oldest) if pending else self.max_linger
+                        acks, self._acks = self._acks, []
+                        try:
+                            claimed = await self.outbox.claim(
+                                size - len(pending), block_ms=max(1, int(linger_left * 1000)), ack_ids=acks
+                            )
+                        except Exception:
+                            # Acknowledging twice is harmless, losing an ack means sending the entries again
+                            self._acks = acks + self._acks
+                            raise
+                        if claimed and not pending:
+                            oldest = time.monotonic()
+                        pending.extend(claimed)
+
+                    lingered = pending and time.monotonic() - oldest >= self.max_linger
+                    if len(pending) >= size or lingered:
+                        # Everything claimed goes out on the slot it was claimed under
+                        batch, pending = pending, []
+                        holding_slot = False
+                        self._dispatch(batch)
+                except Exception as e:
+                    logger.error(f"Error flushing {self.outbox.stream}: {str(e)}")
+                    await asyncio.sleep(1)
+
+            # Send what was claimed, then wait for posts in flight
+            if pending:
+                holding_slot = False
+                self._dispatch(pending)
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+            # No claim follows to carry the last acknowledgements
+            if self._acks:
+                acks, self._acks = self._acks, []
+                try:
+                    await self.outbox.ack(acks)
+                except Exception as e:
+                    # The reclaim sweep sends them again
+                    logger.error(f"Error acknowledging {len(acks)} entries on {self.outbox.stream}: {str(e)}")
+        finally:
+            if holding_slot:
+                self.semaphore.release()
@@ -0,0 +1,130 @@
+from typing import Dict, Tuple
+import functools
+import glob
+import os
+import time
+import logging
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, start_http_server
+)
+from prometheus_client import multiprocess
+from config.metrics import get_metrics_config
+
+logger = logging.getLogger(__name__)
+
+# In multiprocess mode every metric opens its file on creation, so the directory must exist first
+if get_metrics_config()["multiproc_dir"]:
+    os.makedirs(get_metrics_config()["multiproc_dir"], exist_ok=True)
+
+# Metric updates are an in-memory (or mmap, in multiprocess mode) add, so they
+# are safe on the request path. Rates such as pages or artists per second come
+# from rate() over the counters.
+
+SPOTIFY_REQUEST_SECONDS = Histogram(
+    "spotify_request_seconds", "Latency of Spotify API requests, excluding limiter wait",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+SPOTIFY_RATE_LIMITED = Counter("spotify_rate_limited_total", "Spotify responses with status 429")
+LIMITER_WAIT_SECONDS = Histogram(
+    "limiter_wait_seconds", "Time a request waited for a rate limit slot",
+    buckets=(0, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+PAGES_FETCHED = Counter("crawler_pages_total", "Search result pages fetched")
+ARTISTS_FOUND = Counter("crawler_artists_found_total", "Artists returned by search pages")
+ARTISTS_NEW = Counter("crawler_artists_new_total", "Artists that were new to the database")
+DB_UPSERT_SECONDS = Histogram(
+    "db_upsert_seconds", "Latency of one artist sink flush (bulk merge)",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+DB_UPSERT_ROWS = Counter("db_upsert_rows_total", "Artist rows written by outcome", ["outcome"])
+REDIS_OP_SECONDS = Histogram(
+    "redis_op_seconds", "Latency of hot-path Redis operations", ["op"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+INGESTION_POST_SECONDS = Histogram(
+    "ingestion_post_seconds", "Latency of ingestion API posts", ["api"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+INGESTION_POST_FAILURES = Counter("ingestion_post_failures_total", "Failed ingestion API posts", ["api"])
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Delay between a loop monitor callback being scheduled and running",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Times the event loop was blocked longer than the slow callback threshold"
+)
+
+# Point-in-time values read from Redis when /metrics is scraped
+INGESTION_BACKLOG = Gauge(
+    "ingestion_backlog", "Entries waiting in the ingestion outbox", multiprocess_mode="mostrecent"
+)
+ACTIVE_SEARCHES = Gauge("active_searches", "Searches in flight", multiprocess_mode="mostrecent")
+SEARCH_SLOTS = Gauge(
+    "search_slots", "Searches the dispatcher targets in flight", multiprocess_mode="mostrecent"
+)
+LIMITER_QUEUE = Gauge(
+    "limiter_queue_length", "Requests waiting on the rate limiter", multiprocess_mode="mostrecent"
+)
+
+
+def timed(histogram):
+    """Decorator observing an async function's duration into a histogram (or labelled child)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _registry():
+    if get_metrics_config()["multiproc_dir"]:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type for /metrics"""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def update_gauges(budget: Dict, ingestion_backlog: int):
+    """Set the point-in-time gauges from a dispatcher budget, right before a scrape"""
+    ACTIVE_SEARCHES.set(budget["active_searches"])
+    SEARCH_SLOTS.set(budget["target_in_flight"])
+    LIMITER_QUEUE.set(budget["limiter_queue_length"])
+    INGESTION_BACKLOG.set(ingestion_backlog)
+
+
+def reset_multiproc_dir():
+    """
+    Clear metric files left by a previous run of this process family; call before
+    any process starts writing. Other families keep theirs in sibling directories.
+    """
+    directory = get_metrics_config()["multiproc_dir"]
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def mark_process_dead(pid: int):
+    if get_metrics_config()["multiproc_dir"]:
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int):
+    """Serve this process's metrics (aggregated across processes in multiprocess mode)"""
+    try:
+        start_http_server(port, registry=_registry())
+        logger.info(f"Serving Prometheus metrics on port {port}")
+    except OSError as e:
+        logger.error(f"Could not start metrics server on port {port}: {str(e)}")
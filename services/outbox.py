@@ -0,0 +1,234 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import os
+import socket
+import time
+import logging
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from services.redis import RedisService
+from services.artist_ids import pack_artist_id, unpack_artist_id
+from services.rollups import add_rollup_commands
+from config.outbox import get_outbox_config
+
+logger = logging.getLogger(__name__)
+
+# (stream entry ID, fields) as returned by XREADGROUP / XAUTOCLAIM on the binary client
+OutboxEntry = Tuple[bytes, Dict[bytes, bytes]]
+
+# Genre names inside an entry are joined with the ASCII unit separator, which
+# never appears in a genre name and is shorter to store and parse than JSON
+GENRE_SEPARATOR = "\x1f"
+
+# Streams whose consumer group exists, so the XGROUP CREATE runs once per process.
+# A stream deleted behind our back (FLUSHDB, DEL, a failover to an empty replica)
+# takes its group with it; reads that hit NOGROUP drop the stream from here and retry
+_ensured_groups = set()
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def encode_artist_entry(artist_id: str, genres: Optional[List[str]] = None) -> Dict[str, bytes]:
+    """Outbox fields for one artist: the packed ID plus its genres, if any"""
+    fields = {"id": pack_artist_id(artist_id)}
+    if genres:
+        fields["genres"] = GENRE_SEPARATOR.join(genres).encode("utf-8")
+    return fields
+
+
+def decode_artist_entry(fields: Dict[bytes, bytes]) -> Tuple[str, List[str]]:
+    """(artist ID, genres) of an entry read from the binary client"""
+    genres = fields.get(b"genres")
+    return unpack_artist_id(fields[b"id"]), genres.decode("utf-8").split(GENRE_SEPARATOR) if genres else []
+
+
+class IngestionOutbox:
+    """
+    Durable queue of items waiting for the ingestion API, on a Redis Stream.
+
+    Entries are claimed with XREADGROUP, so a claimed entry stays in the group's
+    pending list until the sender acknowledges it after a successful POST (XACK
+    plus XDEL, keeping the stream as small as the backlog). A sender that dies or
+    gets an error simply never acknowledges; the periodic reclaim picks its
+    entries up again and dead-letters the ones that keep failing. A sender that
+    keeps claiming passes the IDs it has delivered to the next claim, which
+    acknowledges them in the same pipeline as its XREADGROUP, so a delivered batch
+    costs no round trip of its own.
+    """
+
+    def __init__(self, redis_service: RedisService, stream: str, consumer: Optional[str] = None):
+        config = get_outbox_config()
+        self.redis_service = redis_service
+        self.stream = stream
+        self.group = config["group"]
+        self.dead_letter_stream = f"{stream}:dead"
+        self.stats_key = f"{stream}:stats"
+        self.claim_timeout_ms = config["claim_timeout_ms"]
+        self.max_deliveries = config["max_deliveries"]
+        self.reclaim_count = config["reclaim_count"]
+        self.consumer = consumer or default_consumer_name()
+
+    async def _client(self):
+        if not self.redis_service.redis:
+            await self.redis_service.init()
+        redis = await self.redis_service.get_bytes_client()
+        if self.stream not in _ensured_groups:
+            try:
+                await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            _ensured_groups.add(self.stream)
+        return redis
+
+    async def _with_group(self, operation: Callable[[Redis], Awaitable]):
+        """Run a group command, recreating the consumer group once if it has disappeared"""
+        redis = await self._client()
+        try:
+            return await operation(redis)
+        except ResponseError as e:
+            if "NOGROUP" not in str(e):
+                raise
+            logger.warning(f"Consumer group {self.group} on {self.stream} is gone, recreating it")
+            _ensured_groups.discard(self.stream)
+            return await operation(await self._client())
+
+    async def add(self, entries: List[Dict[str, bytes]]):
+        """Append entries atomically in one round trip (MULTI/EXEC pipeline)"""
+        if not entries:
+            return
+
+        redis = await self._client()
+        async with redis.pipeline(transaction=True) as pipe:
+            for fields in entries:
+                await pipe.xadd(self.stream, fields)
+            await pipe.hincrby(self.stats_key, "added", len(entries))
+            await pipe.execute()
+
+    async def claim(
+        self, count: int, block_ms: Optional[int] = None, ack_ids: Optional[List[bytes]] = None
+    ) -> List[OutboxEntry]:
+        """Claim up to count entries nobody has claimed yet, acknowledging ack_ids in the same round trip"""
+        unacked = list(ack_ids or [])
+
+        async def read(redis):
+            async with redis.pipeline(transaction=False) as pipe:
+                if unacked:
+                    await self._add_ack_commands(pipe, unacked)
+                # Last in the pipeline, so a blocking read does not hold back the acks
+                await pipe.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=count, block=block_ms)
+                results = await pipe.execute(raise_on_error=False)
+            # Sent once: a retry after NOGROUP only repeats the read
+            unacked.clear()
+            for result in results[:-1]:
+                if isinstance(result, Exception):
+                    logger.error(f"Error acknowledging entries on {self.stream}: {str(result)}")
+            if isinstance(results[-1], Exception):
+                raise results[-1]
+            return results[-1]
+
+        response = await self._with_group(read)
+        if not response:
+            return []
+        _, entries = response[0]
+        return entries
+
+    async def ack(self, entry_ids: List[bytes]):
+        """Acknowledge delivered entries and drop them from the stream"""
+        if not entry_ids:
+            return
+
+        redis = await self._client()
+        async with redis.pipeline(transaction=False) as pipe:
+            await self._add_ack_commands(pipe, entry_ids)
+            await pipe.execute()
+
+    async def _add_ack_commands(self, pipe, entry_ids: List[bytes]):
+        minute_key = f"{self.stats_key}:acked:{int(time.time() // 60)}"
+        await pipe.xack(self.stream, self.group, *entry_ids)
+        await pipe.xdel(self.stream, *entry_ids)
+        await pipe.hincrby(self.stats_key, "acked", len(entry_ids))
+        await pipe.incrby(minute_key, len(entry_ids))
+        await pipe.expire(minute_key, 180)
+        await add_rollup_commands(pipe, {"ingestion_sent": len(entry_ids)})
+
+    async def reclaim(self, count: Optional[int] = None) -> List[OutboxEntry]:
+        """
+        Take over up to count (default reclaim_count) entries whose sender has not
+        acknowledged them within the claim timeout. Entries delivered max_deliveries
+        times already go to the dead-letter stream instead of being retried again.
+        """
+        stale = await self._with_group(lambda redis: redis.xpending_range(
+            self.stream, self.group, min="-", max="+",
+            count=self.reclaim_count, idle=self.claim_timeout_ms
+        ))
+        exhausted = [entry["message_id"] for entry in stale if entry["times_delivered"] >= self.max_deliveries]
+        if exhausted:
+            await self._dead_letter(exhausted)
+
+        _, entries, _ = await self._with_group(lambda redis: redis.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=self.claim_timeout_ms, start_id="0-0", count=count or self.reclaim_count
+        ))
+        if entries:
+            logger.warning(f"Re-claimed {len(entries)} unacknowledged entries from {self.stream}")
+        return entries
+
+    async def _dead_letter(self, entry_ids: List[bytes]):
+        redis = await self._client()
+        # XCLAIM hands back the fields and makes this consumer the owner while they move
+        entries = await redis.xclaim(
+            self.stream, self.group, self.consumer, min_idle_time=self.claim_timeout_ms, message_ids=entry_ids
+        )
+        async with redis.pipeline(transaction=False) as pipe:
+            for entry_id, fields in entries:
+                await pipe.xadd(self.dead_letter_stream, {**fields, b"source_id": entry_id})
+            await pipe.xack(self.stream, self.group, *entry_ids)
+            await pipe.xdel(self.stream, *entry_ids)
+            await pipe.hincrby(self.stats_key, "dead_lettered", len(entries))
+            await pipe.execute()
+        logger.error(f"Moved {len(entries)} entries from {self.stream} to {self.dead_letter_stream} after {self.max_deliveries} attempts")
+
+    async def backlog(self) -> int:
+        """Entries not yet delivered (waiting or claimed but unacknowledged)"""
+        try:
+            return await (await self._client()).xlen(self.stream)
+        except Exception as e:
+            logger.error(f"Error getting outbox backlog for {self.stream}: {str(e)}")
+            return 0
+
+    async def stats(self) -> Dict:
+        """Backlog, lag, in-flight, dead letters and throughput of the outbox"""
+        minute = int(time.time() // 60)
+
+        async def read_stats(redis):
+            async with redis.pipeline(transaction=False) as pipe:
+                await pipe.xlen(self.stream)
+                await pipe.xinfo_groups(self.stream)
+                await pipe.xlen(self.dead_letter_stream)
+                await pipe.hgetall(self.stats_key)
+                await pipe.get(f"{self.stats_key}:acked:{minute - 1}")
+                await pipe.xpending(self.stream, self.group)
+                return await pipe.execute()
+
+        length, groups, dead_letters, totals, acked_last_minute, pending = await self._with_group(read_stats)
+
+        group = next((g for g in groups if g["name"] in (self.group, self.group.encode())), {})
+        oldest_pending_age = None
+        if pending and pending.get("min"):
+            oldest_ms = int(pending["min"].split(b"-")[0])
+            oldest_pending_age = max(0.0, time.time() - oldest_ms / 1000)
+
+        return {
+            "stream": self.stream,
+            "backlog": length,
+            "lag": group.get("lag"),
+            "in_flight": group.get("pending", 0),
+            "oldest_in_flight_seconds": oldest_pending_age,
+            "dead_letters": dead_letters,
+            "added_total": int(totals.get(b"added", 0)),
+            "acked_total": int(totals.get(b"acked", 0)),
+            "dead_lettered_total": int(totals.get(b"dead_lettered", 0)),
+            "acked_per_second": int(acked_last_minute or 0) / 60,
+        }
@@ -0,0 +1,260 @@
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+import logging
+from redis import Redis as SyncRedis
+from services.redis import RedisService
+from services.metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS
+from config.profiling import get_profiling_config
+
+logger = logging.getLogger(__name__)
+
+
+def fold_stack(frame, thread_name: str) -> str:
+    """A stack in folded format: thread first, then file:function frames down to the leaf"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.append(thread_name.replace(" ", "_"))
+    return ";".join(reversed(names))
+
+
+def format_folded(counts: Dict[str, int]) -> str:
+    """One "stack count" line per stack, the input of flamegraph.pl and speedscope"""
+    return "\n".join(f"{stack} {count}" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def merge_folded(texts: Iterable[str]) -> Dict[str, int]:
+    """Sum the stack counts of several folded profiles, e.g. one per process"""
+    counts: Dict[str, int] = {}
+    for text in texts:
+        for line in text.splitlines():
+            stack, _, count = line.rpartition(" ")
+            if stack and count.isdigit():
+                counts[stack] = counts.get(stack, 0) + int(count)
+    return counts
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread of this process. Stacks are read
+    with sys._current_frames() from the thread running the profile, so code that
+    blocks the event loop shows up too. Nothing runs between profiles.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        config = get_profiling_config()
+        self.interval = interval or config["sample_interval"]
+        self.max_seconds = config["max_seconds"]
+        self._running = threading.Lock()
+
+    def profile(self, seconds: float) -> Dict[str, int]:
+        """Sample for the given seconds, blocking the calling thread; returns counts per folded stack"""
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("A profile is already running in this process")
+        try:
+            return self._sample(min(seconds, self.max_seconds))
+        finally:
+            self._running.release()
+
+    def _sample(self, seconds: float) -> Dict[str, int]:
+        own_thread = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: Dict[str, int] = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = fold_stack(frame, names.get(ident, f"thread-{ident}"))
+                counts[stack] = counts.get(stack, 0) + 1
+            time.sleep(self.interval)
+        return counts
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
+
+
+def process_label() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ProfilerListener:
+    """
+    Runs profiles requested over Redis in this process. Publishing
+    {"id": ..., "seconds": ...} to the command channel makes every listening API
+    and worker process profile itself and store its folded stacks under that ID.
+    Runs in a daemon thread with a sync Redis client, blocked on the socket while idle.
+    """
+
+    def __init__(self, redis_url: str, label: Optional[str] = None):
+        config = get_profiling_config()
+        self.redis_url = redis_url
+        self.label = label or process_label()
+        self.channel = config["command_channel"]
+        self.result_prefix = config["result_prefix"]
+        self.result_ttl = config["result_ttl"]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="profiler-listener", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        redis = SyncRedis.from_url(self.redis_url, decode_responses=True)
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            while not self._stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message:
+                    self._handle(redis, message["data"])
+        except Exception as e:
+            logger.error(f"Profiler listener for {self.label} stopped: {str(e)}")
+        finally:
+            pubsub.close()
+            redis.close()
+
+    def _handle(self, redis: SyncRedis, data: str):
+        try:
+            command = json.loads(data)
+            profile_id = str(command["id"])
+            seconds = float(command.get("seconds", 10))
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed profiler command: {data!r}")
+            return
+
+        logger.info(f"Profiling {self.label} for {seconds:.0f}s (profile {profile_id})")
+        try:
+            counts = get_sampling_profiler().profile(seconds)
+        except RuntimeError as e:
+            logger.warning(f"Skipping profile {profile_id}: {str(e)}")
+            return
+
+        key = f"{self.result_prefix}:{profile_id}"
+        pipe = redis.pipeline(transaction=False)
+        pipe.hset(key, self.label, format_folded(counts))
+        pipe.expire(key, self.result_ttl)
+        pipe.execute()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+async def request_profile(redis_service: RedisService, seconds: float) -> Tuple[str, int]:
+    """Ask every listening process for a profile; returns its ID and the number of listeners"""
+    if not redis_service.redis:
+        await redis_service.init()
+    profile_id = uuid.uuid4().hex[:12]
+    command = json.dumps({"id": profile_id, "seconds": seconds})
+    listeners = await redis_service.redis.publish(get_profiling_config()["command_channel"], command)
+    return profile_id, listeners
+
+
+async def get_profile_results(redis_service: RedisService, profile_id: str) -> Dict[str, str]:
+    """Folded stacks stored so far for a profile, keyed by process"""
+    if not redis_service.redis:
+        await redis_service.init()
+    return await redis_service.redis.hgetall(f"{get_profiling_config()['result_prefix']}:{profile_id}")
+
+
+class LoopMonitor:
+    """
+    Always-on event loop health check. A daemon thread schedules a callback on the
+    loop every lag_interval and records how late it ran. If the loop has not run it
+    within the slow callback threshold, the stack of the loop thread (the code
+    blocking it) is logged once for that stall.
+
+    Must be created on the loop's thread. A Celery pool process only runs its loop
+    during a task, so nothing is scheduled while the loop is idle.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval: Optional[float] = None,
+        slow_callback: Optional[float] = None
+    ):
+        config = get_profiling_config()
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.interval = interval or config["lag_interval"]
+        self.slow_callback = slow_callback or config["slow_callback"]
+        self.stalls = 0
+        self._beat = 0
+        self._beat_done = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def _on_beat(self, beat: int, scheduled_at: float):
+        if beat != self._beat:
+            # Left over from a loop that stopped before running it
+            return
+        lag = time.perf_counter() - scheduled_at
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        if lag > self.slow_callback:
+            self.stalls += 1
+            EVENT_LOOP_STALLS.inc()
+        self._beat_done.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.loop.is_closed():
+                return
+            if self.loop.is_running():
+                self._beat += 1
+                self._beat_done.clear()
+                try:
+                    self.loop.call_soon_threadsafe(self._on_beat, self._beat, time.perf_counter())
+                except RuntimeError:
+                    return
+                if not self._beat_done.wait(self.slow_callback):
+                    self._report_stall()
+                    while not self._beat_done.wait(self.interval):
+                        if self._stop.is_set() or not self.loop.is_running():
+                            self._beat += 1
+                            break
+            self._stop.wait(self.interval)
+
+    def _report_stall(self):
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        logger.warning(f"Event loop blocked for over {self.slow_callback * 1000:.0f}ms in:\n{stack}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
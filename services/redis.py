@@ -1,32 +1,52 @@
 from redis.asyncio import Redis
-from typing import List, Optional, Dict, Set
+from typing import Awaitable, Callable, List, Optional, Dict, Set
+import asyncio
+import json
 import time
+import uuid
+from datetime import datetime
 import logging
 from config.rate_limits import get_redis_rate_limit
+from config.dispatcher import get_dispatcher_config
+from config.outbox import get_outbox_config
+from services.metrics import timed, REDIS_OP_SECONDS
 
 logger = logging.getLogger(__name__)
 
-# Batch ingestion configuration
-BATCH_SIZE = 10
-INGESTION_API_URL = "https://apiv2.streamclout.io/fetch/artists/full/batch"
-MAX_ALBUMS = 500
+# Pub/sub channel the crawler publishes its activity on (see services.events)
+EVENTS_CHANNEL = "crawler:events"
 
 class RedisService:
-    def __init__(self, redis_url: str, max_workers: int = 20):
+    def __init__(self, redis_url: str, max_workers: Optional[int] = None, node_id: Optional[str] = None):
+        dispatcher_config = get_dispatcher_config()
+        outbox_config = get_outbox_config()
         self.redis: Optional[Redis] = None
+        self.redis_bytes: Optional[Redis] = None  # Binary client for outbox entries with packed artist IDs
         self.redis_url = redis_url
-        self.max_workers = max_workers
+        self.max_workers = max_workers or dispatcher_config["max_in_flight"]
         self.search_timeout = 300  # 5 minutes
+        self.node_id = node_id
         
-        # Redis keys
-        self.active_searches_key = "active_searches"
+        # Redis keys. Each crawler node has its own credentials, so its frontier,
+        # rate window and dispatcher signals live under node-scoped keys.
+        node_suffix = f":{node_id}" if node_id else ""
+        self.active_searches_key = f"active_searches{node_suffix}"
         self.active_searches_timestamps = f"{self.active_searches_key}:timestamps"
-        self.requests_key = "api_requests"  # Using this as our main sorted set for requests
-        self.pending_artists_key = "pending_artist_ids"  # List for batch ingestion
-        self.pending_genres_key = "pending_artist_genres"  # Hash for genre batching
+        self.requests_key = f"api_requests{node_suffix}"  # Using this as our main sorted set for requests
+        self.outbox_artists_key = outbox_config["artists_stream"]  # Stream of artists (and their genres) for ingestion
+        self.limiter_waiters_key = f"rate_limit_waiters{node_suffix}"  # Sorted set of requests waiting on the limiter
+        self.dispatcher_stats_key = f"dispatcher:stats{node_suffix}"  # Hash of observed crawl timings
+        self.stop_threshold_key = "stop_policy:min_expected_new"  # Fleet-wide stop policy override
+        self.counters_key = "stats:counters"  # Fleet-wide totals maintained on the write path
+        self.events_channel = EVENTS_CHANNEL  # Pub/sub feed of crawler activity for the dashboard
+        self.latency_alpha = dispatcher_config["latency_alpha"]
+        self.default_page_latency = dispatcher_config["default_page_latency"]
         rate_limit_config = get_redis_rate_limit()
         self.rate_limit_window = rate_limit_config["rate_limit_window"]
         self.rate_limit_max = rate_limit_config["rate_limit_max"]
+        # Time source of the rate limiter; benchmarks/rate_limiter_sim.py swaps in a virtual clock
+        self.clock: Callable[[], float] = time.time
+        self.sleep: Callable[[float], Awaitable] = asyncio.sleep
 
     async def init(self):
         """Initialize Redis connection with retry logic"""
@@ -47,8 +67,25 @@ class RedisService:
                     self.redis = None
                 raise
 
+    async def get_bytes_client(self) -> Redis:
+        """Lazily create the binary client used for entries holding packed artist IDs"""
+        if not self.redis_bytes:
+            self.redis_bytes = Redis.from_url(
+                self.redis_url,
+                decode_responses=False,
+                max_connections=20
+            )
+        return self.redis_bytes
+
     async def close(self):
         """Close Redis connection safely"""
+        if self.redis_bytes:
+            try:
+                await self.redis_bytes.close()
+            except Exception as e:
+                logger.error(f"Error closing binary Redis connection: {str(e)}")
+            finally:
+                self.redis_bytes = None
         if self.redis:
             try:
                 await self.redis.close()
@@ -57,6 +94,11 @@ class RedisService:
             finally:
                 self.redis = None
 
+    def _event(self, event_type: str, **fields) -> str:
+        """JSON payload for the crawler events channel"""
+        return json.dumps({"type": event_type, "node": self.node_id or "", **fields})
+
+    @timed(REDIS_OP_SECONDS.labels(op="record_api_request"))
     async def record_api_request(self, query: str, offset: int = 0, limit: int = 50) -> bool:
         """
         Record an API request with query details using a sorted set.
@@ -65,7 +107,7 @@ class RedisService:
         if not self.redis:
             await self.init()
             
-        now = time.time()
+        now = self.clock()
         window_start = now - self.rate_limit_window
         request_key = f"{query}:{offset}:{now}"
         
@@ -102,6 +144,12 @@ class RedisService:
             -- Set expiration
             redis.call('EXPIRE', KEYS[1], 60)  -- Keep sorted set for 1 minute
             redis.call('EXPIRE', 'request:' .. ARGV[4], 60)
+
+            -- Tell dashboards the rate window gained a request
+            redis.call('PUBLISH', ARGV[8], cjson.encode({
+                type = 'request', node = ARGV[9], query = ARGV[5],
+                offset = tonumber(ARGV[6]), limit = tonumber(ARGV[7]), timestamp = now
+            }))
             
             return 1
             """
@@ -121,7 +169,9 @@ class RedisService:
                 request_key,  # ARGV[4]
                 query,  # ARGV[5]
                 str(offset),  # ARGV[6]
-                str(limit)  # ARGV[7]
+                str(limit),  # ARGV[7]
+                self.events_channel,  # ARGV[8]
+                self.node_id or ""  # ARGV[9]
             )
             
             return bool(result)
@@ -130,6 +180,7 @@ class RedisService:
             logger.error(f"Error recording API request: {str(e)}")
             return False
 
+    @timed(REDIS_OP_SECONDS.labels(op="update_request_artists"))
     async def update_request_artists(self, query: str, offset: int, artists_found: int):
         """Update the artists_found count for a specific request"""
         if not self.redis:
@@ -150,11 +201,12 @@ class RedisService:
             for request_key in requests:
                 if request_key.startswith(f"{query}:{offset}:"):
                     # Update the artists_found count
-                    await self.redis.hset(
-                        f"request:{request_key}",
-                        "artists_found",
-                        artists_found
-                    )
+                    async with self.redis.pipeline() as pipe:
+                        await pipe.hset(f"request:{request_key}", "artists_found", artists_found)
+                        await pipe.publish(self.events_channel, self._event(
+                            "page_fetched", query=query, offset=offset, artists_found=artists_found
+                        ))
+                        await pipe.execute()
                     break
                     
         except Exception as e:
@@ -176,9 +228,14 @@ class RedisService:
                 '+inf'
             )
             
+            # Fetch every request's details in one round trip
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for request_key in request_keys:
+                    await pipe.hgetall(f"request:{request_key}")
+                all_details = await pipe.execute()
+
             requests = []
-            for request_key in request_keys:
-                details = await self.redis.hgetall(f"request:{request_key}")
+            for details in all_details:
                 if details:
                     try:
                         request_info = {
@@ -204,7 +261,7 @@ class RedisService:
         if not self.redis:
             await self.init()
             
-        now = time.time()
+        now = self.clock()
         window_start = now - self.rate_limit_window
         
         try:
@@ -244,28 +301,55 @@ class RedisService:
             }
 
     # Active Search Management Methods
-    async def add_active_search(self, search_string: str) -> bool:
-        """Add search if under worker limit"""
+    @timed(REDIS_OP_SECONDS.labels(op="add_active_search"))
+    async def add_active_search(self, search_string: str, limit: Optional[int] = None) -> bool:
+        """
+        Add search if under the in-flight limit (defaults to max_workers).
+        The count check and insert run in one Lua script so concurrent dispatchers can't overshoot.
+        """
         if not self.redis:
             await self.init()
-            
+
+        limit = min(limit if limit is not None else self.max_workers, self.max_workers)
+
         try:
-            if await self.redis.scard(self.active_searches_key) >= self.max_workers:
+            add_if_under_limit_script = """
+            if redis.call('SCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+                return 0
+            end
+            if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+                return 0
+            end
+            redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+            redis.call('PUBLISH', ARGV[4], cjson.encode({type = 'search_started', node = ARGV[5], query = ARGV[1]}))
+            return 1
+            """
+
+            if not hasattr(self, '_add_if_under_limit_script'):
+                self._add_if_under_limit_script = await self.redis.script_load(add_if_under_limit_script)
+
+            added = await self.redis.evalsha(
+                self._add_if_under_limit_script,
+                2,
+                self.active_searches_key,  # KEYS[1]
+                self.active_searches_timestamps,  # KEYS[2]
+                search_string,  # ARGV[1]
+                limit,  # ARGV[2]
+                str(time.time()),  # ARGV[3]
+                self.events_channel,  # ARGV[4]
+                self.node_id or ""  # ARGV[5]
+            )
+            if not added:
                 return False
-                
-            async with self.redis.pipeline() as pipe:
-                current_time = str(time.time())
-                await pipe.sadd(self.active_searches_key, search_string)
-                await pipe.hset(self.active_searches_timestamps, search_string, current_time)
-                await pipe.execute()
-                
+
             logger.info(f"Added active search: {search_string}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error adding active search: {str(e)}")
             return False
 
+    @timed(REDIS_OP_SECONDS.labels(op="remove_active_search"))
     async def remove_active_search(self, search_string: str):
         """Remove a search with proper error handling"""
         if not self.redis:
@@ -275,6 +359,7 @@ class RedisService:
             async with self.redis.pipeline() as pipe:
                 await pipe.srem(self.active_searches_key, search_string)
                 await pipe.hdel(self.active_searches_timestamps, search_string)
+                await pipe.publish(self.events_channel, self._event("search_removed", query=search_string))
                 await pipe.execute()
                 
             logger.info(f"Removed search: {search_string}")
@@ -313,110 +398,247 @@ class RedisService:
         except Exception as e:
             logger.error(f"Error cleaning up stale searches: {str(e)}")
 
-    # Batch Ingestion Methods
-    async def add_pending_artists(self, artist_ids: List[str]) -> List[str]:
+    async def wait_for_request_slot(self, query: str, offset: int = 0, limit: int = 50) -> bool:
         """
-        Add artist IDs to pending list and return a batch if we have 20+ artists.
-        Returns a list of artist IDs to send to the ingestion API (empty if < 20).
+        Wait until record_api_request admits this request into the rate window.
+        While waiting the request is registered in the limiter queue so the dispatcher
+        can see the backlog. Returns whether the request had to queue at all.
         """
+        waiter_token = None
+        try:
+            while True:
+                if await self.record_api_request(query=query, offset=offset, limit=limit):
+                    return waiter_token is not None
+
+                if waiter_token is None:
+                    waiter_token = f"{query}:{offset}:{uuid.uuid4().hex}"
+                await self.add_limiter_waiter(waiter_token)
+
+                # If we couldn't record, get precise timing for next available slot
+                rate_info = await self.get_rate_limit_info()
+                if rate_info["time_until_next_request"] > 0:
+                    # Only sleep for the exact time needed, with a tiny buffer
+                    await self.sleep(rate_info["time_until_next_request"] + 0.01)
+        finally:
+            if waiter_token:
+                await self.remove_limiter_waiter(waiter_token)
+
+    # Dispatcher Signal Methods
+    async def add_limiter_waiter(self, token: str):
+        """Mark a request as waiting on the rate limiter (refreshes its timestamp)"""
         if not self.redis:
             await self.init()
 
-        if not artist_ids:
-            return []
+        try:
+            await self.redis.zadd(self.limiter_waiters_key, {token: self.clock()})
+        except Exception as e:
+            logger.error(f"Error adding limiter waiter: {str(e)}")
+
+    async def remove_limiter_waiter(self, token: str):
+        """Remove a request from the limiter wait queue"""
+        if not self.redis:
+            await self.init()
 
         try:
-            # Add all artist IDs to the pending list
-            await self.redis.rpush(self.pending_artists_key, *artist_ids)
+            await self.redis.zrem(self.limiter_waiters_key, token)
+        except Exception as e:
+            logger.error(f"Error removing limiter waiter: {str(e)}")
 
-            # Check current count
-            count = await self.redis.llen(self.pending_artists_key)
-            logger.info(f"Pending artists count: {count}")
+    async def get_limiter_queue_length(self) -> int:
+        """
+        Get the number of requests currently waiting for a rate limit slot.
+        Waiters refresh their entry on every retry, so anything older than
+        two windows belongs to a crashed worker and is dropped.
+        """
+        if not self.redis:
+            await self.init()
 
-            # If we have enough for a batch, pop them
-            if count >= BATCH_SIZE:
-                batch = []
-                for _ in range(BATCH_SIZE):
-                    artist_id = await self.redis.lpop(self.pending_artists_key)
-                    if artist_id:
-                        batch.append(artist_id)
+        try:
+            stale_before = self.clock() - 2 * self.rate_limit_window
+            async with self.redis.pipeline() as pipe:
+                await pipe.zremrangebyscore(self.limiter_waiters_key, 0, stale_before)
+                await pipe.zcard(self.limiter_waiters_key)
+                _, count = await pipe.execute()
+            return count
+        except Exception as e:
+            logger.error(f"Error getting limiter queue length: {str(e)}")
+            return 0
 
-                logger.info(f"Returning batch of {len(batch)} artists for ingestion")
-                return batch
+    @timed(REDIS_OP_SECONDS.labels(op="record_page_latency"))
+    async def record_page_latency(self, seconds: float, rollup: Optional[Dict[str, int]] = None):
+        """Fold one page's non-limiter latency into the shared EWMA, with the page's rollup counts"""
+        if not self.redis:
+            await self.init()
 
-            return []
+        try:
+            ewma_script = """
+            local alpha = tonumber(ARGV[2])
+            local sample = tonumber(ARGV[1])
+            local current = tonumber(redis.call('HGET', KEYS[1], 'page_latency'))
+            if current then
+                sample = alpha * sample + (1 - alpha) * current
+            end
+            redis.call('HSET', KEYS[1], 'page_latency', tostring(sample))
+            return tostring(sample)
+            """
 
+            if not hasattr(self, '_ewma_script'):
+                self._ewma_script = await self.redis.script_load(ewma_script)
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                await pipe.evalsha(
+                    self._ewma_script,
+                    1,
+                    self.dispatcher_stats_key,
+                    seconds,
+                    self.latency_alpha
+                )
+                await self._add_rollup(pipe, rollup)
+                await pipe.execute()
         except Exception as e:
-            logger.error(f"Error adding pending artists: {str(e)}")
-            return []
+            logger.error(f"Error recording page latency: {str(e)}")
 
-    async def get_pending_artist_count(self) -> int:
-        """Get current count of pending artists"""
+    async def get_page_latency(self) -> float:
+        """Get the smoothed page latency, falling back to the configured default"""
         if not self.redis:
             await self.init()
 
         try:
-            return await self.redis.llen(self.pending_artists_key)
+            latency = await self.redis.hget(self.dispatcher_stats_key, "page_latency")
+            return float(latency) if latency else self.default_page_latency
         except Exception as e:
-            logger.error(f"Error getting pending artist count: {str(e)}")
-            return 0
+            logger.error(f"Error getting page latency: {str(e)}")
+            return self.default_page_latency
+
+    async def set_frontier_size(self, size: int):
+        """Record how many prefixes are still unsearched, as counted by the last dispatch"""
+        if not self.redis:
+            await self.init()
+
+        try:
+            await self.redis.hset(self.dispatcher_stats_key, "frontier_size", size)
+        except Exception as e:
+            logger.error(f"Error setting frontier size: {str(e)}")
+
+    async def get_frontier_size(self) -> Optional[int]:
+        """Get the last recorded frontier size (None until a dispatch has run)"""
+        if not self.redis:
+            await self.init()
+
+        try:
+            size = await self.redis.hget(self.dispatcher_stats_key, "frontier_size")
+            return int(size) if size is not None else None
+        except Exception as e:
+            logger.error(f"Error getting frontier size: {str(e)}")
+            return None
+
+    async def get_stop_threshold(self) -> Optional[float]:
+        """Get the fleet-wide marginal yield threshold override, if one is set"""
+        if not self.redis:
+            await self.init()
+
+        try:
+            threshold = await self.redis.get(self.stop_threshold_key)
+            return float(threshold) if threshold else None
+        except Exception as e:
+            logger.error(f"Error getting stop threshold: {str(e)}")
+            return None
+
+    # Status Counter Methods
+    @staticmethod
+    async def _add_rollup(pipe, counts: Optional[Dict[str, int]]):
+        """Queue throughput rollup increments (see services.rollups) on a pipeline being built"""
+        if counts:
+            # Imported here because services.rollups imports this module
+            from services.rollups import add_rollup_commands
+            await add_rollup_commands(pipe, counts)
+
+    @timed(REDIS_OP_SECONDS.labels(op="increment_counter"))
+    async def increment_counter(self, name: str, amount: int = 1, rollup: Optional[Dict[str, int]] = None):
+        """Add to a status counter (e.g. new artists written by a page), with any rollup counts"""
+        if not self.redis:
+            await self.init()
 
-    # Genre Batching Methods
-    async def add_pending_genres(self, genres_map: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        if amount <= 0:
+            return
+
+        try:
+            async with self.redis.pipeline() as pipe:
+                await pipe.hincrby(self.counters_key, name, amount)
+                await pipe.publish(self.events_channel, self._event("counter", name=name, amount=amount))
+                await self._add_rollup(pipe, rollup)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error incrementing counter {name}: {str(e)}")
+
+    async def record_search_completed(
+        self,
+        completed_at: datetime,
+        query: str = "",
+        artists_found: int = 0,
+        stop_reason: Optional[str] = None
+    ):
         """
-        Add artist genres to pending hash and return a batch if we have enough.
-        Returns a dict of artist_id -> genres to send to the API (empty if < BATCH_SIZE).
+        Count a completed search; the first completion also sets the earliest search
+        time. The frontier size shrinks by one so it stays current between the
+        periodic recounts without touching search_progress.
         """
         if not self.redis:
             await self.init()
 
-        if not genres_map:
-            return {}
+        # Decrement only a recorded size (never create one) and never below zero
+        decrement_frontier_script = """
+        local size = tonumber(redis.call('HGET', KEYS[1], 'frontier_size'))
+        if size and size > 0 then
+            return redis.call('HINCRBY', KEYS[1], 'frontier_size', -1)
+        end
+        return size
+        """
 
         try:
-            import json
-            # Add all genres to the pending hash (artist_id -> JSON encoded genres list)
-            for artist_id, genres in genres_map.items():
-                await self.redis.hset(self.pending_genres_key, artist_id, json.dumps(genres))
-
-            # Check current count
-            count = await self.redis.hlen(self.pending_genres_key)
-            logger.info(f"Pending genres count: {count}")
-
-            # If we have enough for a batch, pop them
-            if count >= BATCH_SIZE:
-                # Get all pending genres
-                all_genres = await self.redis.hgetall(self.pending_genres_key)
-
-                # Take BATCH_SIZE items
-                batch = {}
-                keys_to_delete = []
-                for i, (artist_id, genres_json) in enumerate(all_genres.items()):
-                    if i >= BATCH_SIZE:
-                        break
-                    batch[artist_id] = json.loads(genres_json)
-                    keys_to_delete.append(artist_id)
-
-                # Delete the items we're returning
-                if keys_to_delete:
-                    await self.redis.hdel(self.pending_genres_key, *keys_to_delete)
-
-                logger.info(f"Returning batch of {len(batch)} artist genres for API")
-                return batch
+            async with self.redis.pipeline() as pipe:
+                await pipe.eval(decrement_frontier_script, 1, self.dispatcher_stats_key)
+                await pipe.hincrby(self.counters_key, "total_searches", 1)
+                await pipe.hsetnx(self.counters_key, "earliest_search_time", completed_at.isoformat())
+                await pipe.publish(self.events_channel, self._event(
+                    "search_finished", query=query, artists_found=artists_found,
+                    stop_reason=stop_reason, created_at=completed_at.isoformat()
+                ))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording search completion: {str(e)}")
 
-            return {}
+    async def get_counters(self) -> Dict[str, str]:
+        """All status counters as stored (no reconciled_at until the first reconciliation)"""
+        if not self.redis:
+            await self.init()
 
+        try:
+            return await self.redis.hgetall(self.counters_key)
         except Exception as e:
-            logger.error(f"Error adding pending genres: {str(e)}")
+            logger.error(f"Error getting counters: {str(e)}")
             return {}
 
-    async def get_pending_genres_count(self) -> int:
-        """Get current count of pending genres"""
+    async def set_counters(self, values: Dict):
+        """Overwrite status counters with reconciled values"""
+        if not self.redis:
+            await self.init()
+
+        try:
+            await self.redis.hset(self.counters_key, mapping={
+                name: value for name, value in values.items() if value is not None
+            })
+        except Exception as e:
+            logger.error(f"Error setting counters: {str(e)}")
+
+    # Ingestion Backlog Methods - the outbox itself lives in services.outbox
+    async def get_pending_artist_count(self) -> int:
+        """Artists waiting in the ingestion outbox (including claimed, unacknowledged ones)"""
         if not self.redis:
             await self.init()
 
         try:
-            return await self.redis.hlen(self.pending_genres_key)
+            return await self.redis.xlen(self.outbox_artists_key)
         except Exception as e:
-            logger.error(f"Error getting pending genres count: {str(e)}")
-            return 0
\ No newline at end of file
+            logger.error(f"Error getting pending artist count: {str(e)}")
+            return 0
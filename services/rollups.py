@@ -0,0 +1,78 @@
+from typing import Dict, List, Optional
+import time
+import logging
+from services.redis import RedisService
+from config.rollups import get_rollup_config
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PREFIX = "rollup"
+ROLLUP_METRICS = ("requests", "pages", "artists_found", "new_artists", "rate_limited", "ingestion_sent")
+
+
+def bucket_start(timestamp: float, seconds: int) -> int:
+    return int(timestamp // seconds) * seconds
+
+
+def rollup_key(resolution: str, start: int) -> str:
+    return f"{ROLLUP_PREFIX}:{resolution}:{start}"
+
+
+async def add_rollup_commands(pipe, counts: Dict[str, int], now: Optional[float] = None):
+    """Queue the bucket increments for counts on an existing pipeline, so they cost no extra round trip"""
+    now = now or time.time()
+    for resolution, config in get_rollup_config()["resolutions"].items():
+        key = rollup_key(resolution, bucket_start(now, config["seconds"]))
+        for metric, amount in counts.items():
+            if amount:
+                await pipe.hincrby(key, metric, amount)
+        await pipe.expire(key, config["retention"])
+
+
+async def record_rollup(redis_service: RedisService, **counts: int):
+    """Add counts (see ROLLUP_METRICS) to the current minute, hour and day buckets in one round trip"""
+    if not any(counts.values()):
+        return
+    if not redis_service.redis:
+        await redis_service.init()
+
+    try:
+        async with redis_service.redis.pipeline(transaction=False) as pipe:
+            await add_rollup_commands(pipe, counts)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error recording rollup {counts}: {str(e)}")
+
+
+async def get_history(
+    redis_service: RedisService,
+    resolution: str,
+    start: float,
+    end: float
+) -> List[Dict]:
+    """
+    Buckets between start and end (unix seconds) at one resolution, oldest first,
+    fetched in one pipelined round trip. Empty buckets are returned as zeros, and
+    every bucket carries new_artists_per_request.
+    """
+    config = get_rollup_config()
+    seconds = config["resolutions"][resolution]["seconds"]
+    starts = list(range(bucket_start(start, seconds), bucket_start(end, seconds) + 1, seconds))
+    if len(starts) > config["max_points"]:
+        raise ValueError(f"Range covers {len(starts)} {resolution} buckets, at most {config['max_points']} allowed")
+
+    if not redis_service.redis:
+        await redis_service.init()
+    async with redis_service.redis.pipeline(transaction=False) as pipe:
+        for bucket in starts:
+            await pipe.hgetall(rollup_key(resolution, bucket))
+        buckets = await pipe.execute()
+
+    history = []
+    for bucket, values in zip(starts, buckets):
+        point = {"start": bucket, **{metric: int(values.get(metric, 0)) for metric in ROLLUP_METRICS}}
+        point["new_artists_per_request"] = (
+            point["new_artists"] / point["requests"] if point["requests"] else None
+        )
+        history.append(point)
+    return history
@@ -1,4 +1,4 @@
-from typing import List, Set
+from typing import Callable, List, Optional, Set
 from sqlalchemy import select
 from models.database import SearchProgress
 from database.database import AsyncSessionLocal
@@ -41,6 +41,10 @@ class SearchStringGenerator:
             self._four_char_prefixes: List[str] = []
             self._other_prefixes: List[str] = []
             self._prefixes_loaded = False
+            self.last_frontier_size: Optional[int] = None  # Unsearched prefixes seen by the last batch
+            # Fixed seed makes prefix order reproducible, e.g. for archive replays
+            seed = os.getenv('SEARCH_RANDOM_SEED')
+            self._random = random.Random(int(seed)) if seed else random.Random()
 
     def _load_prefixes(self) -> None:
         """Load prefixes from CSV file and separate 4-char from others"""
@@ -87,10 +91,25 @@ class SearchStringGenerator:
             result = await session.execute(query)
             return {row[0] for row in result.fetchall()}
 
-    async def generate_batch(self) -> List[str]:
+    async def count_frontier(self, shard_filter: Optional[Callable[[str], bool]] = None) -> int:
+        """Count unsearched prefixes (in this node's shard) without picking a batch"""
+        await self.initialize()
+        completed = await self._get_completed_searches()
+        self.last_frontier_size = sum(
+            1 for p in self._prefixes
+            if p not in completed and (shard_filter is None or shard_filter(p))
+        )
+        return self.last_frontier_size
+
+    async def generate_batch(
+        self,
+        size: Optional[int] = None,
+        shard_filter: Optional[Callable[[str], bool]] = None
+    ) -> List[str]:
         """
-        Generate a batch of search strings.
+        Generate a batch of search strings (max_workers strings unless size is given).
         Priority: 4-character prefixes first, then random from remaining.
+        With a shard_filter only prefixes owned by this crawler node are considered.
         """
         await self.initialize()
 
@@ -98,24 +117,32 @@ class SearchStringGenerator:
         completed = await self._get_completed_searches()
 
         strings = []
-        needed = self.max_workers
+        needed = size if size is not None else self.max_workers
 
         # First, prioritize unsearched 4-character prefixes
-        unsearched_4char = [p for p in self._four_char_prefixes if p not in completed]
+        unsearched_4char = [
+            p for p in self._four_char_prefixes
+            if p not in completed and (shard_filter is None or shard_filter(p))
+        ]
         if unsearched_4char:
             # Shuffle to randomize which 4-char strings we pick
-            random.shuffle(unsearched_4char)
+            self._random.shuffle(unsearched_4char)
             batch_from_4char = unsearched_4char[:needed]
             strings.extend(batch_from_4char)
             logger.info(f"Selected {len(batch_from_4char)} 4-char prefixes")
 
+        unsearched_other = [
+            p for p in self._other_prefixes
+            if p not in completed and (shard_filter is None or shard_filter(p))
+        ]
+        self.last_frontier_size = len(unsearched_4char) + len(unsearched_other)
+
         # If we still need more, pick randomly from other unsearched prefixes
         if len(strings) < needed:
             remaining_needed = needed - len(strings)
-            unsearched_other = [p for p in self._other_prefixes if p not in completed]
 
             if unsearched_other:
-                random.shuffle(unsearched_other)
+                self._random.shuffle(unsearched_other)
                 batch_from_other = unsearched_other[:remaining_needed]
                 strings.extend(batch_from_other)
                 logger.info(f"Selected {len(batch_from_other)} other prefixes")
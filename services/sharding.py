@@ -0,0 +1,151 @@
+from typing import Callable, List, Optional
+import bisect
+import hashlib
+import threading
+import time
+import logging
+from redis import Redis as SyncRedis
+from services.redis import RedisService
+from config.sharding import get_sharding_config
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of crawler node IDs scored by their last heartbeat
+NODES_KEY = "crawler:nodes"
+
+
+def _ring_hash(value: str) -> int:
+    """Stable 64-bit hash used for ring positions (same on every node)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping search prefixes to crawler nodes"""
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = 64):
+        self.nodes = sorted(set(nodes))
+        self.virtual_nodes = virtual_nodes
+        points = sorted(
+            (_ring_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        """Node owning the key: first ring point clockwise from the key's hash"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class ShardCoordinator:
+    """
+    Tracks live crawler nodes in Redis and decides which prefixes this node owns.
+    Membership is refreshed at most once per heartbeat interval; ownership checks
+    on the hot path only consult the locally cached ring.
+    """
+
+    def __init__(self, node_id: str):
+        config = get_sharding_config()
+        self.node_id = node_id
+        self.heartbeat_interval = config["heartbeat_interval"]
+        self.node_ttl = config["node_ttl"]
+        self.virtual_nodes = config["virtual_nodes"]
+        self.ring = HashRing([node_id], self.virtual_nodes)
+        self._last_refresh = 0.0
+
+    async def refresh(self, redis_service: RedisService, force: bool = False) -> List[str]:
+        """Heartbeat this node and reload membership, rebuilding the ring if it changed"""
+        now = time.time()
+        if not force and now - self._last_refresh < self.heartbeat_interval:
+            return self.ring.nodes
+
+        if not redis_service.redis:
+            await redis_service.init()
+        redis = redis_service.redis
+        try:
+            async with redis.pipeline() as pipe:
+                await pipe.zadd(NODES_KEY, {self.node_id: now})
+                await pipe.zremrangebyscore(NODES_KEY, 0, now - self.node_ttl)
+                await pipe.zrange(NODES_KEY, 0, -1)
+                _, _, nodes = await pipe.execute()
+        except Exception as e:
+            # Keep crawling with the last known ring rather than stalling
+            logger.error(f"Error refreshing crawler nodes: {str(e)}")
+            return self.ring.nodes
+
+        self._last_refresh = now
+        if sorted(nodes) != self.ring.nodes:
+            logger.info(f"Crawler membership changed: {self.ring.nodes} -> {sorted(nodes)}, rebalancing shards")
+            self.ring = HashRing(nodes, self.virtual_nodes)
+        return self.ring.nodes
+
+    def owns(self, prefix: str, node_id: Optional[str] = None) -> bool:
+        """Whether the prefix belongs to the given node's shard (this node by default)"""
+        return self.ring.node_for(prefix) == (node_id or self.node_id)
+
+    def shard_filter(self, node_id: Optional[str] = None) -> Callable[[str], bool]:
+        """Predicate for SearchStringGenerator restricting prefixes to one shard"""
+        return lambda prefix: self.owns(prefix, node_id)
+
+
+async def get_live_nodes(redis_service: RedisService) -> List[str]:
+    """Crawler nodes that sent a heartbeat within the node TTL, sorted (empty without sharding)"""
+    if not redis_service.redis:
+        await redis_service.init()
+    try:
+        nodes = await redis_service.redis.zrangebyscore(
+            NODES_KEY, time.time() - get_sharding_config()["node_ttl"], "+inf"
+        )
+        return sorted(nodes)
+    except Exception as e:
+        logger.error(f"Error reading crawler nodes: {str(e)}")
+        return []
+
+
+class NodeHeartbeat:
+    """
+    Background heartbeat for a crawler node so it stays in the ring while idle.
+    Runs in a daemon thread of the Celery main process with a sync Redis client.
+    """
+
+    def __init__(self, redis_url: str, node_id: str):
+        config = get_sharding_config()
+        self.redis_url = redis_url
+        self.node_id = node_id
+        self.interval = config["heartbeat_interval"]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="crawler-heartbeat", daemon=True)
+        self._thread.start()
+        logger.info(f"Started heartbeat for crawler node {self.node_id}")
+
+    def _run(self):
+        redis = SyncRedis.from_url(self.redis_url, decode_responses=True)
+        try:
+            while not self._stop.is_set():
+                try:
+                    redis.zadd(NODES_KEY, {self.node_id: time.time()})
+                except Exception as e:
+                    logger.error(f"Error sending heartbeat for {self.node_id}: {str(e)}")
+                self._stop.wait(self.interval)
+            # Leave the ring so the remaining nodes pick up this shard immediately
+            redis.zrem(NODES_KEY, self.node_id)
+        except Exception as e:
+            logger.error(f"Error leaving crawler ring for {self.node_id}: {str(e)}")
+        finally:
+            redis.close()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
@@ -1,12 +1,17 @@
 from typing import Optional
 import httpx
 import asyncio
+import time
 from redis.asyncio import Redis
 from services.redis import RedisService
+from services.archive import ResponseArchive, ReplayTransport
 from models.spotify import SpotifyArtist, SpotifyArtists, SpotifyToken
 from datetime import datetime, timedelta
 import logging
 from config.rate_limits import get_spotify_rate_limit
+from services.metrics import SPOTIFY_REQUEST_SECONDS, SPOTIFY_RATE_LIMITED, LIMITER_WAIT_SECONDS
+from services.rollups import record_rollup
+from services.tracing import span
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -24,7 +29,10 @@ class SpotifyClient:
         initial_backoff: float = 1.0,
         bearer_token: Optional[str] = None,
         rate_limit_window: int = 30,
-        rate_limit_max: int = 10
+        rate_limit_max: int = 10,
+        node_id: Optional[str] = None,
+        archive: Optional[ResponseArchive] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
     ):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -34,6 +42,12 @@ class SpotifyClient:
         self.initial_backoff = initial_backoff
         self._bearer_token = bearer_token
         self.redis_url = redis_url
+        self.node_id = node_id
+        # Optional record/replay: raw responses are appended to the archive, and a
+        # replay transport serves requests offline without the rate limiter
+        self.archive = archive
+        self._transport = transport
+        self.replay = isinstance(transport, ReplayTransport)
         rate_limit_config = get_spotify_rate_limit()
         self.rate_limit_window = rate_limit_config["window_seconds"]
         self.rate_limit_max = rate_limit_config["max_requests"]
@@ -43,6 +57,8 @@ class SpotifyClient:
         self._redis: Optional[Redis] = None
         self._initialized = False
         self.query_windows = {}  # Track rate limits per query
+        self.last_wait_seconds = 0.0  # Time the last request spent waiting on the limiter
+        self.last_request_queued = False  # Whether the last request had to queue for a slot
         
     async def _ensure_initialized(self):
         """Ensure all services are initialized"""
@@ -50,7 +66,8 @@ class SpotifyClient:
             try:
                 self._redis_service = RedisService(
                     self.redis_url,
-                    max_workers=5
+                    max_workers=5,
+                    node_id=self.node_id
                 )
                 await self._redis_service.init()
                 self._redis = self._redis_service.redis
@@ -67,9 +84,12 @@ class SpotifyClient:
         """Get authentication token - either from bearer token or client credentials"""
         if self._bearer_token:
             return self._bearer_token
+        if self.replay:
+            return "replay"
             
         await self._ensure_initialized()
-        token_key = "spotify:auth:token"
+        # Nodes crawl with their own credentials, so tokens are cached per node
+        token_key = f"spotify:auth:token:{self.node_id}" if self.node_id else "spotify:auth:token"
         
         # Check Redis for cached token
         token_data = await self._redis.get(token_key)
@@ -124,32 +144,38 @@ class SpotifyClient:
             offset = params.get('offset', 0)
             limit = params.get('limit', 50)
             
-            # Try to record the request - this is our single source of truth for rate limiting
-            while True:
-                recorded = await self._redis_service.record_api_request(
-                    query=query,
-                    offset=offset,
-                    limit=limit
-                )
-                if recorded:
-                    break
-                    
-                # If we couldn't record, get precise timing for next available slot
-                rate_info = await self._redis_service.get_rate_limit_info()
-                if rate_info["time_until_next_request"] > 0:
-                    # Only sleep for the exact time needed, with a tiny buffer
-                    await asyncio.sleep(rate_info["time_until_next_request"] + 0.01)
+            # Wait for a slot in the Redis rate window - our single source of truth for rate limiting.
+            # Replayed requests never reach Spotify, so they skip the limiter entirely.
+            with span("limiter_wait"):
+                wait_started = time.monotonic()
+                queued = False
+                if not self.replay:
+                    queued = await self._redis_service.wait_for_request_slot(
+                        query=query,
+                        offset=offset,
+                        limit=limit
+                    )
+            self.last_wait_seconds = time.monotonic() - wait_started
+            self.last_request_queued = queued
+            LIMITER_WAIT_SECONDS.observe(self.last_wait_seconds)
                 
             # Get token and make request
-            token = await self._get_token()
+            with span("token"):
+                token = await self._get_token()
             headers = {
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json"
             }
             kwargs['headers'] = headers
             
-            async with httpx.AsyncClient() as client:
-                response = await client.request(method, url, **kwargs)
+            async with httpx.AsyncClient(transport=self._transport) as client:
+                request_started = time.perf_counter()
+                with span("spotify_http"):
+                    response = await client.request(method, url, **kwargs)
+                SPOTIFY_REQUEST_SECONDS.observe(time.perf_counter() - request_started)
+                if response.status_code == 429:
+                    SPOTIFY_RATE_LIMITED.inc()
+                    await record_rollup(self._redis_service, requests=1, rate_limited=1)
                 response.raise_for_status()
                 return response
                 
@@ -181,6 +207,9 @@ class SpotifyClient:
             }
         )
         
+        if self.archive:
+            await self.archive.record(query, offset, limit, response.content, response.status_code)
+
         search_results = response.json()
         artists = [
             SpotifyArtist(
@@ -193,11 +222,12 @@ class SpotifyClient:
         ]
         
         # Update Redis with the number of artists found
-        await self._redis_service.update_request_artists(
-            query=query,
-            offset=offset,
-            artists_found=len(artists)
-        )
+        if not self.replay:
+            await self._redis_service.update_request_artists(
+                query=query,
+                offset=offset,
+                artists_found=len(artists)
+            )
         
         return SpotifyArtists(artists=artists)
 
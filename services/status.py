@@ -0,0 +1,136 @@
+from typing import Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import time
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import AsyncSessionLocal
+from models.database import SearchProgress
+from services.redis import RedisService
+from services.counters import get_status_counters
+from config.status import get_status_config
+
+logger = logging.getLogger(__name__)
+
+# Rate limit fields left out of the snapshot because they move with the clock
+CLOCK_DERIVED_FIELDS = ("window_start", "window_end", "time_until_next_request")
+
+
+async def build_status(session: AsyncSession, redis_service: RedisService) -> Dict:
+    """Overall system status: active searches, rate limit window, totals and recent searches"""
+    active_searches = await redis_service.get_active_searches()
+    rate_limit_info = await redis_service.get_rate_limit_info()
+    window_requests = await redis_service.get_window_requests()
+
+    # Totals are maintained counters in Redis, so building never scans the big tables
+    counters = await get_status_counters(session, redis_service)
+
+    # Recent searches are served by the created_at index
+    recent_searches = (await session.execute(
+        select(SearchProgress).order_by(SearchProgress.created_at.desc()).limit(10)
+    )).scalars().all()
+
+    # Fields derived from the clock would change the body, and so the ETag, on every
+    # refresh; clients slide the window from window_size and the request timestamps
+    rate_limit_status = {
+        name: value for name, value in rate_limit_info.items() if name not in CLOCK_DERIVED_FIELDS
+    }
+
+    return {
+        "active_searches": sorted(active_searches),
+        "active_search_count": len(active_searches),
+        "rate_limit_status": rate_limit_status,
+        "window_requests": window_requests,
+        "total_artists_collected": counters["total_artists"],
+        "total_searches_completed": counters["total_searches"],
+        "earliest_search_time": counters["earliest_search_time"],
+        "recent_searches": [
+            {
+                "query": search.query,
+                "artists_found": search.artists,
+                "stop_reason": search.stop_reason,
+                "created_at": search.created_at.isoformat()
+            } for search in recent_searches
+        ]
+    }
+
+
+class StatusSnapshot:
+    """A serialized /status body and its ETag"""
+
+    def __init__(self, body: bytes, built_at: float):
+        self.body = body
+        self.built_at = built_at
+        self.etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+class StatusSnapshotter:
+    """
+    Rebuilds the /status snapshot on a fixed cadence in the API process. Requests
+    only hand out the prebuilt body, so their cost does not depend on how many
+    dashboards are polling. If a refresh fails the previous snapshot keeps being served.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        interval: Optional[float] = None
+    ):
+        self.redis_service = redis_service
+        self.session_factory = session_factory
+        self.interval = interval or get_status_config()["refresh_interval"]
+        self.snapshot: Optional[StatusSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> StatusSnapshot:
+        async with self._lock:
+            async with self.session_factory() as session:
+                status = await build_status(session, self.redis_service)
+            body = json.dumps(status, separators=(",", ":")).encode("utf-8")
+            if self.snapshot is None or body != self.snapshot.body:
+                self.snapshot = StatusSnapshot(body, time.time())
+            return self.snapshot
+
+    async def current(self) -> StatusSnapshot:
+        """The latest snapshot, built on demand if the background loop has not produced one yet"""
+        if self.snapshot is None:
+            return await self.refresh()
+        return self.snapshot
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing status snapshot: {str(e)}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.redis_service.close()
+
+
+_snapshotter: Optional[StatusSnapshotter] = None
+
+
+def get_status_snapshotter(redis_url: str) -> StatusSnapshotter:
+    """Process-wide snapshotter with its own Redis connection"""
+    global _snapshotter
+    if _snapshotter is None or _snapshotter.redis_service.redis_url != redis_url:
+        _snapshotter = StatusSnapshotter(RedisService(redis_url))
+    return _snapshotter
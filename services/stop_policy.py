@@ -0,0 +1,111 @@
+from typing import List, Optional
+import logging
+from config.stop_policy import get_stop_policy_config
+
+logger = logging.getLogger(__name__)
+
+# Stop reasons recorded in search_progress when pagination ends naturally
+STOP_EXHAUSTED = "exhausted"
+STOP_MAX_OFFSET = "max_offset"
+
+
+class StopPolicy:
+    """
+    Decides after each page whether a search should keep paging.
+    Policies are stateful and built fresh for every search.
+    """
+    name = "none"
+    # Whether observe() can end a search; the no-op policy never needs page results
+    active = False
+
+    def observe(self, offset: int, artists_found: int, new_artists: int) -> Optional[str]:
+        """Record one page and return a stop reason, or None to keep paging"""
+        return None
+
+
+class LowYieldStopPolicy(StopPolicy):
+    """Stop after a run of consecutive pages where few of the artists were new"""
+    name = "low_yield"
+    active = True
+
+    def __init__(self, pages: int, min_new_ratio: float):
+        self.pages = pages
+        self.min_new_ratio = min_new_ratio
+        self.low_yield_streak = 0
+
+    def observe(self, offset: int, artists_found: int, new_artists: int) -> Optional[str]:
+        new_ratio = new_artists / artists_found if artists_found else 0.0
+        if new_ratio < self.min_new_ratio:
+            self.low_yield_streak += 1
+        else:
+            self.low_yield_streak = 0
+
+        if self.low_yield_streak >= self.pages:
+            return f"{self.name}:{self.low_yield_streak}_pages_under_{self.min_new_ratio:.0%}"
+        return None
+
+
+class MarginalYieldStopPolicy(StopPolicy):
+    """Stop when the smoothed number of new artists per page drops below a threshold"""
+    name = "marginal_yield"
+    active = True
+
+    def __init__(self, min_expected_new: float, min_pages: int = 2, alpha: float = 0.5):
+        self.min_expected_new = min_expected_new
+        self.min_pages = min_pages
+        self.alpha = alpha
+        self.pages_seen = 0
+        self.expected_new: Optional[float] = None
+
+    def observe(self, offset: int, artists_found: int, new_artists: int) -> Optional[str]:
+        self.pages_seen += 1
+        if self.expected_new is None:
+            self.expected_new = float(new_artists)
+        else:
+            self.expected_new = self.alpha * new_artists + (1 - self.alpha) * self.expected_new
+
+        if self.pages_seen >= self.min_pages and self.expected_new < self.min_expected_new:
+            return f"{self.name}:{self.expected_new:.2f}_under_{self.min_expected_new:g}"
+        return None
+
+
+class CompositeStopPolicy(StopPolicy):
+    """Stop as soon as any of the wrapped policies says so"""
+    name = "composite"
+    active = True
+
+    def __init__(self, policies: List[StopPolicy]):
+        self.policies = policies
+
+    def observe(self, offset: int, artists_found: int, new_artists: int) -> Optional[str]:
+        # Every policy sees every page so their state stays consistent
+        reasons = [policy.observe(offset, artists_found, new_artists) for policy in self.policies]
+        return next((reason for reason in reasons if reason), None)
+
+
+def build_stop_policy(min_expected_new: Optional[float] = None) -> StopPolicy:
+    """Build the configured stop policy for one search"""
+    config = get_stop_policy_config()
+    if min_expected_new is None:
+        min_expected_new = config["min_expected_new"]
+
+    policies: List[StopPolicy] = []
+    for name in (p.strip() for p in config["policies"].split(",")):
+        if not name:
+            continue
+        if name == LowYieldStopPolicy.name:
+            policies.append(LowYieldStopPolicy(config["low_yield_pages"], config["low_yield_ratio"]))
+        elif name == MarginalYieldStopPolicy.name:
+            policies.append(MarginalYieldStopPolicy(
+                min_expected_new,
+                min_pages=config["marginal_yield_min_pages"],
+                alpha=config["marginal_yield_alpha"]
+            ))
+        else:
+            logger.warning(f"Unknown stop policy '{name}', ignoring")
+
+    if not policies:
+        return StopPolicy()
+    if len(policies) == 1:
+        return policies[0]
+    return CompositeStopPolicy(policies)
@@ -0,0 +1,142 @@
+from typing import Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import random
+import time
+import uuid
+import logging
+from services.redis import RedisService
+from config.tracing import get_tracing_config
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Spans of one sampled unit of work (a search, an ingestion batch)"""
+
+    def __init__(self, name: str, attributes: Optional[Dict] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes or {}
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict] = []
+
+    def add_span(self, name: str, started: float, duration: float, attributes: Dict):
+        self.spans.append({
+            "name": name,
+            "offset_ms": round((started - self._started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **({"attributes": attributes} if attributes else {}),
+        })
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "spans": sorted(self.spans, key=lambda span: span["offset_ms"]),
+        }
+
+
+# The trace of the work running in this context. asyncio tasks copy the context
+# when created, so page handlers spawned by a search record into its trace.
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def start_trace(name: str, **attributes) -> Optional[Trace]:
+    """Start a trace for the current context if it is sampled; None otherwise"""
+    if random.random() >= get_tracing_config()["sample_rate"]:
+        return None
+    trace = Trace(name, attributes)
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Time a stage into the current trace; a no-op when this work is not sampled"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started, time.perf_counter() - started, attributes)
+
+
+async def finish_trace(trace: Optional[Trace], redis_service: RedisService):
+    """Close the trace and push it onto the shared ring"""
+    if trace is None:
+        return
+    trace.finish()
+    _current_trace.set(None)
+    config = get_tracing_config()
+    if not redis_service.redis:
+        await redis_service.init()
+
+    try:
+        async with redis_service.redis.pipeline(transaction=False) as pipe:
+            await pipe.lpush(config["ring_key"], json.dumps(trace.to_dict()))
+            await pipe.ltrim(config["ring_key"], 0, config["ring_size"] - 1)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error storing trace {trace.trace_id}: {str(e)}")
+
+
+async def get_recent_traces(
+    redis_service: RedisService,
+    limit: int = 50,
+    name: Optional[str] = None,
+    search: Optional[str] = None
+) -> List[Dict]:
+    """Newest traces from the ring, optionally only one kind or one search string"""
+    if not redis_service.redis:
+        await redis_service.init()
+
+    traces = []
+    for raw in await redis_service.redis.lrange(get_tracing_config()["ring_key"], 0, -1):
+        trace = json.loads(raw)
+        if name and trace["name"] != name:
+            continue
+        if search and trace["attributes"].get("search") != search:
+            continue
+        traces.append(trace)
+        if len(traces) >= limit:
+            break
+    return traces
+
+
+def summarize_traces(traces: List[Dict]) -> Dict[str, Dict]:
+    """
+    Per-stage breakdown across traces: span count, total, mean and p95 duration, and
+    the stage's share of total traced time. Stages can overlap (pages are processed
+    while the next one is fetched), so shares can add up to more than 1.
+    """
+    traced_ms = sum(trace["duration_ms"] for trace in traces)
+    durations: Dict[str, List[float]] = {}
+    for trace in traces:
+        for stage in trace["spans"]:
+            durations.setdefault(stage["name"], []).append(stage["duration_ms"])
+
+    summary = {}
+    for stage, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        total = sum(values)
+        summary[stage] = {
+            "count": len(values),
+            "total_ms": round(total, 3),
+            "mean_ms": round(total / len(values), 3),
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "share": round(total / traced_ms, 4) if traced_ms else None,
+        }
+    return summary
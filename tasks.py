@@ -1,89 +1,44 @@
-from celery import group
 from celery_config import celery_app
 import asyncio
 from sqlalchemy import select
 from models.database import SearchProgress
 from services.spotify import SpotifyClient
-from services.database import DatabaseService
+from services.archive import get_archive_client_options
+from services.artist_sink import get_artist_sink
+from services.bloom import get_artist_bloom
+from services.artist_ids import pack_artist_id
+from services.genres import GenreService
+from services.counters import reconcile_counters, COUNTER_TOTAL_ARTISTS
 from database.database import AsyncSessionLocal
-from services.redis import RedisService, INGESTION_API_URL, MAX_ALBUMS
+from services.redis import RedisService
+from services.outbox import IngestionOutbox, encode_artist_entry
+from config.outbox import get_outbox_config
+import httpx
 import os
 from dotenv import load_dotenv
-import httpx
 import logging
 import backoff
+import time
 from datetime import datetime, timezone
-from services.search_generator import SearchStringGenerator
+from services.dispatcher import SearchDispatcher
+from services.sharding import ShardCoordinator
+from config.sharding import get_node_id
+from services.stop_policy import build_stop_policy, STOP_EXHAUSTED, STOP_MAX_OFFSET
+from services.metrics import PAGES_FETCHED, ARTISTS_FOUND, ARTISTS_NEW
+from services.tracing import start_trace, finish_trace, span
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-# Get the service bypass secret for API authentication
-SERVICE_BYPASS_SECRET = os.getenv('SERVICE_BYPASS_SECRET', '')
-
-
-async def send_batch_to_ingestion_api(artist_ids: list[str]) -> bool:
-    """Send a batch of artist IDs to the ingestion API with signed request"""
-    if not artist_ids:
-        return True
+# Crawler node this worker belongs to (None when running unsharded). The ring is
+# cached per process and only refreshed once per heartbeat interval.
+NODE_ID = get_node_id()
+_shard_coordinator = ShardCoordinator(NODE_ID) if NODE_ID else None
 
-    payload = {
-        "artist_ids": artist_ids,
-        "max_albums": MAX_ALBUMS,
-        "force": False,
-        "trigger_compaction": False
-    }
-
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Service-Secret': SERVICE_BYPASS_SECRET,
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(INGESTION_API_URL, json=payload, headers=headers)
-            response.raise_for_status()
-            logger.info(f"Successfully sent batch of {len(artist_ids)} artists to ingestion API")
-            return True
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Ingestion API HTTP error: {e.response.status_code} - {e.response.text}")
-        return False
-    except Exception as e:
-        logger.error(f"Failed to send batch to ingestion API: {str(e)}")
-        return False
-
-
-async def send_genres_to_api(genres_map: dict[str, list[str]]) -> bool:
-    """Send a batch of artist genres to the genres API endpoint"""
-    if not genres_map:
-        return True
-
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Service-Secret': SERVICE_BYPASS_SECRET,
-    }
-
-    # Base URL from INGESTION_API_URL, replace the endpoint
-    base_url = INGESTION_API_URL.rsplit('/fetch/', 1)[0]
-    genres_url = f"{base_url}/db/insert/artist-genres"
-
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(genres_url, json=genres_map, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            logger.info(f"Successfully sent genres for {result.get('count', len(genres_map))} artists to genres API")
-            return True
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Genres API HTTP error: {e.response.status_code} - {e.response.text}")
-        return False
-    except Exception as e:
-        logger.error(f"Failed to send genres to API: {str(e)}")
-        return False
 
 @celery_app.task(name='tasks.generate_search_strings')
 def generate_search_strings():
-    """Generate next batch of search strings based on available capacity"""
+    """Periodic safety-net sweep that admits searches if the event-driven dispatch missed a slot"""
     try:
         loop = asyncio.get_event_loop()
     except RuntimeError:
@@ -94,46 +49,33 @@ def generate_search_strings():
 
 async def _async_generate_search_strings():
     """Async implementation of search string generation"""
-    redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
-    await redis_service.init()
-    
-    try:
-        # Get current active search count
-        active_count = await redis_service.get_active_search_count()
-        available_slots = redis_service.max_workers - active_count
-        
-        logger.info(f"Active searches: {active_count}, Available slots: {available_slots}")
-        
-        if available_slots <= 0:
-            return {"generated_strings": []}
-        
-        # Get next batch of search strings
-        generator = SearchStringGenerator()
-        await generator.initialize()
-        search_strings = await generator.generate_batch()
-        
-        # Add new searches to Redis
-        added_strings = []
-        for search_str in search_strings:
-            if await redis_service.add_active_search(search_str):
-                added_strings.append(search_str)
-                logger.info(f"Added search string to Redis: {search_str}")
-        
-        # Spawn group of search tasks
-        if added_strings:
-            logger.info(f"Spawning search tasks for strings: {added_strings}")
-            search_group = group(search_artist_string.s(search_str) for search_str in added_strings)
-            search_group.apply_async()
-        
-        return {
-            "generated_strings": added_strings
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in generate_search_strings: {str(e)}")
-        raise
-    finally:
-        await redis_service.close()
+    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    node_ids = [NODE_ID]
+
+    if _shard_coordinator:
+        # The beat task lands on a single node, so it sweeps every live node's frontier
+        redis_service = RedisService(redis_url, node_id=NODE_ID)
+        await redis_service.init()
+        try:
+            node_ids = await _shard_coordinator.refresh(redis_service, force=True)
+        finally:
+            await redis_service.close()
+
+    added_strings = []
+    for node_id in node_ids:
+        redis_service = RedisService(redis_url, node_id=node_id)
+        await redis_service.init()
+        try:
+            added_strings.extend(await _dispatch_searches(redis_service, refresh_frontier=True))
+        except Exception as e:
+            logger.error(f"Error in generate_search_strings: {str(e)}")
+            raise
+        finally:
+            await redis_service.close()
+
+    return {
+        "generated_strings": added_strings
+    }
 
 @celery_app.task(
     name='tasks.search_artist_string',
@@ -173,6 +115,8 @@ async def _async_search_artist_string(search_string: str):
     """Async implementation of artist search with immediate replacement"""
     spotify_client = None
     redis_service = None
+    page_tasks = []
+    trace = None
     
     try:
         spotify_client = SpotifyClient(
@@ -181,18 +125,26 @@ async def _async_search_artist_string(search_string: str):
             redis_url=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
             bearer_token=os.getenv('SPOTIFY_BEARER_TOKEN'),
             rate_limit_window=30,
-            rate_limit_max=10
+            rate_limit_max=10,
+            node_id=NODE_ID,
+            **get_archive_client_options()
         )
         
-        redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), node_id=NODE_ID)
         await redis_service.init()
+        trace = start_trace("search", search=search_string, node=NODE_ID)
         
         offset = 0
         total_artists = []
+        stop_reason = None
+        stop_policy = build_stop_policy(await redis_service.get_stop_threshold())
+        # Pages handed to the write-behind sink and not yet seen by the stop policy, in
+        # order: (offset, artists found, new IDs future)
+        artist_sink = get_artist_sink(get_artist_bloom(os.getenv('REDIS_URL', 'redis://localhost:6379/0')))
+        pending_pages = []
+        page_tasks = []
         
         async with AsyncSessionLocal() as session:
-            db_service = DatabaseService(session)
-            
             # First check if this search has already been completed
             existing_search = await session.execute(
                 select(SearchProgress).where(SearchProgress.query == search_string)
@@ -201,7 +153,7 @@ async def _async_search_artist_string(search_string: str):
                 logger.info(f"Search for {search_string} already completed, skipping")
                 await redis_service.remove_active_search(search_string)
                 # Immediately queue a new search to replace this one
-                await _queue_next_search(redis_service)
+                await _dispatch_searches(redis_service)
                 return {
                     "search_string": search_string,
                     "status": "already_completed"
@@ -210,67 +162,103 @@ async def _async_search_artist_string(search_string: str):
             while offset <= 950:  # Ensure we never exceed 950
                 try:
                     logger.info(f"Searching {search_string} with offset {offset}")
-                    result = await spotify_client.search_artists(
-                        query=search_string,
-                        offset=offset
-                    )
+                    page_started = time.monotonic()
+                    with span("page", offset=offset):
+                        result = await spotify_client.search_artists(
+                            query=search_string,
+                            offset=offset
+                        )
                 except Exception as e:
                     logger.error(f"Error searching {search_string} at offset {offset}: {str(e)}")
                     await redis_service.remove_active_search(search_string)
-                    await _queue_next_search(redis_service)
+                    await _dispatch_searches(redis_service)
                     raise
                 
                 current_batch_size = len(result.artists)
+                PAGES_FETCHED.inc()
+                ARTISTS_FOUND.inc(current_batch_size)
                 logger.info(f"Found {current_batch_size} artists for {search_string} at offset {offset}")
                 
                 if result.artists:
-                    # upsert_artists now returns only NEW artist IDs
-                    new_artist_ids = await db_service.upsert_artists(result.artists)
+                    # The sink writes behind; new artist IDs for this page arrive once it flushes
                     total_artists.extend(result.artists)
-
-                    # Add new artists to pending batch and check if we need to send
-                    if new_artist_ids:
-                        batch_to_send = await redis_service.add_pending_artists(list(new_artist_ids))
-                        if batch_to_send:
-                            await send_batch_to_ingestion_api(batch_to_send)
-
-                        # Collect genres for new artists and batch them (skip empty)
-                        new_artist_ids_set = set(new_artist_ids)
-                        genres_map = {
-                            artist.id: artist.genres
-                            for artist in result.artists
-                            if artist.id in new_artist_ids_set and artist.genres
-                        }
-                        if genres_map:
-                            genres_batch = await redis_service.add_pending_genres(genres_map)
-                            if genres_batch:
-                                await send_genres_to_api(genres_batch)
+                    new_ids_future = artist_sink.submit(result.artists)
+                    page_tasks.append(asyncio.ensure_future(_handle_new_artists(
+                        redis_service,
+                        result.artists,
+                        new_ids_future
+                    )))
+                    if stop_policy.active:
+                        pending_pages.append((offset, current_batch_size, new_ids_future))
                 
+                # Feed the dispatcher: latency outside the limiter sets how many searches
+                # keep it busy, and a request that never queued means there is spare budget.
+                # The page's throughput rollup rides along in the same round trip.
+                with span("redis_signals"):
+                    await redis_service.record_page_latency(
+                        time.monotonic() - page_started - spotify_client.last_wait_seconds,
+                        rollup={"requests": 1, "pages": 1, "artists_found": current_batch_size}
+                    )
+                if not spotify_client.last_request_queued:
+                    await _dispatch_searches(redis_service)
+
                 if current_batch_size == 0 or current_batch_size < 50:
+                    stop_reason = STOP_EXHAUSTED
+                    break
+
+                # Stop early when deeper pages are unlikely to turn up new artists. The
+                # policy runs one page behind so the sink keeps batching: before the next
+                # request it needs the new-artist counts of every page except this one. The
+                # sink's normal size/linger flush has usually delivered the previous page's
+                # counts while this page was being fetched.
+                while pending_pages and (len(pending_pages) > 1 or pending_pages[0][2].done()):
+                    page_offset, page_size, new_ids_future = pending_pages.pop(0)
+                    if not new_ids_future.done():
+                        with span("stop_policy_wait"):
+                            await new_ids_future
+                    stop_reason = stop_policy.observe(page_offset, page_size, len(new_ids_future.result()))
+                    if stop_reason:
+                        break
+                if stop_reason:
+                    logger.info(f"Stopping {search_string} at offset {offset}: {stop_reason}")
                     break
                     
                 # Calculate next offset
                 next_offset = offset + 50
                 if next_offset > 950:  # Check if next offset would exceed limit
+                    stop_reason = STOP_MAX_OFFSET
                     break
                     
                 offset = next_offset
+
+            if trace:
+                trace.attributes["stop_reason"] = stop_reason
+
+            # Only mark the search complete once all of its pages are in the database
+            with span("drain_pages", pages=len(page_tasks)):
+                await asyncio.gather(*page_tasks)
             
             # Record search completion and queue next search immediately
             try:
                 search_progress = SearchProgress(
                     query=search_string,
                     artists=len(total_artists),
+                    stop_reason=stop_reason,
                     created_at=datetime.now(timezone.utc)
                 )
                 session.add(search_progress)
-                await session.flush()
-                await session.commit()
+                with span("record_progress"):
+                    await session.flush()
+                    await session.commit()
                 logger.info(f"Successfully recorded search progress for {search_string}")
                 
+                await redis_service.record_search_completed(
+                    search_progress.created_at, search_string, len(total_artists), stop_reason
+                )
+
                 # Remove this search and queue next one immediately
                 await redis_service.remove_active_search(search_string)
-                await _queue_next_search(redis_service)
+                await _dispatch_searches(redis_service)
                 
             except Exception as e:
                 if 'UniqueViolation' in str(e):
@@ -287,11 +275,17 @@ async def _async_search_artist_string(search_string: str):
         logger.error(f"Error in _async_search_artist_string for {search_string}: {str(e)}")
         if redis_service:
             await redis_service.remove_active_search(search_string)
-            await _queue_next_search(redis_service)
+            await _dispatch_searches(redis_service)
         raise
         
     finally:
+        # Let in-flight page handlers finish with Redis before it is closed
+        if page_tasks:
+            await asyncio.gather(*page_tasks, return_exceptions=True)
         if redis_service:
+            if trace:
+                trace.attributes["pages"] = len(page_tasks)
+                await finish_trace(trace, redis_service)
             await redis_service.close()
         if spotify_client:
             await spotify_client.close()
@@ -299,31 +293,127 @@ async def _async_search_artist_string(search_string: str):
     return {
         "search_string": search_string,
         "total_artists": len(total_artists),
-        "final_offset": offset
+        "final_offset": offset,
+        "stop_reason": stop_reason
     }
 
-async def _queue_next_search(redis_service: RedisService):
-    """Immediately queue next search when a slot opens"""
+async def _handle_new_artists(
+    redis_service: RedisService,
+    artists: list,
+    new_ids_future: asyncio.Future
+) -> int:
+    """Queue one page's new artists for ingestion once the sink reports them, returns the new count"""
+    # Time from submitting the page to the sink until its flush (buffering + bulk merge) lands
+    with span("sink_write", artists=len(artists)):
+        new_artist_ids = await new_ids_future
+
+    if new_artist_ids:
+        ARTISTS_NEW.inc(len(new_artist_ids))
+        await redis_service.increment_counter(
+            COUNTER_TOTAL_ARTISTS, len(new_artist_ids), rollup={"new_artists": len(new_artist_ids)}
+        )
+
+        # Queue one entry per new artist, genres included, in a single round trip;
+        # the ingestion flusher process sends them, so the crawl never waits on it
+        new_artists = {artist.id: artist for artist in artists if pack_artist_id(artist.id) in new_artist_ids}
+        outbox = IngestionOutbox(redis_service, get_outbox_config()["artists_stream"])
+        with span("outbox_enqueue", artists=len(new_artists)):
+            await outbox.add([encode_artist_entry(artist.id, artist.genres) for artist in new_artists.values()])
+
+    return len(new_artist_ids)
+
+def _search_queue(node_id: str | None) -> str | None:
+    """Celery queue for a node's searches, so each node works its own shard"""
+    return f"search.{node_id}" if node_id else None
+
+async def _dispatch_searches(redis_service: RedisService, refresh_frontier: bool = False) -> list[str]:
+    """Admit new searches when the rate limit budget has room for them"""
     try:
-        # Get current active count
-        active_count = await redis_service.get_active_search_count()
-        
-        if active_count >= redis_service.max_workers:
-            return
-            
-        # Generate and queue next search immediately
-        generator = SearchStringGenerator()
-        await generator.initialize()
-        search_strings = await generator.generate_batch()
-        
-        for search_str in search_strings:
-            if await redis_service.add_active_search(search_str):
-                # Spawn search task immediately
-                search_artist_string.apply_async((search_str,))
-                break  # Only queue one search to replace the completed one
+        shard_filter = None
+        if _shard_coordinator:
+            await _shard_coordinator.refresh(redis_service)
+            shard_filter = _shard_coordinator.shard_filter(redis_service.node_id)
+
+        queue = _search_queue(redis_service.node_id)
+        dispatcher = SearchDispatcher(redis_service, shard_filter=shard_filter)
+        added_strings = await dispatcher.dispatch(
+            lambda search_str: search_artist_string.apply_async((search_str,), queue=queue),
+            refresh_frontier=refresh_frontier
+        )
+        if added_strings:
+            logger.info(f"Spawned search tasks for strings: {added_strings}")
+        return added_strings
                 
     except Exception as e:
-        logger.error(f"Error queueing next search: {str(e)}")
+        logger.error(f"Error dispatching searches: {str(e)}")
+        return []
+
+@celery_app.task(name='tasks.rebuild_artist_bloom')
+def rebuild_artist_bloom():
+    """Rebuild the Bloom filter of known artist IDs from the artists table"""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(_async_rebuild_artist_bloom())
+
+async def _async_rebuild_artist_bloom():
+    """Async implementation of the Bloom filter rebuild"""
+    bloom = get_artist_bloom(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    if not bloom:
+        logger.info("Artist bloom filter disabled, skipping rebuild")
+        return {"status": "disabled"}
+
+    async with AsyncSessionLocal() as session:
+        stats = await bloom.rebuild(session)
+    logger.info(
+        f"Artist bloom filter: {stats['items']} items, {stats['memory_bytes']} bytes, "
+        f"estimated false positive rate {stats['estimated_false_positive_rate']:.5f}"
+    )
+    return stats
+
+@celery_app.task(name='tasks.reconcile_counters')
+def reconcile_status_counters():
+    """Reset the /status counters in Redis to exact totals from Postgres"""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(_async_reconcile_status_counters())
+
+async def _async_reconcile_status_counters():
+    """Async implementation of the counter reconciliation"""
+    redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    await redis_service.init()
+    try:
+        async with AsyncSessionLocal() as session:
+            return await reconcile_counters(session, redis_service)
+    finally:
+        await redis_service.close()
+
+@celery_app.task(name='tasks.reconcile_genres')
+def reconcile_genres():
+    """Backfill genre IDs for older artists and recount artists per genre"""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(_async_reconcile_genres())
+
+async def _async_reconcile_genres():
+    """Async implementation of the genre reconciliation"""
+    async with AsyncSessionLocal() as session:
+        genre_service = GenreService(session)
+        backfilled = await genre_service.backfill()
+        corrected = await genre_service.reconcile_counts()
+    logger.info(f"Genre reconciliation: backfilled {backfilled} artists, corrected {corrected} genre counts")
+    return {"backfilled": backfilled, "corrected": corrected}
 
 @backoff.on_exception(
     backoff.expo,
@@ -333,7 +423,7 @@ async def _queue_next_search(redis_service: RedisService):
 )
 async def _cleanup_failed_search(search_string: str):
     """Clean up Redis after a failed search with retry logic"""
-    redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    redis_service = RedisService(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), node_id=NODE_ID)
     await redis_service.init()
     try:
         await redis_service.remove_active_search(search_string)
@@ -1,6 +1,6 @@
 # tests/test_api.py
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from api import app
 from tests.conftest import TestArtist
 
@@ -30,4 +30,47 @@ def test_search_endpoint(mock_rate_limit, mock_search):
     response = client.get("/search?q=test")
     assert response.status_code == 200
     data = response.json()
-    assert "artists" in data
\ No newline at end of file
+    assert "artists" in data
+
+@patch('services.redis.RedisService.init', AsyncMock())
+@patch('services.redis.RedisService.close', AsyncMock())
+def test_lookup_rejects_malformed_ids_with_uuid_storage():
+    with patch('api.get_storage_config', return_value={"artist_id_storage": "uuid"}):
+        response = client.post("/artists/lookup", json={"ids": ["0OdUWJ0sBjDrqHygGUXeCF", "not-an-id"]})
+    assert response.status_code == 400
+    assert "not-an-id" in response.json()["detail"]
+
+@patch('api.get_recent_traces', AsyncMock(return_value=[]))
+@patch('services.redis.RedisService.init', AsyncMock())
+@patch('services.redis.RedisService.close', AsyncMock())
+def test_debug_endpoints_require_the_service_secret(monkeypatch):
+    monkeypatch.delenv("SERVICE_BYPASS_SECRET", raising=False)
+    assert client.post("/debug/profile?seconds=1").status_code == 404
+
+    monkeypatch.setenv("SERVICE_BYPASS_SECRET", "s3cret")
+    assert client.post("/debug/profile?seconds=1").status_code == 403
+    assert client.get("/debug/traces", headers={"X-Service-Secret": "wrong"}).status_code == 403
+    assert client.get("/debug/traces", headers={"X-Service-Secret": "s3cret"}).status_code == 200
+
+def test_genre_artists_page_by_cursor():
+    from types import SimpleNamespace
+    from database.database import get_db
+
+    session = AsyncMock()
+    session.execute.return_value.scalar_one_or_none = lambda: SimpleNamespace(id=7, name="rock", artist_count=2)
+
+    async def override_db():
+        yield session
+
+    page = {"artists": [], "next_cursor": "abc"}
+    app.dependency_overrides[get_db] = override_db
+    try:
+        with patch('api.CatalogService.list_artists', AsyncMock(return_value=page)) as list_artists:
+            response = client.get("/genres/rock/artists?limit=20&cursor=prev")
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.json() == {"genre": "rock", "artist_count": 2, "artists": [], "next_cursor": "abc"}
+    list_artists.assert_awaited_once_with(
+        sort="popularity", descending=True, cursor="prev", genre="rock", limit=20
+    )
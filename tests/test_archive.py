@@ -0,0 +1,42 @@
+# tests/test_archive.py
+import json
+import httpx
+import pytest
+from services.archive import ResponseArchive, ReplayTransport
+
+PAGE = {"artists": {"items": [{"id": "abc", "name": "Test Artist", "genres": [], "popularity": 1}]}}
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    await archive.record("aces", 0, 50, b'{"old": true}', timestamp=100.0)
+    await archive.record("aces", 0, 50, json.dumps(PAGE).encode(), timestamp=200.0)
+
+    transport = ReplayTransport(ResponseArchive(str(tmp_path)))
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.spotify.com/v1/search", params={"q": "aces", "offset": 0, "limit": 50})
+        assert response.json() == PAGE
+
+        # Unrecorded pages replay as empty results by default
+        response = await client.get("https://api.spotify.com/v1/search", params={"q": "aces", "offset": 50, "limit": 50})
+        assert response.json() == {"artists": {"items": []}}
+
+    assert (transport.hits, transport.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_replay_as_of(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    await archive.record("aces", 0, 50, b'{"old": true}', timestamp=100.0)
+    await archive.record("aces", 0, 50, b'{"new": true}', timestamp=200.0)
+
+    entry = ResponseArchive(str(tmp_path)).lookup("aces", 0, 50, as_of=150.0)
+    assert archive.read(entry) == b'{"old": true}'
+
+@pytest.mark.asyncio
+async def test_lookups_with_different_as_of_on_one_archive(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    await archive.record("aces", 0, 50, b'{"old": true}', timestamp=100.0)
+    await archive.record("aces", 0, 50, b'{"new": true}', timestamp=200.0)
+
+    assert archive.read(archive.lookup("aces", 0, 50, as_of=150.0)) == b'{"old": true}'
+    assert archive.read(archive.lookup("aces", 0, 50)) == b'{"new": true}'
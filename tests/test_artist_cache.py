@@ -0,0 +1,42 @@
+# tests/test_artist_cache.py
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from services.artist_cache import ArtistCache, ARTIST_CACHE_PREFIX, NEGATIVE_ENTRY
+
+def make_cache(cached_values, loaded):
+    redis_service = MagicMock()
+    redis_service.redis.mget = AsyncMock(return_value=cached_values)
+    pipe = AsyncMock()
+    redis_service.redis.pipeline.return_value.__aenter__.return_value = pipe
+    cache = ArtistCache(redis_service, session=None)
+    cache.catalog = AsyncMock()
+    cache.catalog.get_artists_by_ids.return_value = loaded
+    return cache, pipe
+
+@pytest.mark.asyncio
+async def test_lookup_reads_through_and_caches_misses():
+    cached_artist = {"id": "a", "name": "Artist A", "genres": [], "popularity": 1, "created_at": None}
+    loaded_artist = {"id": "c", "name": "Artist C", "genres": [], "popularity": 3, "created_at": None}
+    cache, pipe = make_cache([json.dumps(cached_artist), NEGATIVE_ENTRY, None, None], {"c": loaded_artist})
+
+    result = await cache.lookup(["a", "b", "c", "d", "a"])
+
+    # Only IDs absent from the cache go to Postgres, in one batch
+    cache.catalog.get_artists_by_ids.assert_awaited_once_with(["c", "d"])
+    assert result["found"] == {"a": cached_artist, "c": loaded_artist}
+    assert sorted(result["missing"]) == ["b", "d"]
+    assert result["cache_hits"] == 2
+
+    # Found and unknown IDs are written back in one pipeline, unknown ones with the short TTL
+    written = {call.args[0]: (call.args[1], call.kwargs["ex"]) for call in pipe.set.await_args_list}
+    assert written[ARTIST_CACHE_PREFIX + "c"] == (json.dumps(loaded_artist), cache.ttl)
+    assert written[ARTIST_CACHE_PREFIX + "d"] == (NEGATIVE_ENTRY, cache.negative_ttl)
+    pipe.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_lookup_fully_cached_skips_database():
+    cache, pipe = make_cache([NEGATIVE_ENTRY], {})
+    result = await cache.lookup(["b"])
+    cache.catalog.get_artists_by_ids.assert_not_awaited()
+    assert result == {"found": {}, "missing": ["b"], "cache_hits": 1}
@@ -0,0 +1,42 @@
+# tests/test_artist_sink.py
+import pytest
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from services.artist_sink import ArtistSink
+from services.artist_ids import pack_artist_id
+from models.spotify import SpotifyArtist
+from tests.conftest import TestArtist
+
+def make_artist(artist_id: str) -> SpotifyArtist:
+    return SpotifyArtist(id=artist_id, name=f"Artist {artist_id}", genres=["rock"], popularity=10)
+
+def packed(*artist_ids: str) -> set:
+    return {pack_artist_id(artist_id) for artist_id in artist_ids}
+
+@pytest.mark.asyncio
+@patch('services.database.Artist', TestArtist)
+async def test_sink_resolves_new_ids_per_page(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    sink = ArtistSink(session_factory=session_factory, max_rows=100, max_linger=60)
+
+    first = sink.submit([make_artist("a"), make_artist("b")])
+    second = sink.submit([make_artist("b"), make_artist("c")])
+    assert not first.done()
+
+    await sink.flush()
+    assert first.result() == packed("a", "b")
+    # "b" was already claimed by the first page in the same flush
+    assert second.result() == packed("c")
+
+    third = sink.submit([make_artist("c"), make_artist("d")])
+    await sink.close()
+    assert third.result() == packed("d")
+
+@pytest.mark.asyncio
+async def test_sink_flushes_when_full(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    sink = ArtistSink(session_factory=session_factory, max_rows=2, max_linger=60)
+    with patch('services.database.Artist', TestArtist):
+        future = sink.submit([make_artist("a"), make_artist("b")])
+        assert await future == packed("a", "b")
@@ -0,0 +1,62 @@
+# tests/test_autoscaler.py
+import time
+import pytest
+from unittest.mock import AsyncMock
+from services.autoscaler import recommend_workers, recommend_flusher_slots
+
+def test_recommendation_follows_dispatcher_target_not_backlog_of_sleepers():
+    result = recommend_workers(
+        target_in_flight=7,
+        frontier_size=1000,
+        current_requests=10,
+        max_requests=10,
+        limiter_queue_length=15
+    )
+    # 7 crawl slots / 4 slots per worker, regardless of the 15 waiting requests
+    assert result["recommended_workers"] == 2
+    assert result["saturation"] == 2.5
+
+def test_empty_frontier_needs_only_the_minimum():
+    result = recommend_workers(
+        target_in_flight=7,
+        frontier_size=0,
+        current_requests=0,
+        max_requests=10,
+        limiter_queue_length=0
+    )
+    assert result["crawl_slots"] == 0
+    assert result["recommended_workers"] == 1
+    assert result["saturation"] == 0.0
+
+def test_ingestion_backlog_sizes_the_flusher():
+    assert recommend_flusher_slots(0) == 0
+    assert recommend_flusher_slots(1200) == 3
+
+@pytest.mark.asyncio
+async def test_each_live_node_is_read_from_its_own_keys(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.autoscaler import get_autoscale_signal
+    from services.redis import RedisService
+    from services.sharding import NODES_KEY
+
+    server = fakeredis.FakeServer()
+
+    async def init(self):
+        if not self.redis:
+            self.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+
+    monkeypatch.setattr(RedisService, "init", init)
+    monkeypatch.setattr(RedisService, "close", AsyncMock())
+    redis_service = RedisService("redis://localhost:6379/0")
+    await redis_service.init()
+
+    await redis_service.redis.zadd(NODES_KEY, {"a": time.time(), "b": time.time(), "gone": 0})
+    await redis_service.redis.hset("dispatcher:stats:a", "frontier_size", 0)
+    await redis_service.redis.hset("dispatcher:stats:b", "frontier_size", 500)
+
+    result = await get_autoscale_signal(redis_service)
+    assert set(result["nodes"]) == {"a", "b"}
+    assert result["nodes"]["a"]["crawl_slots"] == 0
+    assert result["nodes"]["b"]["crawl_slots"] > 0
+    assert result["recommended_workers"] == sum(node["recommended_workers"] for node in result["nodes"].values())
+    assert result["flusher"] == {"recommended_slots": 0, "pending_artists": 0}
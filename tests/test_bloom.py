@@ -0,0 +1,18 @@
+# tests/test_bloom.py
+from services.bloom import layer_parameters, estimate_false_positive_rate
+
+def test_layer_parameters_grow_and_tighten():
+    capacity, bits, hashes = layer_parameters(1_000_000, 0.001, 2, 0.5, 0)
+    assert capacity == 1_000_000
+    assert 14_000_000 < bits < 15_000_000  # ~1.8 bytes per item at 0.1%
+    assert hashes == 10
+
+    next_capacity, next_bits, next_hashes = layer_parameters(1_000_000, 0.001, 2, 0.5, 1)
+    assert next_capacity == 2_000_000
+    assert next_bits > 2 * bits
+    assert next_hashes == 11
+
+def test_estimated_false_positive_rate_at_capacity():
+    _, bits, hashes = layer_parameters(1_000_000, 0.001, 2, 0.5, 0)
+    assert estimate_false_positive_rate(bits, hashes, 0) == 0.0
+    assert 0.0005 < estimate_false_positive_rate(bits, hashes, 1_000_000) < 0.0015
@@ -0,0 +1,66 @@
+# tests/test_bloom_filter.py
+import hashlib
+import pytest
+fakeredis = pytest.importorskip("fakeredis")
+from services import bloom as bloom_module
+from services.bloom import ArtistBloomFilter
+
+@pytest.fixture
+async def bloom(monkeypatch):
+    server = fakeredis.FakeServer()
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    # fakeredis has no redis.sha1hex, which the filter scripts hash with
+    await client.eval("return 1", 0)
+    server._lua_runtime.globals().redis.sha1hex = lambda value: hashlib.sha1(value).hexdigest().encode()
+    monkeypatch.setattr(bloom_module.Redis, "from_url", lambda *args, **kwargs: client)
+
+    artist_bloom = ArtistBloomFilter("redis://localhost:6379/0")
+    artist_bloom.capacity = 20
+    artist_bloom.error_rate = 0.01
+    await artist_bloom.init()
+    yield artist_bloom
+    await client.aclose()
+
+async def promote(artist_bloom, generation="0"):
+    await artist_bloom._promote_script(keys=[artist_bloom.key], args=[generation])
+
+@pytest.mark.asyncio
+async def test_everything_possible_until_loaded(bloom):
+    await bloom.add_many(["known"])
+    assert await bloom.contains_many(["known", "unknown"]) == [True, True]
+
+@pytest.mark.asyncio
+async def test_added_ids_are_found_and_unknown_ones_mostly_ruled_out(bloom):
+    known = [f"artist{i}" for i in range(15)]
+    await bloom.add_many(known)
+    await promote(bloom)
+
+    assert all(await bloom.contains_many(known))
+    unknown = await bloom.contains_many([f"other{i}" for i in range(200)])
+    assert sum(unknown) <= 10
+
+@pytest.mark.asyncio
+async def test_full_layer_scales_out_without_losing_ids(bloom):
+    known = [f"artist{i}" for i in range(70)]
+    for start in range(0, len(known), 10):
+        await bloom.add_many(known[start:start + 10])
+    await promote(bloom)
+
+    stats = await bloom.stats()
+    assert len(stats["layers"]) >= 3
+    assert stats["layers"][1]["capacity"] == 40
+    # An ID that is a false positive when added is not counted again
+    assert 65 <= stats["items"] <= 70
+    assert all(await bloom.contains_many(known))
+
+@pytest.mark.asyncio
+async def test_inserts_during_rebuild_reach_both_generations(bloom):
+    await bloom.add_many(["old"])
+    await promote(bloom)
+    await bloom.redis.set(f"{bloom.key}:building", "1")
+    await bloom.add_many(["during"])
+    await bloom.add_many(["loaded"], generation="1")
+    await promote(bloom, "1")
+
+    assert await bloom.contains_many(["during", "loaded"]) == [True, True]
+    assert await bloom.redis.exists(f"{bloom.key}:0:meta") == 0
@@ -0,0 +1,56 @@
+# tests/test_catalog.py
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+from services.catalog import CatalogService, encode_cursor, decode_cursor
+from models.spotify import SpotifyArtists
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor("created_at", created_at, "0OdUWJ0sBjDrqHygGUXeCF")
+    assert decode_cursor(cursor, "created_at") == (created_at, "0OdUWJ0sBjDrqHygGUXeCF")
+
+    cursor = encode_cursor("popularity", 73, "0OdUWJ0sBjDrqHygGUXeCF")
+    assert decode_cursor(cursor, "popularity") == (73, "0OdUWJ0sBjDrqHygGUXeCF")
+
+def test_cursor_rejects_other_sort_and_garbage():
+    cursor = encode_cursor("popularity", 73, "0OdUWJ0sBjDrqHygGUXeCF")
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "created_at")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "popularity")
+
+def test_page_query_seeks_instead_of_offset():
+    cursor = encode_cursor("popularity", 73, "0OdUWJ0sBjDrqHygGUXeCF")
+    stmt = CatalogService(None).build_artists_query(
+        sort="popularity", descending=True, cursor=cursor, genre_id=5, limit=100
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "(artists.popularity, artists.id) < (" in sql
+    assert "artists.genre_ids @>" in sql
+    assert "ORDER BY artists.popularity DESC, artists.id DESC" in sql
+    assert "OFFSET" not in sql
+
+def test_name_search_is_ordered_by_trigram_distance():
+    stmt = CatalogService(None).build_name_search_query("radiohed", limit=20)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "artists.name %% %(name_1)s" in sql
+    assert "ORDER BY artists.name <-> %(name_2)s" in sql
+
+@pytest.mark.asyncio
+async def test_name_search_rejects_short_queries():
+    with pytest.raises(ValueError):
+        await CatalogService(None).search_by_name(" a ")
+
+@pytest.mark.asyncio
+async def test_name_search_results_fit_the_search_response():
+    session = AsyncMock()
+    session.execute.return_value = [
+        SimpleNamespace(id="0OdUWJ0sBjDrqHygGUXeCF", name="Band", genres=None, popularity=None, similarity=0.8)
+    ]
+    artists = await CatalogService(session).search_by_name("band")
+
+    assert artists[0]["popularity"] == 0
+    SpotifyArtists(artists=artists)
@@ -0,0 +1,46 @@
+# tests/test_counters.py
+import pytest
+from unittest.mock import AsyncMock, patch
+from services.counters import get_status_counters
+
+@pytest.mark.asyncio
+async def test_status_counters_come_from_redis():
+    redis_service = AsyncMock()
+    redis_service.get_counters.return_value = {
+        "total_artists": "1200",
+        "total_searches": "35",
+        "earliest_search_time": "2024-01-01T00:00:00+00:00",
+        "reconciled_at": "2024-01-02T00:00:00+00:00",
+    }
+    with patch('services.counters.reconcile_counters') as reconcile:
+        counters = await get_status_counters(AsyncMock(), redis_service)
+
+    reconcile.assert_not_called()
+    assert counters == {
+        "total_artists": 1200,
+        "total_searches": 35,
+        "earliest_search_time": "2024-01-01T00:00:00+00:00",
+    }
+
+@pytest.mark.asyncio
+async def test_missing_counters_are_seeded_once():
+    redis_service = AsyncMock()
+    redis_service.get_counters.return_value = {}
+    seeded = {"total_artists": 0, "total_searches": 0, "earliest_search_time": None, "drift": {}}
+    with patch('services.counters.reconcile_counters', AsyncMock(return_value=seeded)) as reconcile:
+        counters = await get_status_counters(AsyncMock(), redis_service)
+
+    reconcile.assert_awaited_once()
+    assert counters == {"total_artists": 0, "total_searches": 0, "earliest_search_time": None}
+
+@pytest.mark.asyncio
+async def test_increments_before_the_first_reconciliation_do_not_block_seeding():
+    redis_service = AsyncMock()
+    # A page wrote new artists before anything seeded the counters
+    redis_service.get_counters.return_value = {"total_artists": "50"}
+    seeded = {"total_artists": 1250, "total_searches": 35, "earliest_search_time": None, "drift": {}}
+    with patch('services.counters.reconcile_counters', AsyncMock(return_value=seeded)) as reconcile:
+        counters = await get_status_counters(AsyncMock(), redis_service)
+
+    reconcile.assert_awaited_once()
+    assert counters["total_artists"] == 1250
@@ -2,7 +2,8 @@
 import pytest
 from unittest.mock import patch
 from sqlalchemy.ext.asyncio import AsyncSession
-from services.database import DatabaseService
+from sqlalchemy.dialects import postgresql
+from services.database import DatabaseService, artist_content_hash
 from models.spotify import SpotifyArtist
 from tests.conftest import TestArtist
 
@@ -31,4 +32,20 @@ async def test_upsert_artists(test_session: AsyncSession):
         popularity=85
     )
     result = await db_service.upsert_artists([updated_artist])
-    assert len(result) == 1
\ No newline at end of file
+    assert len(result) == 1
+
+def test_content_hash_ignores_genre_order():
+    artist = SpotifyArtist(id="test_id", name="Test Artist", genres=["rock", "pop"], popularity=80)
+    reordered = SpotifyArtist(id="test_id", name="Test Artist", genres=["pop", "rock"], popularity=80)
+    more_popular = SpotifyArtist(id="test_id", name="Test Artist", genres=["rock", "pop"], popularity=81)
+    assert artist_content_hash(artist) == artist_content_hash(reordered)
+    assert artist_content_hash(artist) != artist_content_hash(more_popular)
+
+
+def test_refresh_statement_only_updates_changed_rows(test_session: AsyncSession):
+    artist = SpotifyArtist(id="test_id", name="Test Artist", genres=["rock"], popularity=80)
+    stmt = DatabaseService(test_session)._refresh_statement([artist], {"test_id": [1]})
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    assert "artists.content_hash IS DISTINCT FROM excluded.content_hash" in sql
+    assert "xmax = 0" in sql
@@ -0,0 +1,73 @@
+# tests/test_dispatcher.py
+import pytest
+from unittest.mock import AsyncMock, patch
+from services.redis import RedisService
+from services.dispatcher import SearchDispatcher
+
+def make_dispatcher():
+    # 10 requests / 30s, headroom 2, ceiling 20 from the default config
+    return SearchDispatcher(RedisService("redis://localhost:6379/0"))
+
+def test_target_in_flight_scales_with_latency():
+    dispatcher = make_dispatcher()
+    assert dispatcher.target_in_flight(1.0) == 3
+    assert dispatcher.target_in_flight(15.0) == 7
+    assert dispatcher.target_in_flight(600.0) == 20
+
+def test_compute_admission():
+    dispatcher = make_dispatcher()
+    assert dispatcher.compute_admission(active_count=0, queue_length=0, page_latency=1.0) == 3
+    assert dispatcher.compute_admission(active_count=2, queue_length=1, page_latency=1.0) == 1
+    assert dispatcher.compute_admission(active_count=5, queue_length=0, page_latency=1.0) == 0
+    # A pile of requests already sleeping on the limiter blocks admission
+    assert dispatcher.compute_admission(active_count=0, queue_length=3, page_latency=1.0) == 0
+
+@pytest.mark.asyncio
+async def test_saturated_dispatch_skips_the_frontier_count():
+    dispatcher = make_dispatcher()
+    dispatcher.get_budget = AsyncMock(return_value={
+        "active_searches": 3, "limiter_queue_length": 0, "page_latency": 1.0,
+        "target_in_flight": 3, "admit": 0,
+    })
+    dispatcher.redis_service.set_frontier_size = AsyncMock()
+
+    with patch("services.dispatcher.SearchStringGenerator") as generator_class:
+        assert await dispatcher.dispatch(spawn=lambda search: None) == []
+
+    generator_class.assert_not_called()
+    dispatcher.redis_service.set_frontier_size.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_sweep_refreshes_frontier_size_when_no_slot_is_free():
+    dispatcher = make_dispatcher()
+    dispatcher.get_budget = AsyncMock(return_value={
+        "active_searches": 3, "limiter_queue_length": 0, "page_latency": 1.0,
+        "target_in_flight": 3, "admit": 0,
+    })
+    dispatcher.redis_service.set_frontier_size = AsyncMock()
+
+    with patch("services.dispatcher.SearchStringGenerator") as generator_class:
+        generator = generator_class.return_value
+        generator.initialize = AsyncMock()
+        generator.count_frontier = AsyncMock(return_value=1234)
+        spawned = await dispatcher.dispatch(spawn=lambda search: None, refresh_frontier=True)
+
+    assert spawned == []
+    dispatcher.redis_service.set_frontier_size.assert_awaited_once_with(1234)
+
+@pytest.mark.asyncio
+async def test_completed_searches_shrink_the_recorded_frontier():
+    fakeredis = pytest.importorskip("fakeredis")
+    from datetime import datetime, timezone
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    completed_at = datetime.now(timezone.utc)
+
+    # Nothing recorded yet: the completion does not invent a size
+    await redis_service.record_search_completed(completed_at, "ab")
+    assert await redis_service.get_frontier_size() is None
+
+    await redis_service.set_frontier_size(1)
+    await redis_service.record_search_completed(completed_at, "ac")
+    await redis_service.record_search_completed(completed_at, "ad")
+    assert await redis_service.get_frontier_size() == 0
@@ -0,0 +1,38 @@
+# tests/test_events.py
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from services.events import EventBroadcaster, event_stream
+
+@pytest.mark.asyncio
+async def test_events_fan_out_and_lagging_viewer_is_cut_off():
+    broadcaster = EventBroadcaster("redis://localhost:6379/0", queue_size=2)
+    with patch.object(EventBroadcaster, '_listen', AsyncMock()):
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+
+    broadcaster.publish_local('{"type": "search_started"}')
+    assert fast.get_nowait() == '{"type": "search_started"}'
+
+    broadcaster.publish_local('{"type": "request"}')
+    broadcaster.publish_local('{"type": "page_fetched"}')
+    # The slow viewer had two unread events: its queue now only holds the disconnect marker
+    assert slow.get_nowait() is None
+    assert slow.empty()
+    assert fast.qsize() == 2
+
+@pytest.mark.asyncio
+async def test_stream_starts_with_snapshot_then_relays_events():
+    broadcaster = EventBroadcaster("redis://localhost:6379/0")
+    snapshotter = MagicMock()
+    snapshotter.current = AsyncMock(return_value=MagicMock(body=b'{"active_search_count":1}'))
+
+    with patch.object(EventBroadcaster, '_listen', AsyncMock()):
+        stream = event_stream(broadcaster, snapshotter)
+        assert await stream.__anext__() == 'event: snapshot\ndata: {"active_search_count":1}\n\n'
+
+        broadcaster.publish_local('{"type": "search_removed", "query": "abc"}')
+        assert await stream.__anext__() == 'data: {"type": "search_removed", "query": "abc"}\n\n'
+
+        broadcaster.publish_local(None)
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+    assert not broadcaster._queues
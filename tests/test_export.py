@@ -0,0 +1,73 @@
+# tests/test_export.py
+import io
+import json
+import pytest
+from collections import namedtuple
+from datetime import datetime, timezone
+from services.export import ArtistExporter, _StreamSink
+
+Row = namedtuple("Row", ["id", "name", "genres", "popularity", "created_at"])
+CREATED_AT = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+class ChunkedExporter(ArtistExporter):
+    """Exporter fed from in-memory chunks instead of a server-side cursor"""
+
+    def __init__(self, chunks, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_chunks = chunks
+
+    async def _chunks(self):
+        for chunk in self.fake_chunks:
+            yield chunk
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_one_block_per_chunk():
+    chunks = [
+        [Row("a", "Artist A", ["rock"], 10, CREATED_AT), Row("b", "Artist B", [], 20, CREATED_AT)],
+        [Row("c", "Artist C", ["pop"], 30, CREATED_AT)],
+    ]
+    exporter = ChunkedExporter(chunks, format="ndjson")
+    blocks = [block async for block in exporter.stream()]
+
+    assert len(blocks) == 2
+    lines = b"".join(blocks).decode("utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a", "b", "c"]
+    assert json.loads(lines[0])["created_at"] == CREATED_AT.isoformat()
+    assert exporter.stats()["rows"] == 3
+
+def test_export_query_is_bounded_by_watermark():
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    exporter = ArtistExporter(format="ndjson", since=since)
+    sql = str(exporter.build_query())
+    assert "artists.created_at < :created_at_1" in sql
+    assert "artists.created_at >= :created_at_2" in sql
+    assert "ORDER BY artists.created_at, artists.id" in sql
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        ArtistExporter(format="csv")
+
+def test_stream_sink_keeps_absolute_position():
+    sink = _StreamSink()
+    sink.write(b"PAR1")
+    assert sink.drain() == b"PAR1"
+    sink.write(b"row group")
+    assert sink.tell() == 13
+
+@pytest.mark.asyncio
+async def test_parquet_export_reads_back_one_row_group_per_chunk():
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    chunks = [
+        [Row("a", "Artist A", ["rock", "pop"], 10, CREATED_AT), Row("b", "Artist B", [], None, CREATED_AT)],
+        [Row("c", "Artist C", ["pop"], 30, CREATED_AT)],
+    ]
+    exporter = ChunkedExporter(chunks, format="parquet")
+    data = b"".join([block async for block in exporter.stream()])
+
+    parquet_file = pyarrow_parquet.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 2
+    rows = parquet_file.read().to_pylist()
+    assert [row["id"] for row in rows] == ["a", "b", "c"]
+    assert rows[0]["genres"] == ["rock", "pop"]
+    assert rows[1]["popularity"] is None
+    assert rows[2]["created_at"] == CREATED_AT
@@ -0,0 +1,24 @@
+# tests/test_genres.py
+import pytest
+from unittest.mock import AsyncMock
+from services.genres import GenreService
+
+@pytest.mark.asyncio
+async def test_increment_counts_batches_one_update():
+    session = AsyncMock()
+    await GenreService(session).increment_counts([[3, 1], [1], [2, 2]])
+
+    session.execute.assert_awaited_once()
+    _, params = session.execute.await_args.args
+    # One row per genre in ID order; a genre listed twice on one artist counts once
+    assert params == [
+        {"genre_id": 1, "delta": 2},
+        {"genre_id": 2, "delta": 1},
+        {"genre_id": 3, "delta": 1},
+    ]
+
+@pytest.mark.asyncio
+async def test_increment_counts_skips_empty():
+    session = AsyncMock()
+    await GenreService(session).increment_counts([[], []])
+    session.execute.assert_not_awaited()
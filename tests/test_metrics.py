@@ -0,0 +1,50 @@
+# tests/test_metrics.py
+import os
+import pytest
+from prometheus_client import REGISTRY
+import config.metrics as metrics_config
+from config.metrics import use_metrics_family
+from services.metrics import timed, render_metrics, update_gauges, reset_multiproc_dir, REDIS_OP_SECONDS
+
+@pytest.mark.asyncio
+async def test_timed_observes_even_on_error():
+    histogram = REDIS_OP_SECONDS.labels(op="test_op")
+
+    @timed(histogram)
+    async def failing():
+        raise RuntimeError("boom")
+
+    before = REGISTRY.get_sample_value("redis_op_seconds_count", {"op": "test_op"}) or 0
+    with pytest.raises(RuntimeError):
+        await failing()
+    assert REGISTRY.get_sample_value("redis_op_seconds_count", {"op": "test_op"}) == before + 1
+
+def test_render_includes_gauges():
+    update_gauges({"active_searches": 3, "target_in_flight": 5, "limiter_queue_length": 1}, ingestion_backlog=42)
+    body, content_type = render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"active_searches 3.0" in body
+    assert b"search_slots 5.0" in body
+    assert b"ingestion_backlog 42.0" in body
+    assert b"spotify_request_seconds_bucket" in body
+
+
+def test_resetting_one_family_keeps_the_others_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setitem(metrics_config.METRICS_CONFIG, "multiproc_dir", str(tmp_path))
+    flusher_file = tmp_path / "flusher" / "counter_1.db"
+    flusher_file.parent.mkdir()
+    flusher_file.write_bytes(b"")
+    worker_file = tmp_path / "worker" / "counter_2.db"
+    worker_file.parent.mkdir()
+    worker_file.write_bytes(b"")
+
+    use_metrics_family("worker")
+    # Called again, e.g. by a re-imported celery_config, it must not nest
+    use_metrics_family("worker")
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(tmp_path / "worker")
+    assert metrics_config.METRICS_CONFIG["multiproc_dir"] == str(tmp_path / "worker")
+
+    reset_multiproc_dir()
+    assert not worker_file.exists()
+    assert flusher_file.exists()
@@ -0,0 +1,250 @@
+# tests/test_outbox.py
+import asyncio
+import gzip
+import json
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from services.artist_ids import pack_artist_id
+from services.outbox import encode_artist_entry, decode_artist_entry
+from services.ingestion import AdaptiveBatchSize, IngestionClient, OutboxFlusher, decode_artist_entries
+
+ENTRIES = [
+    (b"1-0", {b"id": pack_artist_id("0OdUWJ0sBjDrqHygGUXeCF")}),
+    (b"1-1", {b"id": pack_artist_id("4Z8W4fKeB5YxbusRsdQVPb")}),
+]
+
+def make_outbox():
+    outbox = AsyncMock()
+    outbox.claim_timeout_ms = 120000
+    outbox.claim.return_value = []
+    outbox.reclaim.return_value = []
+    return outbox
+
+def test_entry_round_trip():
+    fields = encode_artist_entry("0OdUWJ0sBjDrqHygGUXeCF", ["rock", "art rock", "música urbana"])
+    # The binary client hands fields back with bytes keys
+    fields = {key.encode(): value for key, value in fields.items()}
+    assert decode_artist_entry(fields) == ("0OdUWJ0sBjDrqHygGUXeCF", ["rock", "art rock", "música urbana"])
+
+    assert "genres" not in encode_artist_entry("4Z8W4fKeB5YxbusRsdQVPb", [])
+
+def test_decode_entries():
+    entries = ENTRIES + [(b"2-0", {b"id": pack_artist_id("1Xyo4u8uXC1ZmMpatF05PJ"), b"genres": b"pop\x1fr&b"})]
+    artist_ids, genres_map = decode_artist_entries(entries)
+    assert artist_ids == ["0OdUWJ0sBjDrqHygGUXeCF", "4Z8W4fKeB5YxbusRsdQVPb", "1Xyo4u8uXC1ZmMpatF05PJ"]
+    assert genres_map == {"1Xyo4u8uXC1ZmMpatF05PJ": ["pop", "r&b"]}
+
+@pytest.mark.asyncio
+async def test_entries_are_acked_after_successful_post():
+    outbox = make_outbox()
+    send = AsyncMock(return_value=True)
+    semaphore = asyncio.Semaphore(1)
+    flusher = OutboxFlusher(outbox, send, semaphore)
+
+    await semaphore.acquire()
+    await flusher._deliver(ENTRIES)
+
+    send.assert_awaited_once_with(ENTRIES)
+    # Acknowledged by the next claim rather than a round trip of its own
+    outbox.ack.assert_not_awaited()
+    assert flusher._acks == [b"1-0", b"1-1"]
+    assert flusher.sent == 2
+    assert not semaphore.locked()
+
+@pytest.mark.asyncio
+async def test_delivered_entries_are_acked_by_the_next_claim():
+    outbox = make_outbox()
+    acked = []
+
+    async def claim(count, block_ms=None, ack_ids=None):
+        acked.extend(ack_ids)
+        await asyncio.sleep(0.001)
+        return ENTRIES if outbox.claim.await_count == 1 else []
+
+    outbox.claim.side_effect = claim
+    flusher = OutboxFlusher(outbox, AsyncMock(return_value=True), asyncio.Semaphore(1))
+    flusher.max_linger = 0.01
+
+    stop = asyncio.Event()
+    task = asyncio.ensure_future(flusher.run(stop))
+    for _ in range(100):
+        if acked:
+            break
+        await asyncio.sleep(0.01)
+    stop.set()
+    await asyncio.wait_for(task, timeout=1)
+
+    assert acked == [b"1-0", b"1-1"]
+    outbox.ack.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_leftover_acks_are_sent_on_shutdown():
+    outbox = make_outbox()
+    flusher = OutboxFlusher(outbox, AsyncMock(return_value=True), asyncio.Semaphore(1))
+    flusher._acks = [b"1-0"]
+
+    stop = asyncio.Event()
+    stop.set()
+    await flusher.run(stop)
+
+    outbox.ack.assert_awaited_once_with([b"1-0"])
+
+@pytest.mark.asyncio
+async def test_failed_post_leaves_entries_pending():
+    outbox = make_outbox()
+    flusher = OutboxFlusher(outbox, AsyncMock(return_value=False), asyncio.Semaphore(1))
+    size = flusher.batch_size.size
+
+    await flusher.semaphore.acquire()
+    await flusher._deliver(ENTRIES)
+
+    # Unacknowledged entries stay in the group's pending list for the reclaim sweep
+    outbox.ack.assert_not_awaited()
+    assert flusher.batch_size.size < size
+    assert not flusher.semaphore.locked()
+
+@pytest.mark.asyncio
+async def test_nothing_is_claimed_without_a_free_slot():
+    outbox = make_outbox()
+    flusher = OutboxFlusher(outbox, AsyncMock(return_value=True), asyncio.Semaphore(1))
+    await flusher.semaphore.acquire()
+
+    stop = asyncio.Event()
+    task = asyncio.ensure_future(flusher.run(stop))
+    await asyncio.sleep(0.05)
+    # Entries claimed now would sit out the wait for a slot while their claim ages
+    outbox.claim.assert_not_awaited()
+    outbox.reclaim.assert_not_awaited()
+
+    stop.set()
+    flusher.semaphore.release()
+    await asyncio.wait_for(task, timeout=1)
+    outbox.claim.assert_awaited()
+    assert not flusher.semaphore.locked()
+
+def test_claim_timeout_must_outlast_linger_and_post():
+    outbox = make_outbox()
+    outbox.claim_timeout_ms = 60000
+    with pytest.raises(ValueError):
+        OutboxFlusher(outbox, AsyncMock(), asyncio.Semaphore(1))
+
+def test_adaptive_batch_size():
+    batch_size = AdaptiveBatchSize(minimum=10, maximum=40, initial=20, target_latency=1.0)
+    assert batch_size.observe(0.5, True) == 30
+    assert batch_size.observe(0.5, True) == 40
+    assert batch_size.observe(0.5, True) == 40
+    assert batch_size.observe(2.0, True) == 30
+    assert batch_size.observe(0.5, False) == 15
+    assert batch_size.observe(0.5, False) == 10
+
+@pytest.mark.asyncio
+async def test_claim_recreates_a_deleted_group(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import services.outbox as outbox_module
+    from services.outbox import IngestionOutbox
+    from services.redis import RedisService
+
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = fakeredis.aioredis.FakeRedis()
+    redis_service.redis_bytes = redis_service.redis
+    monkeypatch.setattr(outbox_module, "_ensured_groups", set())
+    outbox = IngestionOutbox(redis_service, "test:outbox")
+
+    await outbox.add([encode_artist_entry("0OdUWJ0sBjDrqHygGUXeCF")])
+    assert len(await outbox.claim(10)) == 1
+
+    # The stream and its group vanish; the next add recreates only the stream
+    await redis_service.redis.delete("test:outbox")
+    await outbox.add([encode_artist_entry("4Z8W4fKeB5YxbusRsdQVPb")])
+
+    entries = await outbox.claim(10)
+    assert [decode_artist_entry(fields)[0] for _, fields in entries] == ["4Z8W4fKeB5YxbusRsdQVPb"]
+    assert (await outbox.stats())["in_flight"] == 1
+
+@pytest.mark.asyncio
+async def test_claim_acknowledges_delivered_entries_in_the_same_pipeline(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import services.outbox as outbox_module
+    from services.outbox import IngestionOutbox
+    from services.redis import RedisService
+
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = fakeredis.aioredis.FakeRedis()
+    redis_service.redis_bytes = redis_service.redis
+    monkeypatch.setattr(outbox_module, "_ensured_groups", set())
+    outbox = IngestionOutbox(redis_service, "test:outbox")
+
+    await outbox.add([encode_artist_entry("0OdUWJ0sBjDrqHygGUXeCF")])
+    delivered = [entry_id for entry_id, _ in await outbox.claim(10)]
+    await outbox.add([encode_artist_entry("4Z8W4fKeB5YxbusRsdQVPb")])
+
+    entries = await outbox.claim(10, ack_ids=delivered)
+    assert [decode_artist_entry(fields)[0] for _, fields in entries] == ["4Z8W4fKeB5YxbusRsdQVPb"]
+    stats = await outbox.stats()
+    assert stats["backlog"] == 1
+    assert stats["in_flight"] == 1
+    assert stats["acked_total"] == 1
+
+@pytest.mark.asyncio
+async def test_reclaim_recreates_a_deleted_group(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import services.outbox as outbox_module
+    from services.outbox import IngestionOutbox
+    from services.redis import RedisService
+
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = fakeredis.aioredis.FakeRedis()
+    redis_service.redis_bytes = redis_service.redis
+    monkeypatch.setattr(outbox_module, "_ensured_groups", set())
+    outbox = IngestionOutbox(redis_service, "test:outbox")
+    await outbox.add([encode_artist_entry("0OdUWJ0sBjDrqHygGUXeCF")])
+    await outbox.claim(10)
+
+    await redis_service.redis.xgroup_destroy("test:outbox", outbox.group)
+    # xpending_range recreates the group, then XAUTOCLAIM loses it again
+    real_xautoclaim = redis_service.redis.xautoclaim
+    calls = []
+
+    async def xautoclaim(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            await redis_service.redis.xgroup_destroy("test:outbox", outbox.group)
+        return await real_xautoclaim(*args, **kwargs)
+
+    monkeypatch.setattr(redis_service.redis, "xautoclaim", xautoclaim)
+    assert await outbox.reclaim() == []
+    assert len(calls) == 2
+
+def gzip_client(handler):
+    client = IngestionClient()
+    client.gzip = True
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+@pytest.mark.asyncio
+async def test_gzip_is_switched_off_when_only_plain_bodies_are_accepted():
+    bodies = []
+
+    def handler(request):
+        if request.headers.get("Content-Encoding") == "gzip":
+            bodies.append(json.loads(gzip.decompress(request.content)))
+            return httpx.Response(415)
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"count": 1})
+
+    client = gzip_client(handler)
+    assert await client.send_artists(["0OdUWJ0sBjDrqHygGUXeCF"])
+    assert client.gzip is False
+    assert len(bodies) == 2 and bodies[0] == bodies[1]
+
+    assert await client.send_artists(["4Z8W4fKeB5YxbusRsdQVPb"])
+    assert len(bodies) == 3
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_gzip_stays_on_when_the_batch_itself_is_rejected():
+    client = gzip_client(lambda request: httpx.Response(400))
+    assert not await client.send_artists(["0OdUWJ0sBjDrqHygGUXeCF"])
+    assert client.gzip is True
+    await client.close()
@@ -0,0 +1,59 @@
+# tests/test_profiling.py
+import asyncio
+import threading
+import time
+import pytest
+from services.profiling import SamplingProfiler, LoopMonitor, format_folded, merge_folded
+
+def spin_in_known_function(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_in_known_function, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        counts = SamplingProfiler(interval=0.001).profile(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = {stack: count for stack, count in counts.items() if stack.startswith("busy_worker;")}
+    assert busy
+    assert all("test_profiling.py:spin_in_known_function" in stack for stack in busy)
+
+def test_one_profile_at_a_time():
+    profiler = SamplingProfiler(interval=0.001)
+    thread = threading.Thread(target=profiler.profile, args=(0.2,))
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(RuntimeError):
+        profiler.profile(0.1)
+    thread.join()
+
+def test_folded_profiles_merge_by_stack():
+    first = format_folded({"MainThread;a.py:run;b.py:parse": 3, "MainThread;a.py:run": 1})
+    second = format_folded({"MainThread;a.py:run;b.py:parse": 2})
+
+    assert first.splitlines()[0] == "MainThread;a.py:run;b.py:parse 3"
+    assert merge_folded([first, second]) == {
+        "MainThread;a.py:run;b.py:parse": 5,
+        "MainThread;a.py:run": 1,
+    }
+
+@pytest.mark.asyncio
+async def test_loop_monitor_counts_stalls():
+    # The threshold sits well above scheduling jitter on a loaded CI runner,
+    # and the blocking call well above the threshold
+    monitor = LoopMonitor(asyncio.get_running_loop(), interval=0.01, slow_callback=0.25)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert monitor.stalls == 0
+
+        time.sleep(1.0)  # blocks the loop
+        await asyncio.sleep(0.1)
+        assert monitor.stalls == 1
+    finally:
+        monitor.stop()
@@ -0,0 +1,69 @@
+# tests/test_rate_limiter_sim.py
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from services.redis import RedisService
+from benchmarks.rate_limiter_sim import VirtualClock, jain_fairness, percentile, run_simulation
+
+@pytest.mark.asyncio
+async def test_virtual_clock_jumps_to_next_wakeup():
+    clock = VirtualClock(start=0.0)
+    woke = []
+
+    async def sleeper(name, seconds):
+        try:
+            await clock.sleep(seconds)
+            woke.append((name, clock.now))
+        finally:
+            clock.worker_finished()
+
+    clock.worker_started()
+    clock.worker_started()
+    tasks = [asyncio.ensure_future(sleeper("slow", 30.0)), asyncio.ensure_future(sleeper("fast", 0.5))]
+    await asyncio.wait_for(clock.run(), timeout=1)
+    await asyncio.gather(*tasks)
+
+    assert woke == [("fast", 0.5), ("slow", 30.0)]
+
+@pytest.mark.asyncio
+async def test_wait_for_request_slot_sleeps_until_admitted():
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.record_api_request = AsyncMock(side_effect=[False, False, True])
+    redis_service.add_limiter_waiter = AsyncMock()
+    redis_service.remove_limiter_waiter = AsyncMock()
+    redis_service.get_rate_limit_info = AsyncMock(return_value={"time_until_next_request": 2.0})
+    redis_service.sleep = AsyncMock()
+
+    queued = await redis_service.wait_for_request_slot(query="ab", offset=50)
+
+    assert queued is True
+    assert redis_service.sleep.await_count == 2
+    redis_service.sleep.assert_awaited_with(2.01)
+    # One waiter entry, refreshed on each retry and removed once admitted
+    tokens = {call.args[0] for call in redis_service.add_limiter_waiter.await_args_list}
+    assert len(tokens) == 1
+    redis_service.remove_limiter_waiter.assert_awaited_once_with(tokens.pop())
+
+@pytest.mark.asyncio
+async def test_wait_for_request_slot_admitted_immediately():
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.record_api_request = AsyncMock(return_value=True)
+    redis_service.remove_limiter_waiter = AsyncMock()
+
+    assert await redis_service.wait_for_request_slot(query="ab") is False
+    redis_service.remove_limiter_waiter.assert_not_awaited()
+
+def test_report_statistics():
+    assert jain_fairness([30, 30, 30]) == 1.0
+    assert jain_fairness([90, 0, 0]) == pytest.approx(1 / 3)
+    assert percentile([0.0, 1.0, 2.0, 3.0], 0.5) == 2.0
+    assert percentile([], 0.99) == 0.0
+
+@pytest.mark.asyncio
+async def test_simulation_never_exceeds_the_configured_rate():
+    pytest.importorskip("fakeredis")
+    report = await asyncio.wait_for(run_simulation(workers=3, seconds=120), timeout=30)
+
+    assert 0 < report["granted"] <= report["theoretical_max"]
+    assert report["utilization"] <= 1.0
+    assert report["fairness"]["min_per_worker"] > 0
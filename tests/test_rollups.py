@@ -0,0 +1,82 @@
+# tests/test_rollups.py
+import pytest
+from unittest.mock import MagicMock
+from services.rollups import add_rollup_commands, get_history, bucket_start
+from services.redis import RedisService
+
+class FakePipeline:
+    """Records queued commands and answers HGETALL from a dict"""
+
+    def __init__(self, hashes=None):
+        self.hashes = hashes or {}
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def hincrby(self, key, field, amount):
+        self.commands.append(("hincrby", key, field, amount))
+
+    async def expire(self, key, seconds):
+        self.commands.append(("expire", key, seconds))
+
+    async def publish(self, channel, message):
+        self.commands.append(("publish", channel, message))
+
+    async def hgetall(self, key):
+        self.commands.append(("hgetall", key))
+
+    async def execute(self):
+        return [self.hashes.get(command[1], {}) for command in self.commands if command[0] == "hgetall"]
+
+@pytest.mark.asyncio
+async def test_counts_go_to_every_resolution():
+    pipe = FakePipeline()
+    now = 1_700_000_123.0
+    await add_rollup_commands(pipe, {"pages": 1, "artists_found": 50, "new_artists": 0}, now=now)
+
+    increments = [command for command in pipe.commands if command[0] == "hincrby"]
+    assert ("hincrby", f"rollup:minute:{bucket_start(now, 60)}", "pages", 1) in increments
+    assert ("hincrby", f"rollup:hour:{bucket_start(now, 3600)}", "artists_found", 50) in increments
+    assert ("hincrby", f"rollup:day:{bucket_start(now, 86400)}", "pages", 1) in increments
+    # Zero counts are skipped, every bucket gets its retention
+    assert not any(command[2] == "new_artists" for command in increments)
+    assert len([command for command in pipe.commands if command[0] == "expire"]) == 3
+
+@pytest.mark.asyncio
+async def test_history_fills_gaps_and_derives_efficiency():
+    pipe = FakePipeline({
+        "rollup:minute:600": {"requests": "10", "new_artists": "25"},
+        "rollup:minute:720": {"pages": "3"},
+    })
+    redis_service = MagicMock()
+    redis_service.redis.pipeline.return_value = pipe
+
+    history = await get_history(redis_service, "minute", 600, 725)
+
+    assert [point["start"] for point in history] == [600, 660, 720]
+    assert history[0]["new_artists_per_request"] == 2.5
+    assert history[1]["requests"] == 0 and history[1]["new_artists_per_request"] is None
+    assert history[2]["pages"] == 3
+
+@pytest.mark.asyncio
+async def test_history_range_is_bounded():
+    with pytest.raises(ValueError):
+        await get_history(MagicMock(), "minute", 0, 60 * 5000)
+
+@pytest.mark.asyncio
+async def test_new_artist_rollup_shares_the_counter_round_trip():
+    pipe = FakePipeline()
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = MagicMock()
+    redis_service.redis.pipeline.return_value = pipe
+
+    await redis_service.increment_counter("total_artists", 3, rollup={"new_artists": 3})
+
+    redis_service.redis.pipeline.assert_called_once()
+    assert ("hincrby", redis_service.counters_key, "total_artists", 3) in pipe.commands
+    assert [command[2:] for command in pipe.commands if command[1].startswith("rollup:")
+            and command[0] == "hincrby"] == [("new_artists", 3)] * 3
@@ -0,0 +1,21 @@
+# tests/test_sharding.py
+from services.sharding import HashRing
+
+PREFIXES = [f"{a}{b}{c}" for a in "abcdefgh" for b in "ijklmnop" for c in "0123456789"]
+
+def test_every_prefix_has_one_owner():
+    ring = HashRing(["node-a", "node-b", "node-c"])
+    owners = {prefix: ring.node_for(prefix) for prefix in PREFIXES}
+    assert set(owners.values()) == {"node-a", "node-b", "node-c"}
+    # Same membership gives the same assignment on every node
+    assert owners == {prefix: HashRing(["node-c", "node-a", "node-b"]).node_for(prefix) for prefix in PREFIXES}
+
+def test_leaving_node_only_moves_its_own_prefixes():
+    before = HashRing(["node-a", "node-b", "node-c"])
+    after = HashRing(["node-a", "node-b"])
+    for prefix in PREFIXES:
+        if before.node_for(prefix) != "node-c":
+            assert after.node_for(prefix) == before.node_for(prefix)
+
+def test_empty_ring():
+    assert HashRing([]).node_for("abcd") is None
@@ -0,0 +1,80 @@
+# tests/test_status.py
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from services.status import StatusSnapshotter
+
+@asynccontextmanager
+async def fake_session():
+    yield AsyncMock()
+
+def make_snapshotter():
+    return StatusSnapshotter(AsyncMock(), session_factory=fake_session, interval=1.0)
+
+@pytest.mark.asyncio
+async def test_etag_only_changes_with_the_content():
+    snapshotter = make_snapshotter()
+    with patch('services.status.build_status', AsyncMock(return_value={"total_artists_collected": 1})):
+        first = await snapshotter.refresh()
+        assert (await snapshotter.refresh()).etag == first.etag
+
+    with patch('services.status.build_status', AsyncMock(return_value={"total_artists_collected": 2})):
+        second = await snapshotter.refresh()
+    assert second.etag != first.etag
+    assert second.body == b'{"total_artists_collected":2}'
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_snapshot():
+    snapshotter = make_snapshotter()
+    with patch('services.status.build_status', AsyncMock(return_value={"total_artists_collected": 1})):
+        snapshot = await snapshotter.refresh()
+    with patch('services.status.build_status', AsyncMock(side_effect=RuntimeError("db down"))):
+        with pytest.raises(RuntimeError):
+            await snapshotter.refresh()
+    assert await snapshotter.current() is snapshot
+
+def test_status_endpoint_returns_304_for_current_etag():
+    from api import app
+
+    snapshotter = make_snapshotter()
+    with patch('api.get_status_snapshotter', return_value=snapshotter), \
+            patch('services.status.build_status', AsyncMock(return_value={"active_search_count": 3})):
+        client = TestClient(app)
+        response = client.get("/status")
+        assert response.status_code == 200
+        assert response.json() == {"active_search_count": 3}
+
+        etag = response.headers["ETag"]
+        response = client.get("/status", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+@pytest.mark.asyncio
+async def test_etag_is_stable_while_the_clock_moves():
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.redis import RedisService
+
+    redis_service = RedisService("redis://localhost:6379/0")
+    redis_service.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    now = [1_700_000_000.0]
+    redis_service.clock = lambda: now[0]
+    await redis_service.redis.zadd(redis_service.requests_key, {"request-1": now[0]})
+    await redis_service.redis.hset(redis_service.counters_key, mapping={
+        "total_artists": 10, "total_searches": 2, "reconciled_at": "2024-01-01T00:00:00+00:00"
+    })
+
+    @asynccontextmanager
+    async def session_factory():
+        session = AsyncMock()
+        session.execute.return_value = MagicMock()
+        session.execute.return_value.scalars.return_value.all.return_value = []
+        yield session
+
+    snapshotter = StatusSnapshotter(redis_service, session_factory=session_factory, interval=1.0)
+    first = await snapshotter.refresh()
+    now[0] += 5
+    second = await snapshotter.refresh()
+
+    assert second.etag == first.etag
+    assert b"window_end" not in second.body
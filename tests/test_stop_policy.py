@@ -0,0 +1,32 @@
+# tests/test_stop_policy.py
+from services.stop_policy import (
+    LowYieldStopPolicy,
+    MarginalYieldStopPolicy,
+    CompositeStopPolicy,
+    StopPolicy,
+)
+
+def test_low_yield_needs_consecutive_pages():
+    policy = LowYieldStopPolicy(pages=2, min_new_ratio=0.1)
+    assert policy.observe(0, 50, 0) is None
+    assert policy.observe(50, 50, 20) is None  # streak resets
+    assert policy.observe(100, 50, 1) is None
+    assert policy.observe(150, 50, 2) == "low_yield:2_pages_under_10%"
+
+def test_marginal_yield_waits_for_min_pages():
+    policy = MarginalYieldStopPolicy(min_expected_new=1.0, min_pages=2, alpha=0.5)
+    assert policy.observe(0, 50, 0) is None
+    assert policy.observe(50, 50, 1) == "marginal_yield:0.50_under_1"
+
+def test_composite_returns_first_reason():
+    policy = CompositeStopPolicy([
+        LowYieldStopPolicy(pages=5, min_new_ratio=0.1),
+        MarginalYieldStopPolicy(min_expected_new=1.0, min_pages=1),
+    ])
+    assert policy.observe(0, 50, 0).startswith("marginal_yield")
+
+def test_only_real_policies_need_page_results():
+    # The crawler flushes the artist sink per page only for policies that can stop a search
+    assert not StopPolicy().active
+    assert LowYieldStopPolicy(pages=2, min_new_ratio=0.1).active
+    assert CompositeStopPolicy([MarginalYieldStopPolicy(min_expected_new=1.0)]).active
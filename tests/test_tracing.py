@@ -0,0 +1,100 @@
+# tests/test_tracing.py
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+import services.tracing as tracing
+from services.tracing import start_trace, span, finish_trace, summarize_traces
+
+class FakePipeline:
+    """Records LPUSH / LTRIM calls made while storing a trace"""
+
+    def __init__(self):
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def lpush(self, key, value):
+        self.commands.append(("lpush", key, value))
+
+    async def ltrim(self, key, start, end):
+        self.commands.append(("ltrim", key, start, end))
+
+    async def execute(self):
+        return [1, True]
+
+@pytest.fixture
+def sample_rate(monkeypatch):
+    def set_rate(rate):
+        monkeypatch.setattr(tracing, "get_tracing_config", lambda: {
+            "sample_rate": rate, "ring_key": "traces:recent", "ring_size": 3
+        })
+    return set_rate
+
+@pytest.mark.asyncio
+async def test_unsampled_work_records_nothing(sample_rate):
+    sample_rate(0.0)
+
+    async def search():
+        assert start_trace("search", search="ab") is None
+        with span("page", offset=0):
+            pass
+        return tracing._current_trace.get()
+
+    assert await asyncio.create_task(search()) is None
+
+@pytest.mark.asyncio
+async def test_sampled_trace_collects_spans_from_child_tasks(sample_rate):
+    sample_rate(1.0)
+    pipe = FakePipeline()
+    redis_service = MagicMock()
+    redis_service.redis.pipeline.return_value = pipe
+
+    async def handle_page():
+        with span("sink_write", artists=50):
+            await asyncio.sleep(0)
+
+    async def search():
+        trace = start_trace("search", search="ab")
+        with span("page", offset=0):
+            await asyncio.sleep(0)
+        # Tasks spawned inside the search inherit its trace
+        await asyncio.gather(asyncio.ensure_future(handle_page()))
+        await finish_trace(trace, redis_service)
+        return trace
+
+    trace = await asyncio.create_task(search())
+    stored = json.loads(pipe.commands[0][2])
+    assert stored["trace_id"] == trace.trace_id
+    assert stored["attributes"] == {"search": "ab"}
+    assert [s["name"] for s in stored["spans"]] == ["page", "sink_write"]
+    assert stored["spans"][0]["attributes"] == {"offset": 0}
+    assert stored["spans"][1]["offset_ms"] >= stored["spans"][0]["offset_ms"]
+    assert pipe.commands[1] == ("ltrim", "traces:recent", 0, 2)
+
+def test_summary_per_stage():
+    traces = [
+        {"duration_ms": 100.0, "spans": [
+            {"name": "page", "duration_ms": 60.0},
+            {"name": "sink_write", "duration_ms": 10.0},
+        ]},
+        {"duration_ms": 100.0, "spans": [
+            {"name": "page", "duration_ms": 80.0},
+        ]},
+    ]
+
+    summary = summarize_traces(traces)
+
+    assert list(summary) == ["page", "sink_write"]
+    assert summary["page"]["count"] == 2
+    assert summary["page"]["mean_ms"] == 70.0
+    assert summary["page"]["p95_ms"] == 80.0
+    assert summary["page"]["share"] == 0.7
+    assert summary["sink_write"]["share"] == 0.05
+
+def test_summary_of_no_traces():
+    assert summarize_traces([]) == {}